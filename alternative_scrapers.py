@@ -3,20 +3,34 @@
 Alternative scraping modules for battery buyers
 """
 
-import re
-import time
-import random
 import logging
-import requests
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+from rate_limiter import RateLimiter
+from contact_extractor import extract_contact_info
+from text_index import TextIndex
+from keyword_matcher import BATTERY_MATCHER
+from config import RELEVANCE_THRESHOLDS
+from http_cache import ResponseCache, CachedSession
+from html_parsing import (
+    ParsePool, page_text, parse_craigslist_results,
+    parse_directory_listings, parse_scrap_yard_listings
+)
 
 logger = logging.getLogger(__name__)
 
 class AlternativeScrapers:
-    def __init__(self):
-        self.ua = UserAgent()
-        self.session = requests.Session()
+    def __init__(self, rate_limiter=None, response_cache=None, parse_pool=None):
+        self._ua = None
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.response_cache = response_cache or ResponseCache()
+        self.session = CachedSession(self.rate_limiter, self.response_cache)
+        self.parse_pool = parse_pool or ParsePool()
+    
+    @property
+    def ua(self):
+        if self._ua is None:
+            from fake_useragent import UserAgent
+            self._ua = UserAgent()
+        return self._ua
     
     def get_random_headers(self):
         """Generate random headers to avoid detection"""
@@ -31,22 +45,7 @@ class AlternativeScrapers:
     
     def extract_contact_info(self, text):
         """Extract phone numbers and emails from text"""
-        phone_pattern = r'(\+?1?[-.\s]?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})'
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        phones = re.findall(phone_pattern, text)
-        emails = re.findall(email_pattern, text)
-        
-        # Clean phone numbers
-        cleaned_phones = []
-        for phone in phones:
-            cleaned = re.sub(r'[^\d]', '', phone)
-            if len(cleaned) == 10:
-                cleaned_phones.append(f"({cleaned[:3]}) {cleaned[3:6]}-{cleaned[6:]}")
-            elif len(cleaned) == 11 and cleaned[0] == '1':
-                cleaned_phones.append(f"({cleaned[1:4]}) {cleaned[4:7]}-{cleaned[7:]}")
-        
-        return cleaned_phones, emails
+        return extract_contact_info(text)
     
     def scrape_craigslist_services(self, city_code='newyork'):
         """Scrape Craigslist services for battery buyers"""
@@ -64,33 +63,22 @@ class AlternativeScrapers:
                 response = self.session.get(url, params=params, headers=headers, timeout=10)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
                     # Find listing items
-                    listings = soup.find_all('li', class_='result-row')[:2]  # Limit results
+                    results = self.parse_pool.parse(parse_craigslist_results, response.content)
                     
-                    for listing in listings:
+                    for title, detail_url in results:
                         try:
-                            title_elem = listing.find('a', class_='result-title')
-                            if not title_elem:
-                                continue
-                            
-                            title = title_elem.get_text(strip=True)
-                            
                             # Check if it's battery-related
-                            battery_keywords = ['battery', 'scrap', 'lead', 'recycl', 'buyer', 'purchase']
-                            if any(keyword in title.lower() for keyword in battery_keywords):
+                            if BATTERY_MATCHER.is_relevant(title, RELEVANCE_THRESHOLDS["title"]):
                                 
                                 # Try to get the detail page for contact info
-                                detail_url = title_elem.get('href', '')
                                 if detail_url.startswith('/'):
                                     detail_url = f"https://{city_code}.craigslist.org{detail_url}"
                                 
                                 # Get contact info from detail page
                                 detail_response = self.session.get(detail_url, headers=headers, timeout=5)
                                 if detail_response.status_code == 200:
-                                    detail_soup = BeautifulSoup(detail_response.content, 'html.parser')
-                                    detail_text = detail_soup.get_text()
+                                    detail_text = self.parse_pool.parse(page_text, detail_response.content)
                                     
                                     phones, emails = self.extract_contact_info(detail_text)
                                     
@@ -105,13 +93,9 @@ class AlternativeScrapers:
                                             'source_url': detail_url
                                         })
                                 
-                                time.sleep(random.uniform(1, 3))  # Rate limiting
-                                
                         except Exception as e:
                             logger.warning(f"Error parsing Craigslist listing: {e}")
                 
-                time.sleep(random.uniform(2, 4))
-                
         except Exception as e:
             logger.error(f"Error scraping Craigslist: {e}")
         
@@ -132,37 +116,29 @@ class AlternativeScrapers:
                 headers = self.get_random_headers()
                 response = self.session.get(site_url, headers=headers, timeout=10)
                 
+                if response.from_cache:
+                    logger.debug(f"Recycling site {site_url} unchanged, skipping")
+                    continue
+                
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    text = soup.get_text()
+                    text = self.parse_pool.parse(page_text, response.content)
                     
                     # Look for contact patterns near battery-related keywords
-                    lines = text.split('\n')
-                    for i, line in enumerate(lines):
-                        if any(keyword in line.lower() for keyword in ['battery', 'lead', 'automotive']):
-                            # Look for contact info in nearby lines
-                            search_range = lines[max(0, i-3):min(len(lines), i+4)]
-                            search_text = '\n'.join(search_range)
-                            
-                            phones, emails = self.extract_contact_info(search_text)
-                            
-                            if phones:
-                                # Try to find a company name
-                                potential_names = [l.strip() for l in search_range if l.strip() and len(l.strip()) > 5 and len(l.strip()) < 60]
-                                company_name = potential_names[0] if potential_names else 'Recycling Center'
-                                
-                                buyers.append({
-                                    'company_name': company_name,
-                                    'phone': phones[0],
-                                    'email': emails[0] if emails else '',
-                                    'website': site_url,
-                                    'business_type': 'Recycling Center',
-                                    'confidence_score': 0.5,
-                                    'source_url': site_url
-                                })
-                                break  # Only take one per site
-                
-                time.sleep(random.uniform(3, 5))
+                    index = TextIndex(
+                        text,
+                        matcher=BATTERY_MATCHER,
+                        min_keyword_weight=RELEVANCE_THRESHOLDS["context"]
+                    )
+                    for listing in index.listings(keyword_lines=3, default_name='Recycling Center'):
+                        buyers.append({
+                            'company_name': listing['company_name'],
+                            'phone': listing['phone'],
+                            'email': listing['email'],
+                            'website': site_url,
+                            'business_type': 'Recycling Center',
+                            'confidence_score': 0.5,
+                            'source_url': site_url
+                        })
                 
             except Exception as e:
                 logger.warning(f"Error scraping recycling site {site_url}: {e}")
@@ -185,37 +161,15 @@ class AlternativeScrapers:
                 response = self.session.get(directory_url, headers=headers, timeout=10)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
                     # Look for business listings with various selectors
-                    listing_selectors = [
-                        '.listing', '.result', '.business-listing', 
-                        '.search-result', '.directory-listing'
-                    ]
-                    
-                    listings = []
-                    for selector in listing_selectors:
-                        found = soup.select(selector)[:2]  # Limit results
-                        if found:
-                            listings = found
-                            break
+                    listings = self.parse_pool.parse(parse_directory_listings, response.content)
                     
-                    for listing in listings:
+                    for company_name, listing_text in listings:
                         try:
-                            # Extract business name
-                            name_selectors = ['h3', 'h2', '.business-name', '.name', '.title']
-                            company_name = ''
-                            for selector in name_selectors:
-                                name_elem = listing.select_one(selector)
-                                if name_elem:
-                                    company_name = name_elem.get_text(strip=True)
-                                    break
-                            
                             if not company_name:
                                 continue
                             
                             # Extract contact info from listing text
-                            listing_text = listing.get_text()
                             phones, emails = self.extract_contact_info(listing_text)
                             
                             if phones:
@@ -232,8 +186,6 @@ class AlternativeScrapers:
                         except Exception as e:
                             logger.warning(f"Error parsing directory listing: {e}")
                 
-                time.sleep(random.uniform(3, 5))
-                
             except Exception as e:
                 logger.warning(f"Error scraping directory {directory_url}: {e}")
         
@@ -249,24 +201,18 @@ class AlternativeScrapers:
             headers = self.get_random_headers()
             response = self.session.get(url, headers=headers, timeout=10)
             
+            if response.from_cache:
+                logger.debug(f"Scrap yard list {url} unchanged, skipping")
+                return buyers
+            
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
                 # Look for scrap yard listings
-                listings = soup.find_all('div', class_=['scrap-yard', 'listing'])[:3]  # Limit results
+                listings = self.parse_pool.parse(parse_scrap_yard_listings, response.content)
                 
-                for listing in listings:
+                for company_name, listing_text in listings:
                     try:
-                        # Extract business info
-                        name_elem = listing.find(['h3', 'h2', 'h4'])
-                        if not name_elem:
-                            continue
-                        
-                        company_name = name_elem.get_text(strip=True)
-                        
                         # Check if they mention batteries
-                        listing_text = listing.get_text()
-                        if any(keyword in listing_text.lower() for keyword in ['battery', 'lead', 'automotive']):
+                        if BATTERY_MATCHER.is_relevant(listing_text, RELEVANCE_THRESHOLDS["listing"]):
                             
                             phones, emails = self.extract_contact_info(listing_text)
                             
@@ -284,8 +230,6 @@ class AlternativeScrapers:
                     except Exception as e:
                         logger.warning(f"Error parsing scrap yard listing: {e}")
             
-            time.sleep(random.uniform(2, 4))
-            
         except Exception as e:
             logger.error(f"Error scraping scrap yards: {e}")
         
@@ -5,27 +5,28 @@ A novel agent that finds scrap battery buyers without APIs
 """
 
 import os
-import re
 import time
-import random
 import sqlite3
 import logging
-import schedule
-import requests
 import threading
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, urlparse
-from fake_useragent import UserAgent
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from flask import Flask, render_template, jsonify, request
-import pandas as pd
 from alternative_scrapers import AlternativeScrapers
+from fetch_engine import FetchEngine
+from rate_limiter import RateLimiter
+from contact_extractor import extract_contact_info
+from text_index import TextIndex
+from keyword_matcher import BATTERY_MATCHER
+from http_cache import ResponseCache, CachedSession
+from html_parsing import ParsePool, page_text, parse_yellowpages
+from crawl_frontier import CrawlFrontier
+from cancellation import CancelToken, current_token
+from buyer_store import init_schema, BuyerWriter
+from buyer_queries import BuyerQueries
+from config import (
+    SEARCH_TERMS, TARGET_CITIES, FETCH_CONFIG, RATE_LIMITS, RELEVANCE_THRESHOLDS, WEB_CONFIG,
+    DATABASE_CONFIG, FRONTIER_CONFIG
+)
 
 # Configure logging
 logging.basicConfig(
@@ -38,59 +39,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Reasons a cycle cuts its jobs short that say nothing about the jobs themselves
+CYCLE_CUTS = ('target met', 'cycle deadline')
+
 class BatteryBuyerAgent:
-    def __init__(self):
-        self.ua = UserAgent()
-        self.session = requests.Session()
-        self.db_path = 'battery_buyers.db'
-        self.init_database()
-        self.alt_scrapers = AlternativeScrapers()
-        self.search_terms = [
-            "scrap battery buyers",
-            "battery recycling companies",
-            "lead battery scrap dealers",
-            "automotive battery recyclers",
-            "industrial battery buyers",
-            "battery scrap yard",
-            "lead acid battery recycling",
-            "battery disposal services",
-            "scrap metal battery buyers",
-            "battery core buyers"
-        ]
-        self.cities = [
-            "New York", "Los Angeles", "Chicago", "Houston", "Phoenix",
-            "Philadelphia", "San Antonio", "San Diego", "Dallas", "Austin",
-            "Jacksonville", "Fort Worth", "Columbus", "Charlotte", "Detroit",
-            "Memphis", "Boston", "Seattle", "Denver", "Nashville",
-            "Portland", "Las Vegas", "Louisville", "Baltimore", "Milwaukee"
-        ]
-        self.current_city_index = 0
-        self.current_term_index = 0
+    def __init__(self, coordinator_url=None, coordinator_token=None):
+        self._ua = None
+        self._driver_pool = None
+        self._lazy_lock = threading.Lock()
+        self.rate_limiter = RateLimiter()
+        self.response_cache = ResponseCache()
+        self.session = CachedSession(self.rate_limiter, self.response_cache)
+        self.db_path = DATABASE_CONFIG["path"]
+        if coordinator_url:
+            # Jobs and saved buyers go through a coordinator on another machine
+            from crawl_coordinator import RemoteLeaseStore, RemoteBuyerWriter
+            self.frontier = CrawlFrontier(store=RemoteLeaseStore(coordinator_url, token=coordinator_token))
+            self.writer = RemoteBuyerWriter(coordinator_url, token=coordinator_token)
+        else:
+            self.init_database()
+            self.frontier = CrawlFrontier(self.db_path)
+            self.writer = BuyerWriter(self.db_path)
+        self.queries = BuyerQueries(self.db_path)
+        self.parse_pool = ParsePool()
+        self.alt_scrapers = AlternativeScrapers(
+            rate_limiter=self.rate_limiter,
+            response_cache=self.response_cache,
+            parse_pool=self.parse_pool
+        )
+        self.fetch_engine = FetchEngine(max_workers=FETCH_CONFIG["max_workers"])
+        self.search_terms = SEARCH_TERMS
+        self.cities = TARGET_CITIES
+        self.sources = {
+            'yellowpages': self.scrape_yellowpages,
+            'google': self.scrape_google_business,
+            'craigslist': lambda search_term, city: self.alt_scrapers.scrape_craigslist_services(city),
+            'industry_directories': lambda search_term, city: self.scrape_industry_directories(search_term),
+            'recycling_centers': lambda search_term, city: self.alt_scrapers.scrape_recycling_centers(),
+            'scrap_yards': lambda search_term, city: self.alt_scrapers.scrape_metal_scrap_yards(),
+        }
+        self.last_cycle = None
         
+    @property
+    def ua(self):
+        # fake_useragent loads its browser data on construction; only the
+        # scrapers need it
+        with self._lazy_lock:
+            if self._ua is None:
+                from fake_useragent import UserAgent
+                self._ua = UserAgent()
+        return self._ua
+    
+    @property
+    def driver_pool(self):
+        # Selenium is only imported once a job actually needs a browser
+        with self._lazy_lock:
+            if self._driver_pool is None:
+                from driver_pool import DriverPool
+                self._driver_pool = DriverPool(user_agent_factory=lambda: self.ua.random)
+        return self._driver_pool
+    
     def init_database(self):
         """Initialize SQLite database for storing buyer information"""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS buyers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                company_name TEXT NOT NULL,
-                phone TEXT,
-                address TEXT,
-                email TEXT,
-                website TEXT,
-                business_type TEXT,
-                city TEXT,
-                state TEXT,
-                confidence_score REAL,
-                source_url TEXT,
-                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(company_name, phone, address)
-            )
-        ''')
-        
-        conn.commit()
+        init_schema(conn)
         conn.close()
         
     def get_random_headers(self):
@@ -106,22 +118,7 @@ class BatteryBuyerAgent:
     
     def extract_contact_info(self, text):
         """Extract phone numbers and emails from text"""
-        phone_pattern = r'(\+?1?[-.\s]?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})'
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        phones = re.findall(phone_pattern, text)
-        emails = re.findall(email_pattern, text)
-        
-        # Clean phone numbers
-        cleaned_phones = []
-        for phone in phones:
-            cleaned = re.sub(r'[^\d]', '', phone)
-            if len(cleaned) == 10:
-                cleaned_phones.append(f"({cleaned[:3]}) {cleaned[3:6]}-{cleaned[6:]}")
-            elif len(cleaned) == 11 and cleaned[0] == '1':
-                cleaned_phones.append(f"({cleaned[1:4]}) {cleaned[4:7]}-{cleaned[7:]}")
-        
-        return cleaned_phones, emails
+        return extract_contact_info(text)
     
     def scrape_yellowpages(self, search_term, city):
         """Scrape Yellow Pages for battery buyers"""
@@ -138,47 +135,21 @@ class BatteryBuyerAgent:
             response = self.session.get(url, params=params, headers=headers, timeout=10)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                # Parse only the result subtrees, off the fetch thread for large pages
+                listings = self.parse_pool.parse(parse_yellowpages, response.content)
                 
-                # Find business listings
-                listings = soup.find_all('div', class_=['result', 'organic'])
-                
-                for listing in listings[:3]:  # Limit to first 3 results
-                    try:
-                        name_elem = listing.find('a', class_=['business-name', 'n'])
-                        if not name_elem:
-                            continue
-                            
-                        company_name = name_elem.get_text(strip=True)
-                        
-                        # Get phone number
-                        phone_elem = listing.find('div', class_=['phones', 'phone'])
-                        phone = phone_elem.get_text(strip=True) if phone_elem else ''
-                        
-                        # Get address
-                        address_elem = listing.find('div', class_=['adr', 'street-address'])
-                        address = address_elem.get_text(strip=True) if address_elem else ''
-                        
-                        # Get website
-                        website_elem = listing.find('a', class_=['track-visit-website'])
-                        website = website_elem.get('href', '') if website_elem else ''
-                        
-                        if company_name and (phone or address):
-                            buyers.append({
-                                'company_name': company_name,
-                                'phone': phone,
-                                'address': address,
-                                'website': website,
-                                'city': city,
-                                'business_type': 'Directory Listing',
-                                'confidence_score': 0.7,
-                                'source_url': response.url
-                            })
-                            
-                    except Exception as e:
-                        logger.warning(f"Error parsing Yellow Pages listing: {e}")
-                        
-            time.sleep(random.uniform(2, 4))  # Rate limiting
+                for listing in listings:
+                    if listing['company_name'] and (listing['phone'] or listing['address']):
+                        buyers.append({
+                            'company_name': listing['company_name'],
+                            'phone': listing['phone'],
+                            'address': listing['address'],
+                            'website': listing['website'],
+                            'city': city,
+                            'business_type': 'Directory Listing',
+                            'confidence_score': 0.7,
+                            'source_url': response.url
+                        })
             
         except Exception as e:
             logger.error(f"Error scraping Yellow Pages: {e}")
@@ -187,61 +158,69 @@ class BatteryBuyerAgent:
     
     def scrape_google_business(self, search_term, city):
         """Scrape Google Business listings using Selenium"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        
         buyers = []
         
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument(f'--user-agent={self.ua.random}')
-            
-            driver = webdriver.Chrome(ChromeDriverManager().install(), options=chrome_options)
-            
             query = f"{search_term} {city}"
             url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
+            if not self.rate_limiter.allowed(url):
+                logger.info(f"Skipping {url}: disallowed by robots.txt")
+                return buyers
             
-            driver.get(url)
-            time.sleep(3)
-            
-            # Look for business listings
-            business_elements = driver.find_elements(By.CSS_SELECTOR, '[data-attrid="kc:/business:phone"]')
-            
-            for elem in business_elements[:2]:  # Limit results
+            # Wait our turn before borrowing a browser, not while holding one
+            self.rate_limiter.wait(url)
+            with self.driver_pool.driver() as driver:
+                driver.get(url)
+                
+                # Wait for the results container instead of a fixed sleep
                 try:
-                    # Navigate up to find the business container
-                    business_container = elem.find_element(By.XPATH, './ancestor::div[contains(@class, "g")]')
-                    
-                    # Extract business name
-                    name_elem = business_container.find_element(By.CSS_SELECTOR, 'h3')
-                    company_name = name_elem.text if name_elem else ''
-                    
-                    # Extract phone
-                    phone = elem.text
-                    
-                    # Extract address (if available)
+                    WebDriverWait(driver, RATE_LIMITS["selenium_wait"][1]).until(
+                        EC.presence_of_element_located((By.ID, 'search'))
+                    )
+                except TimeoutException:
+                    logger.warning(f"Timed out waiting for Google results for '{query}'")
+                
+                # Look for business listings
+                business_elements = driver.find_elements(By.CSS_SELECTOR, '[data-attrid="kc:/business:phone"]')
+                
+                for elem in business_elements[:2]:  # Limit results
                     try:
-                        address_elem = business_container.find_element(By.CSS_SELECTOR, '[data-attrid="kc:/business:address"]')
-                        address = address_elem.text
-                    except:
-                        address = ''
-                    
-                    if company_name and phone:
-                        buyers.append({
-                            'company_name': company_name,
-                            'phone': phone,
-                            'address': address,
-                            'website': '',
-                            'city': city,
-                            'business_type': 'Google Business',
-                            'confidence_score': 0.8,
-                            'source_url': url
-                        })
+                        # Navigate up to find the business container
+                        business_container = elem.find_element(By.XPATH, './ancestor::div[contains(@class, "g")]')
                         
-                except Exception as e:
-                    logger.warning(f"Error parsing Google business result: {e}")
-            
-            driver.quit()
+                        # Extract business name
+                        name_elem = business_container.find_element(By.CSS_SELECTOR, 'h3')
+                        company_name = name_elem.text if name_elem else ''
+                        
+                        # Extract phone
+                        phone = elem.text
+                        
+                        # Extract address (if available)
+                        try:
+                            address_elem = business_container.find_element(By.CSS_SELECTOR, '[data-attrid="kc:/business:address"]')
+                            address = address_elem.text
+                        except:
+                            address = ''
+                        
+                        if company_name and phone:
+                            buyers.append({
+                                'company_name': company_name,
+                                'phone': phone,
+                                'address': address,
+                                'website': '',
+                                'city': city,
+                                'business_type': 'Google Business',
+                                'confidence_score': 0.8,
+                                'source_url': url
+                            })
+                            
+                    except Exception as e:
+                        logger.warning(f"Error parsing Google business result: {e}")
             
         except Exception as e:
             logger.error(f"Error scraping Google Business: {e}")
@@ -264,33 +243,30 @@ class BatteryBuyerAgent:
                 headers = self.get_random_headers()
                 response = self.session.get(directory_url, headers=headers, timeout=10)
                 
+                if response.from_cache:
+                    logger.debug(f"Directory {directory_url} unchanged, skipping")
+                    continue
+                
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
                     # Look for contact information patterns
-                    text = soup.get_text()
-                    phones, emails = self.extract_contact_info(text)
+                    text = self.parse_pool.parse(page_text, response.content)
                     
-                    # Find company names near contact info
-                    for phone in phones[:1]:  # Limit to 1 per directory
-                        # Simple heuristic to find company names
-                        lines = text.split('\n')
-                        for i, line in enumerate(lines):
-                            if phone in line and i > 0:
-                                potential_name = lines[i-1].strip()
-                                if len(potential_name) > 5 and len(potential_name) < 50:
-                                    buyers.append({
-                                        'company_name': potential_name,
-                                        'phone': phone,
-                                        'email': emails[0] if emails else '',
-                                        'website': directory_url,
-                                        'business_type': 'Industry Directory',
-                                        'confidence_score': 0.6,
-                                        'source_url': directory_url
-                                    })
-                                    break
-                
-                time.sleep(random.uniform(3, 5))
+                    # Pair every battery-related phone on the page with the name listed above it
+                    index = TextIndex(
+                        text,
+                        matcher=BATTERY_MATCHER,
+                        min_keyword_weight=RELEVANCE_THRESHOLDS["context"]
+                    )
+                    for listing in index.listings(keyword_lines=3, max_name_length=49):
+                        buyers.append({
+                            'company_name': listing['company_name'],
+                            'phone': listing['phone'],
+                            'email': listing['email'],
+                            'website': directory_url,
+                            'business_type': 'Industry Directory',
+                            'confidence_score': 0.6,
+                            'source_url': directory_url
+                        })
                 
             except Exception as e:
                 logger.warning(f"Error scraping directory {directory_url}: {e}")
@@ -298,201 +274,279 @@ class BatteryBuyerAgent:
         return buyers
     
     def save_buyers(self, buyers):
-        """Save buyers to database with deduplication"""
+        """Save buyers to database, merging re-discovered ones"""
         if not buyers:
             return 0
-            
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        saved_count = 0
-        
-        for buyer in buyers:
-            try:
-                cursor.execute('''
-                    INSERT OR IGNORE INTO buyers 
-                    (company_name, phone, address, email, website, business_type, 
-                     city, confidence_score, source_url)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    buyer.get('company_name', ''),
-                    buyer.get('phone', ''),
-                    buyer.get('address', ''),
-                    buyer.get('email', ''),
-                    buyer.get('website', ''),
-                    buyer.get('business_type', ''),
-                    buyer.get('city', ''),
-                    buyer.get('confidence_score', 0.5),
-                    buyer.get('source_url', '')
-                ))
-                
-                if cursor.rowcount > 0:
-                    saved_count += 1
-                    
-            except sqlite3.Error as e:
-                logger.warning(f"Error saving buyer: {e}")
         
-        conn.commit()
-        conn.close()
+        try:
+            return self.writer.write(buyers)
+        except Exception as e:
+            logger.warning(f"Error saving buyers: {e}")
+            return 0
+    
+    def run_job(self, job, on_saved=None):
+        """Run the scraper for a single frontier job and save what it finds.
         
-        return saved_count
+        The job's lease is settled here, when its thread is done with it:
+        completed after a visit, released after a failure or a cut for the
+        cycle's sake, and left alone once lost to another worker. Only a
+        failure holds the job back for FRONTIER_CONFIG["retry_after_minutes"];
+        one cut because the cycle met its target or ran out of time is due
+        again at once.
+        """
+        job['started'] = True
+        scraper = self.sources[job['source']]
+        token = current_token()
+        if token is not None:
+            # Another worker owns the job once our lease on it lapses
+            self.frontier.watch(job['id'], lambda: token.cancel('lease lost'))
+        try:
+            requests_before = self.rate_limiter.requests_made()
+            start = time.monotonic()
+            buyers = scraper(job['search_term'], job['city'])
+            seconds = time.monotonic() - start
+            requests = self.rate_limiter.requests_made() - requests_before
+            cut = token.reason if token is not None and token.cancelled else None
+            
+            # Saving from the job's own thread lets concurrent jobs share a commit;
+            # whatever a cut job found before it stopped is kept
+            job['saved'] = self.save_buyers(buyers)
+            
+            # Running out of its own time is a (slow) visit the frontier should
+            # learn from; a job stopped for the cycle's sake is retried instead
+            if cut is None or cut == 'source deadline':
+                self.frontier.complete(job['id'], job['saved'], seconds, requests)
+                job['completed'] = True
+        finally:
+            lost = token is not None and token.reason == 'lease lost'
+            if not job.get('completed') and not lost:
+                retry_minutes = 0 if token is not None and token.reason in CYCLE_CUTS else None
+                try:
+                    self.frontier.release(job['id'], retry_minutes=retry_minutes)
+                except Exception as e:
+                    logger.warning(f"Could not release crawl job {job['id']}: {e}")
+        if on_saved is not None:
+            on_saved(job['saved'])
+        return buyers
     
     def find_buyers(self):
-        """Main method to find battery buyers"""
+        """Main method to find battery buyers: one crawl cycle.
+        
+        Returns how many new buyers it saved; the rest of its report is
+        kept in `last_cycle`.
+        """
+        self.last_cycle = self.run_cycle()
+        return self.last_cycle['saved']
+    
+    def run_cycle(self, fetch_engine=None):
+        """Run one crawl cycle and return its own report.
+        
+        The cycle stops once FETCH_CONFIG["cycle_target_buyers"] new buyers
+        are saved or FETCH_CONFIG["cycle_deadline_seconds"] pass, and each
+        job once its source's deadline passes. Stopped jobs abort their
+        fetches and browser sessions; what was cut, and why, is logged and
+        reported as {'saved', 'jobs', 'seconds', 'cut'}. Cycles that run
+        at the same time each need a `fetch_engine` of their own (the
+        agent's is the default), or they compete for its threads.
+        """
         logger.info("Starting battery buyer search...")
+        fetch_engine = fetch_engine or self.fetch_engine
         
-        all_buyers = []
+        # Claim the jobs with the best expected yield from the frontier
+        jobs = self.frontier.claim()
+        if not jobs:
+            logger.info("No crawl jobs are due yet")
+            return {'saved': 0, 'jobs': 0, 'seconds': 0.0, 'cut': {}}
         
-        # Rotate through cities and search terms
-        city = self.cities[self.current_city_index]
-        search_term = self.search_terms[self.current_term_index]
+        token = CancelToken(FETCH_CONFIG["cycle_deadline_seconds"], deadline_reason='cycle deadline')
+        target = FETCH_CONFIG["cycle_target_buyers"]
+        saved_lock = threading.Lock()
+        progress = {'saved': 0}
         
-        logger.info(f"Searching for '{search_term}' in {city}")
+        def on_saved(count):
+            with saved_lock:
+                progress['saved'] += count
+                if target and progress['saved'] >= target:
+                    token.cancel('target met')
         
-        # Try multiple scraping methods
+        # Run every claimed job concurrently
+        tasks = {}
+        timeouts = {}
+        deadlines = FETCH_CONFIG["source_deadline_seconds"]
+        for job in jobs:
+            name = job['source']
+            if job['search_term']:
+                name += f" '{job['search_term']}'"
+            if job['city']:
+                name += f" in {job['city']}"
+            tasks[name] = (self.run_job, (job, on_saved))
+            timeouts[name] = deadlines.get(job['source'], deadlines["default"])
+        
+        logger.info(f"Running {len(tasks)} crawl jobs: {', '.join(tasks)}")
+        
+        start = time.monotonic()
+        cut = {}
         try:
-            # Method 1: Yellow Pages
-            yp_buyers = self.scrape_yellowpages(search_term, city)
-            all_buyers.extend(yp_buyers)
-            logger.info(f"Found {len(yp_buyers)} buyers from Yellow Pages")
-            
-            # Method 2: Google Business (if we need more)
-            if len(all_buyers) < 5:
-                gb_buyers = self.scrape_google_business(search_term, city)
-                all_buyers.extend(gb_buyers)
-                logger.info(f"Found {len(gb_buyers)} buyers from Google Business")
-            
-            # Method 3: Industry directories (if we still need more)
-            if len(all_buyers) < 5:
-                id_buyers = self.scrape_industry_directories(search_term)
-                all_buyers.extend(id_buyers)
-                logger.info(f"Found {len(id_buyers)} buyers from industry directories")
-            
-            # Method 4: Alternative scrapers (if we still need more)
-            if len(all_buyers) < 5:
-                # Try Craigslist
-                cl_buyers = self.alt_scrapers.scrape_craigslist_services()
-                all_buyers.extend(cl_buyers)
-                logger.info(f"Found {len(cl_buyers)} buyers from Craigslist")
-                
-                # Try recycling centers
-                if len(all_buyers) < 5:
-                    rc_buyers = self.alt_scrapers.scrape_recycling_centers()
-                    all_buyers.extend(rc_buyers)
-                    logger.info(f"Found {len(rc_buyers)} buyers from recycling centers")
-                
-                # Try scrap yards
-                if len(all_buyers) < 5:
-                    sy_buyers = self.alt_scrapers.scrape_metal_scrap_yards()
-                    all_buyers.extend(sy_buyers)
-                    logger.info(f"Found {len(sy_buyers)} buyers from scrap yards")
-                
+            _, cut = fetch_engine.run_until(tasks, token, timeouts)
         except Exception as e:
             logger.error(f"Error during buyer search: {e}")
+        finally:
+            token.close()
+        elapsed = time.monotonic() - start
         
-        # Save results
-        saved_count = self.save_buyers(all_buyers)
-        logger.info(f"Saved {saved_count} new buyers to database")
-        
-        # Update rotation indices
-        self.current_city_index = (self.current_city_index + 1) % len(self.cities)
-        self.current_term_index = (self.current_term_index + 1) % len(self.search_terms)
+        # Jobs that never started go back to the frontier now, due at once;
+        # the others settle their own leases, including those still
+        # stopping, which keep theirs (and their host) until their thread
+        # is done
+        saved_count = 0
+        for job in jobs:
+            saved_count += job.get('saved', 0)
+            if not job.get('started'):
+                self.frontier.release(job['id'], retry_minutes=0)
         
-        return saved_count
+        if cut:
+            logger.warning(f"Cut {len(cut)} of {len(jobs)} crawl jobs after {elapsed:.1f}s: "
+                           + ', '.join(f"{name} ({reason})" for name, reason in cut.items()))
+        logger.info(f"Saved {saved_count} new buyers to database")
+        return {'saved': saved_count, 'jobs': len(jobs), 'seconds': elapsed, 'cut': cut}
+    
+    def close(self):
+        """Stop worker threads, parser processes and browsers, and hand back leases"""
+        self.frontier.close()
+        if hasattr(self.writer, 'flush'):
+            try:
+                self.writer.flush()
+            except Exception as e:
+                logger.error(f"Could not send buyers kept back for the coordinator: {e}")
+        self.fetch_engine.shutdown()
+        self.parse_pool.shutdown()
+        if self._driver_pool is not None:
+            self._driver_pool.close()
     
     def get_recent_buyers(self, hours=24):
         """Get buyers discovered in the last N hours"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT * FROM buyers 
-            WHERE discovered_at > datetime('now', '-{} hours')
-            ORDER BY discovered_at DESC
-        '''.format(hours)
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        return df.to_dict('records')
+        return self.queries.recent_buyers(hours)
     
     def get_all_buyers(self):
         """Get all buyers from database"""
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query('SELECT * FROM buyers ORDER BY discovered_at DESC', conn)
-        conn.close()
-        return df.to_dict('records')
+        return self.queries.all_buyers()
 
-# Flask web interface
-app = Flask(__name__)
-agent = BatteryBuyerAgent()
+def run_crawler(agent):
+    """Crawl at the pace SCHEDULE_CONFIG asks for, forever"""
+    from crawl_scheduler import CrawlScheduler
+    
+    scheduler = CrawlScheduler(agent)
+    try:
+        scheduler.run_forever()
+    finally:
+        scheduler.shutdown(wait=False)
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+def run_worker(agent):
+    """Crawl whatever jobs the frontier has ready, forever.
+    
+    A cycle that fails outright, say on an unreachable coordinator or a
+    locked database, is retried after FRONTIER_CONFIG["error_backoff_seconds"],
+    doubled for every further failure in a row.
+    """
+    backoff = FRONTIER_CONFIG["error_backoff_seconds"]
+    while True:
+        try:
+            agent.find_buyers()
+        except Exception as e:
+            logger.error(f"Crawl cycle failed, retrying in {backoff}s: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, FRONTIER_CONFIG["max_error_backoff_seconds"])
+            continue
+        backoff = FRONTIER_CONFIG["error_backoff_seconds"]
+        if not agent.last_cycle['jobs']:
+            time.sleep(FRONTIER_CONFIG["idle_seconds"])
 
-@app.route('/api/buyers')
-def api_buyers():
-    buyers = agent.get_all_buyers()
-    return jsonify(buyers)
+def crawl_forever():
+    """Crawler process entry point"""
+    import sys
+    import signal
+    
+    # Unwind on SIGTERM so the parser processes and browsers are shut down
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    agent = BatteryBuyerAgent()
+    try:
+        run_crawler(agent)
+    finally:
+        agent.close()
 
-@app.route('/api/recent')
-def api_recent():
-    hours = request.args.get('hours', 24, type=int)
-    buyers = agent.get_recent_buyers(hours)
-    return jsonify(buyers)
+class CrawlerSupervisor:
+    """Keeps a crawl_forever process running alongside the web server.
 
-@app.route('/api/stats')
-def api_stats():
-    conn = sqlite3.connect(agent.db_path)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) FROM buyers')
-    total = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM buyers WHERE discovered_at > datetime('now', '-24 hours')")
-    last_24h = cursor.fetchone()[0]
+    poll() checks on the crawler without blocking, so the web server's
+    own supervision loop can call it: the parent then runs no threads of
+    its own when it forks web workers. The crawler is started with spawn
+    rather than fork for the same reason. A crawler that dies is logged
+    with its exit code and replaced, after WEB_CONFIG["crawler_restart_seconds"]
+    if it did not last that long.
+    """
     
-    cursor.execute("SELECT COUNT(*) FROM buyers WHERE discovered_at > datetime('now', '-1 hour')")
-    last_hour = cursor.fetchone()[0]
+    def __init__(self, target=None):
+        import multiprocessing
+        
+        self.target = target or crawl_forever
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.started = None
+        self.restart_at = None
     
-    conn.close()
+    def poll(self):
+        """Start the crawler, or restart it once it is due"""
+        if self.process is not None and self.process.is_alive():
+            return
+        now = time.monotonic()
+        if self.process is not None and self.restart_at is None:
+            logger.error(f"Crawler process exited with code {self.process.exitcode}, restarting it")
+            self.restart_at = now
+            if now - self.started < WEB_CONFIG["crawler_restart_seconds"]:
+                self.restart_at += WEB_CONFIG["crawler_restart_seconds"]
+        if self.restart_at is not None and now < self.restart_at:
+            return
+        self.process = self.context.Process(target=self.target, name='crawler')
+        self.process.start()
+        self.started = now
+        self.restart_at = None
     
-    return jsonify({
-        'total_buyers': total,
-        'last_24_hours': last_24h,
-        'last_hour': last_hour
-    })
-
-def run_scheduled_search():
-    """Run the scheduled buyer search"""
-    try:
-        agent.find_buyers()
-    except Exception as e:
-        logger.error(f"Scheduled search failed: {e}")
+    def stop(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
 
 def main():
     """Main function to start the agent"""
+    import web_server
+    
     logger.info("Starting Battery Buyer Finder Agent...")
+    db_path = DATABASE_CONFIG["path"]
+    conn = sqlite3.connect(db_path)
+    init_schema(conn)
+    conn.close()
     
-    # Schedule the search to run every hour
-    schedule.every().hour.do(run_scheduled_search)
+    if WEB_CONFIG["separate_crawler"]:
+        # Page parsing and writes get their own interpreter, so they never
+        # hold the GIL or a connection the web workers are waiting on
+        crawler = CrawlerSupervisor()
+        try:
+            web_server.serve(db_path, on_poll=crawler.poll)
+        finally:
+            crawler.stop()
+        return
     
-    # Run initial search
-    logger.info("Running initial buyer search...")
-    agent.find_buyers()
+    from web_app import create_app
+    agent = BatteryBuyerAgent()
+    app = create_app(agent.db_path)
     
-    # Start the scheduler in a separate thread
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+    # Push saves to dashboards as soon as they commit
+    agent.writer.add_listener(app.extensions['buyer_events'].wake)
     
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
+    crawler_thread = threading.Thread(target=run_crawler, args=(agent,), daemon=True)
+    crawler_thread.start()
     
-    # Start Flask web interface
-    logger.info("Starting web interface on http://localhost:5000")
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    web_server.serve(agent.db_path, workers=1, app=app)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
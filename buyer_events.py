@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Live buyer events for the Battery Buyer Finder Agent
+Server-Sent Events fanned out from one database tail per web process
+"""
+
+import json
+import queue
+import sqlite3
+import logging
+import threading
+from buyer_queries import STATS_SQL
+from config import WEB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Each stored observation is one event; its id doubles as the SSE event id
+EVENTS_SQL = '''
+    SELECT o.id AS event_id, b.id, b.company_name, b.phone, b.address, b.email,
+           b.website, b.business_type, b.city, b.state, b.confidence_score,
+           b.source_url, b.discovered_at, b.last_seen_at, b.seen_count, b.version,
+           o.id = (SELECT MIN(id) FROM buyer_observations WHERE buyer_id = b.id) AS new
+    FROM buyer_observations o JOIN buyers b ON b.id = o.buyer_id
+    WHERE o.id > ?
+    ORDER BY o.id
+    LIMIT ?
+'''
+
+def format_event(event, data, event_id=None):
+    """One SSE message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+class BuyerEvents:
+    """Broadcasts saved buyers and refreshed counters to SSE subscribers.
+
+    A single background thread watches the observation log, which grows
+    on every save whether the crawler runs in this process or another.
+    When it moves, the new rows and the counters are queried and
+    serialized once and handed to every subscriber, so the database work
+    does not grow with the number of open dashboards. BuyerWriter can
+    call wake() after a commit to skip the poll delay.
+    """
+
+    def __init__(self, db_path, poll_interval=None, replay_limit=None, keepalive=None):
+        self.db_path = db_path
+        self.poll_interval = poll_interval or WEB_CONFIG["event_poll_interval"]
+        self.replay_limit = replay_limit or WEB_CONFIG["event_replay_limit"]
+        self.keepalive = keepalive or WEB_CONFIG["event_keepalive"]
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.changed = threading.Event()
+        self.thread = None
+        self.head = None
+
+    def wake(self):
+        self.changed.set()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _latest_id(self, conn):
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM buyer_observations').fetchone()[0]
+
+    def _events_after(self, conn, event_id):
+        """(event_id, message) pairs for buyers saved after event_id"""
+        rows = conn.execute(EVENTS_SQL, (event_id, self.replay_limit)).fetchall()
+        events = []
+        for row in rows:
+            buyer = dict(row)
+            buyer_event_id = buyer.pop('event_id')
+            buyer['new'] = bool(buyer['new'])
+            events.append((buyer_event_id, format_event('buyer', buyer, buyer_event_id)))
+        return events
+
+    def _stats_event(self, conn):
+        return (None, format_event('stats', dict(conn.execute(STATS_SQL).fetchone())))
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='buyer-events', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        conn = self.connect()
+        self.head = self._latest_id(conn)
+        while True:
+            self.changed.wait(self.poll_interval)
+            self.changed.clear()
+            try:
+                if self._latest_id(conn) <= self.head:
+                    continue
+                while True:
+                    events = self._events_after(conn, self.head)
+                    if not events:
+                        break
+                    self.head = events[-1][0]
+                    self._broadcast(events)
+                self._broadcast([self._stats_event(conn)])
+            except sqlite3.Error as e:
+                logger.warning(f"Error reading buyer events: {e}")
+
+    def _broadcast(self, events):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            for event in events:
+                try:
+                    subscriber.put_nowait(event)
+                except queue.Full:
+                    # A client that stopped reading is cut loose rather than
+                    # buffered without bound; it can resume with Last-Event-ID
+                    self._unsubscribe(subscriber)
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+                    subscriber.put_nowait(None)
+                    break
+
+    def _unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def subscribe(self, last_event_id=None):
+        """Generator of SSE messages for one client.
+
+        Starts with the current counters, then replays buyers saved after
+        last_event_id (up to replay_limit) before following live events.
+        """
+        self._ensure_thread()
+        subscriber = queue.Queue(maxsize=self.replay_limit * 2)
+        with self.lock:
+            self.subscribers.add(subscriber)
+
+        try:
+            sent = 0
+            conn = self.connect()
+            try:
+                yield format_event('stats', dict(conn.execute(STATS_SQL).fetchone()))
+                if last_event_id is not None:
+                    for event_id, message in self._events_after(conn, last_event_id):
+                        sent = event_id
+                        yield message
+            finally:
+                conn.close()
+
+            while True:
+                try:
+                    event = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                event_id, message = event
+                # Events already sent during the replay are skipped
+                if event_id is not None:
+                    if event_id <= sent:
+                        continue
+                    sent = event_id
+                yield message
+        finally:
+            self._unsubscribe(subscriber)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Buyer export for the Battery Buyer Finder Agent
+Streams NDJSON or CSV straight from a SQLite cursor, optionally gzipped
+"""
+
+import io
+import csv
+import json
+import zlib
+import sqlite3
+import argparse
+from buyer_queries import parse_fields, filter_clause
+from config import DATABASE_CONFIG, EXPORT_CONFIG
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def iter_rows(db_path, columns, filters, chunk_rows=None):
+    """Yield lists of row tuples, at most chunk_rows at a time, oldest first"""
+    chunk_rows = chunk_rows or EXPORT_CONFIG["chunk_rows"]
+    conditions, params = filter_clause(**filters)
+    sql = f"SELECT {', '.join(columns)} FROM buyers"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY id'
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def encode_ndjson(chunks, columns):
+    for rows in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), separators=(',', ':'), default=str) + '\n'
+            for row in rows
+        ).encode('utf-8')
+
+def encode_csv(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def gzip_stream(chunks, level=6):
+    """Compress a byte stream into a gzip member as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_stream(db_path, fmt='ndjson', compress=False, fields=None, chunk_rows=None, **filters):
+    """Generator of export bytes for the buyers matching `filters`.
+
+    Rows are read chunk_rows at a time from one cursor and encoded as they
+    arrive, so memory stays flat however many buyers match and the first
+    bytes are available as soon as the first chunk is read. Filters are
+    those of BuyerQueries.buyers_page. Raises ValueError on a bad format,
+    field or filter before anything is read.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    columns = parse_fields(fields)
+    filter_clause(**filters)
+
+    encode = encode_ndjson if fmt == 'ndjson' else encode_csv
+    stream = encode(iter_rows(db_path, columns, filters, chunk_rows), columns)
+    return gzip_stream(stream) if compress else stream
+
+def export_filename(fmt, compress=False):
+    return f"battery_buyers.{fmt}" + ('.gz' if compress else '')
+
+def export_to_file(path, db_path=None, fmt=None, compress=None, fields=None, **filters):
+    """Write an export to `path`, inferring format and gzip from its name"""
+    name = path[:-3] if path.endswith('.gz') else path
+    if fmt is None:
+        fmt = 'csv' if name.endswith('.csv') else 'ndjson'
+    if compress is None:
+        compress = path.endswith('.gz')
+
+    written = 0
+    with open(path, 'wb') as output:
+        for chunk in export_stream(db_path or DATABASE_CONFIG["path"], fmt, compress, fields, **filters):
+            output.write(chunk)
+            written += len(chunk)
+    return written
+
+def add_export_arguments(parser):
+    parser.add_argument('output', help="File to write; .csv selects CSV, a .gz suffix compresses")
+    parser.add_argument('--db', default=DATABASE_CONFIG["path"])
+    parser.add_argument('--format', choices=sorted(EXPORT_FORMATS))
+    parser.add_argument('--fields', help="Comma-separated columns to include")
+    parser.add_argument('--city')
+    parser.add_argument('--state')
+    parser.add_argument('--business-type')
+    parser.add_argument('--min-confidence', type=float)
+    parser.add_argument('--since', help="Only buyers discovered at or after this ISO timestamp")
+
+def run_export(args):
+    written = export_to_file(
+        args.output, db_path=args.db, fmt=args.format, fields=args.fields,
+        city=args.city, state=args.state, business_type=args.business_type,
+        min_confidence=args.min_confidence, since=args.since
+    )
+    print(f"Wrote {written} bytes to {args.output}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export discovered battery buyers")
+    add_export_arguments(parser)
+    run_export(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    main()
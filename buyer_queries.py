@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Read queries for the Battery Buyer Finder Agent
+Parameterized, index-backed lookups behind the dashboard and API
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from buyer_rollups import rollup_series
+from config import WEB_CONFIG
+
+# Columns the API may return or filter on
+BUYER_FIELDS = (
+    'id', 'company_name', 'phone', 'address', 'email', 'website', 'business_type',
+    'city', 'state', 'confidence_score', 'source_url', 'discovered_at',
+    'last_seen_at', 'seen_count', 'version', 'latitude', 'longitude'
+)
+
+# Equality filters, each backed by an index that also orders by id
+EQUALITY_FILTERS = ('city', 'state', 'business_type')
+
+RECENT_BUYERS_SQL = '''
+    SELECT * FROM buyers
+    WHERE discovered_at > datetime('now', ?)
+    ORDER BY discovered_at DESC
+'''
+
+RECENT_CHANGED_BUYERS_SQL = '''
+    SELECT * FROM buyers
+    WHERE discovered_at > datetime('now', ?) AND version > ?
+    ORDER BY discovered_at DESC
+'''
+
+ALL_BUYERS_SQL = 'SELECT * FROM buyers ORDER BY discovered_at DESC'
+
+# One statement for every dashboard counter: the recent counts come from a
+# single range scan of idx_buyers_discovered_at, the total from the
+# counter the buyers triggers keep in data_version
+STATS_SQL = '''
+    SELECT
+        (SELECT buyer_count FROM data_version WHERE id = 1) AS total_buyers,
+        COUNT(*) AS last_24_hours,
+        COALESCE(SUM(discovered_at > datetime('now', '-1 hour')), 0) AS last_hour
+    FROM buyers
+    WHERE discovered_at > datetime('now', '-24 hours')
+'''
+
+def hours_modifier(hours):
+    """SQLite datetime() modifier for `hours` ago"""
+    return f"-{max(int(hours), 0)} hours"
+
+def parse_fields(fields):
+    """Validated column list from a comma-separated `fields` parameter"""
+    if not fields:
+        return list(BUYER_FIELDS)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in BUYER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # id is the pagination key, so it is always returned
+    return ['id'] + [field for field in requested if field != 'id']
+
+def parse_since(since):
+    """Normalize an ISO timestamp to the UTC format discovered_at is stored in"""
+    try:
+        moment = datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid since timestamp: {since}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def parse_page_cursor(cursor):
+    """(id, version) from a buyers page cursor; version is None in a bare id"""
+    try:
+        buyer_id, _, version = str(cursor).partition(':')
+        return int(buyer_id), int(version) if version else None
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def filter_clause(city=None, state=None, business_type=None, min_confidence=None, since=None,
+                  since_version=None):
+    """SQL conditions and bound parameters for the shared buyer filters.
+
+    since_version keeps only buyers inserted or merged into after that
+    data version, which is what incremental consumers sync on.
+    """
+    conditions = []
+    params = []
+    for column, value in zip(EQUALITY_FILTERS, (city, state, business_type)):
+        if value:
+            conditions.append(f'{column} = ?')
+            params.append(value)
+    if min_confidence is not None:
+        conditions.append('confidence_score >= ?')
+        params.append(float(min_confidence))
+    if since:
+        conditions.append('discovered_at >= ?')
+        params.append(parse_since(since))
+    if since_version is not None:
+        conditions.append('version > ?')
+        params.append(int(since_version))
+    return conditions, params
+
+def page_to_json(page):
+    """Compact JSON for a buyers page, skipping jsonify's key sorting"""
+    return json.dumps(page, separators=(',', ':'), default=str)
+
+class BuyerQueries:
+    """Read side of the buyers table.
+
+    Connections are pooled: a thread checks one out on first use and keeps
+    it until release(), so the statements above are prepared once and
+    reused from sqlite3's statement cache instead of being re-parsed on
+    every dashboard poll. The web app releases after each request, which
+    lets short-lived request threads share a few warm connections instead
+    of opening one each. Connections are query-only; under WAL they read
+    a consistent snapshot without waiting on the crawler's writes. Rows
+    come back as plain dicts.
+    """
+
+    def __init__(self, db_path, pool_size=None):
+        self.db_path = db_path
+        self.pool_size = pool_size or WEB_CONFIG["read_pool_size"]
+        self.local = threading.local()
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            with self.lock:
+                conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                conn = self._connect()
+            self.local.conn = conn
+        return conn
+
+    def release(self):
+        """Return this thread's connection to the pool"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            return
+        self.local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self.lock:
+            if len(self.idle) < self.pool_size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def fetch_all(self, sql, params=()):
+        return [dict(row) for row in self.connection().execute(sql, params)]
+
+    def recent_buyers(self, hours=24, since_version=None):
+        """Buyers discovered in the last `hours` hours, newest first"""
+        if since_version is not None:
+            return self.fetch_all(RECENT_CHANGED_BUYERS_SQL, (hours_modifier(hours), int(since_version)))
+        return self.fetch_all(RECENT_BUYERS_SQL, (hours_modifier(hours),))
+
+    def all_buyers(self):
+        return self.fetch_all(ALL_BUYERS_SQL)
+
+    def data_version(self):
+        """Version of the last committed write"""
+        return self.connection().execute('SELECT version FROM data_version').fetchone()[0]
+
+    def buyers_page(self, limit=None, cursor=None, city=None, state=None, business_type=None,
+                    min_confidence=None, since=None, since_version=None, fields=None):
+        """One page of buyers, newest first, with the cursor of the next page.
+
+        Pages are keyed on id rather than OFFSET, so each page costs an
+        index seek plus `limit` rows however deep the client has paged.
+        Pass the returned next_cursor back as `cursor` to continue; it is
+        None on the last page. The returned version is read before the
+        first page's rows and carried in the cursor, so every page of one
+        walk reports the same one: passing it as since_version on the next
+        sync never misses a change, even one made mid-walk to a row already
+        passed (rows changed mid-walk may come twice). Raises ValueError on
+        bad parameters.
+        """
+        limit = min(int(limit or WEB_CONFIG["page_size"]), WEB_CONFIG["max_page_size"])
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        columns = parse_fields(fields)
+
+        conditions, params = filter_clause(city, state, business_type, min_confidence, since, since_version)
+        version = None
+        if cursor is not None:
+            buyer_id, version = parse_page_cursor(cursor)
+            conditions.append('id < ?')
+            params.append(buyer_id)
+
+        sql = f"SELECT {', '.join(columns)} FROM buyers"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+
+        if version is None:
+            version = self.data_version()
+        rows = self.connection().execute(sql, params).fetchall()
+        buyers = [dict(zip(columns, row)) for row in rows]
+        next_cursor = f"{buyers[-1]['id']}:{version}" if len(buyers) == limit else None
+        return {'buyers': buyers, 'next_cursor': next_cursor, 'version': version}
+
+    def timeseries(self, start=None, end=None, bucket='hour', group_by=None, **filters):
+        """New vs re-seen discoveries over a window, from the hourly rollups.
+
+        start and end are ISO timestamps, defaulting to the last 24 hours;
+        group_by is a comma-separated list of business_type, source and
+        city. Raises ValueError on bad parameters.
+        """
+        now = datetime.now(timezone.utc)
+        end = parse_since(end) if end else now.strftime('%Y-%m-%d %H:%M:%S')
+        start = parse_since(start) if start else (now - timedelta(hours=24)).strftime('%Y-%m-%d %H:%M:%S')
+        dimensions = [name.strip() for name in (group_by or '').split(',') if name.strip()]
+        series = rollup_series(self.connection(), start, end, bucket, dimensions, **filters)
+        return {'start': start, 'end': end, 'bucket': bucket, 'series': series}
+
+    def stats(self):
+        """Total buyers and those discovered in the last day and hour"""
+        return dict(self.connection().execute(STATS_SQL).fetchone())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Hourly discovery rollups for the Battery Buyer Finder Agent
+Counters kept up to date by the writer and read back as time series
+"""
+
+from collections import Counter
+from entity_resolution import domain_of
+
+ROLLUP_DIMENSIONS = ('business_type', 'source', 'city')
+
+ROLLUP_BUCKETS = {
+    'hour': 'hour',
+    'day': "substr(hour, 1, 10) || ' 00:00:00'"
+}
+
+INCREMENT_ROLLUP_SQL = '''
+    INSERT INTO buyer_rollups (hour, business_type, source, city, new_count, reseen_count)
+    VALUES (strftime('%Y-%m-%d %H:00:00', 'now'), ?, ?, ?, ?, ?)
+    ON CONFLICT(hour, business_type, source, city) DO UPDATE SET
+        new_count = new_count + excluded.new_count,
+        reseen_count = reseen_count + excluded.reseen_count
+'''
+
+def init_schema(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS buyer_rollups (
+            hour TEXT NOT NULL,
+            business_type TEXT NOT NULL,
+            source TEXT NOT NULL,
+            city TEXT NOT NULL,
+            new_count INTEGER NOT NULL DEFAULT 0,
+            reseen_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, business_type, source, city)
+        ) WITHOUT ROWID
+    ''')
+
+def backfill(cursor):
+    """Seed an empty rollup table with the discoveries already stored.
+
+    Only first sightings can be recovered from the buyers table, so
+    history before the rollups existed has no re-seen counts.
+    """
+    if cursor.execute('SELECT 1 FROM buyer_rollups LIMIT 1').fetchone():
+        return
+    counts = Counter()
+    for discovered_at, business_type, source_url, city in cursor.execute(
+        'SELECT discovered_at, business_type, source_url, city FROM buyers'
+    ).fetchall():
+        if discovered_at:
+            key = (discovered_at[:13] + ':00:00',) + rollup_key(business_type, source_url, city)
+            counts[key] += 1
+    cursor.executemany(
+        'INSERT INTO buyer_rollups (hour, business_type, source, city, new_count) VALUES (?, ?, ?, ?, ?)',
+        [key + (count,) for key, count in counts.items()]
+    )
+
+def rollup_key(business_type, source_url, city):
+    """Dimension values for a buyer; the source is the host it came from"""
+    return (business_type or '', domain_of(source_url), city or '')
+
+class RollupBatch:
+    """Counts gathered over one transaction, written as one upsert per cell"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, buyer, created):
+        key = rollup_key(buyer.get('business_type'), buyer.get('source_url'), buyer.get('city'))
+        counts = self.counts.setdefault(key, [0, 0])
+        counts[0 if created else 1] += 1
+
+    def flush(self, cursor):
+        cursor.executemany(INCREMENT_ROLLUP_SQL, [key + tuple(counts) for key, counts in self.counts.items()])
+        self.counts.clear()
+
+def rollup_series(conn, start, end, bucket='hour', group_by=(), **filters):
+    """New and re-seen counts per bucket between start and end.
+
+    start and end are 'YYYY-MM-DD HH:MM:SS' UTC strings; group_by and
+    filters name ROLLUP_DIMENSIONS. Reads only the rollup cells inside
+    the window, never the buyers table.
+    """
+    if bucket not in ROLLUP_BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+    unknown = [name for name in list(group_by) + list(filters) if name not in ROLLUP_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(unknown)}")
+
+    conditions = ['hour >= ?', 'hour < ?']
+    params = [start[:13] + ':00:00', end]
+    for name, value in filters.items():
+        if value is not None:
+            conditions.append(f'{name} = ?')
+            params.append(value)
+
+    columns = [f"{ROLLUP_BUCKETS[bucket]} AS bucket"] + list(group_by)
+    sql = f'''
+        SELECT {', '.join(columns)}, SUM(new_count), SUM(reseen_count)
+        FROM buyer_rollups
+        WHERE {' AND '.join(conditions)}
+        GROUP BY {', '.join(['bucket'] + list(group_by))}
+        ORDER BY bucket
+    '''
+    names = ['bucket'] + list(group_by) + ['new', 'reseen']
+    return [dict(zip(names, row)) for row in conn.execute(sql, params)]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Full-text buyer search for the Battery Buyer Finder Agent
+FTS5 index over the buyers table, kept in sync by triggers
+"""
+
+import re
+from buyer_queries import parse_fields, filter_clause
+from config import SEARCH_CONFIG
+
+SEARCH_COLUMNS = ('company_name', 'address', 'business_type', 'city', 'source_url')
+
+SEARCH_TERM_PATTERN = re.compile(r'(\w+)(\*?)')
+
+def init_schema(cursor):
+    """Create the FTS5 index and its triggers, indexing existing rows once"""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'buyers_fts'"
+    ).fetchone()
+
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+    # External content table: the text lives in buyers only, and the
+    # prefix indexes make "batt*" a range lookup instead of a term scan
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS buyers_fts USING fts5(
+            {columns},
+            content='buyers', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS buyers_fts_insert AFTER INSERT ON buyers BEGIN
+            INSERT INTO buyers_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS buyers_fts_delete AFTER DELETE ON buyers BEGIN
+            INSERT INTO buyers_fts (buyers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    # Only changes to indexed text touch the index, not the per-save
+    # seen_count/version/last_seen_at updates
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS buyers_fts_update AFTER UPDATE OF {columns} ON buyers BEGIN
+            INSERT INTO buyers_fts (buyers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO buyers_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+    if not exists:
+        cursor.execute("INSERT INTO buyers_fts (buyers_fts) VALUES ('rebuild')")
+
+def fts_query(text):
+    """FTS5 MATCH expression for free text typed by a user.
+
+    Every word must match. The last word, and any word ending in '*',
+    matches as a prefix so results follow the user as they type. Words
+    are quoted, so FTS5 operators in the input are treated as text.
+    """
+    terms = SEARCH_TERM_PATTERN.findall(text or '')
+    if not terms:
+        raise ValueError("Search query is empty")
+    parts = []
+    for i, (word, star) in enumerate(terms):
+        prefix = star or i == len(terms) - 1
+        parts.append(f'"{word}"' + ('*' if prefix else ''))
+    return ' '.join(parts)
+
+def parse_cursor(cursor):
+    """(score, id) from a search cursor"""
+    try:
+        score, buyer_id = cursor.split(':')
+        return float(score), int(buyer_id)
+    except ValueError:
+        raise ValueError(f"Invalid search cursor: {cursor}")
+
+def search_buyers(conn, q, limit=None, cursor=None, fields=None, **filters):
+    """One page of buyers matching q, best first.
+
+    Relevance is bm25 over the indexed columns, company names weighing
+    most, scaled up by confidence_score so that among similar matches
+    the more trustworthy listing wins. Pages are keyed on (score, id);
+    pass the returned next_cursor back to continue.
+    """
+    limit = min(int(limit or SEARCH_CONFIG["page_size"]), SEARCH_CONFIG["max_page_size"])
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    columns = parse_fields(fields)
+    weights = ', '.join(str(SEARCH_CONFIG["column_weights"][column]) for column in SEARCH_COLUMNS)
+
+    conditions, params = filter_clause(**filters)
+    if cursor:
+        score, buyer_id = parse_cursor(cursor)
+        conditions.append('(score > ? OR (score = ? AND id > ?))')
+        params.extend([score, score, buyer_id])
+
+    sql = f'''
+        SELECT {', '.join(columns)}, score FROM (
+            SELECT b.*, bm25(buyers_fts, {weights}) * (1.0 + COALESCE(b.confidence_score, 0)) AS score
+            FROM buyers_fts JOIN buyers b ON b.id = buyers_fts.rowid
+            WHERE buyers_fts MATCH ?
+        )
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        ORDER BY score, id
+        LIMIT ?
+    '''
+    rows = conn.execute(sql, [fts_query(q)] + params + [limit]).fetchall()
+
+    buyers = []
+    for row in rows:
+        buyer = dict(zip(columns, row))
+        buyer['score'] = row[-1]
+        buyers.append(buyer)
+    next_cursor = None
+    if len(buyers) == limit:
+        next_cursor = f"{buyers[-1]['score']!r}:{buyers[-1]['id']}"
+    return {'buyers': buyers, 'next_cursor': next_cursor}
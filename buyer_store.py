@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Buyer storage for the Battery Buyer Finder Agent
+Schema migrations and the group-committed bulk write path
+"""
+
+import queue
+import sqlite3
+import logging
+import threading
+import geo
+import buyer_search
+import buyer_rollups
+from entity_resolution import EntityResolver
+from config import DATABASE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+BUYER_COLUMNS = (
+    'company_name', 'phone', 'address', 'email', 'website',
+    'business_type', 'city', 'confidence_score', 'source_url'
+)
+
+BUYER_INDEXED_COLUMNS = ('discovered_at', 'city', 'state', 'business_type', 'confidence_score', 'version')
+
+UPSERT_BUYER_SQL = '''
+    INSERT INTO buyers
+    (company_name, phone, address, email, website, business_type,
+     city, confidence_score, source_url, last_seen_at, seen_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, 1)
+    ON CONFLICT(company_name, phone, address) DO UPDATE SET
+        confidence_score = MAX(COALESCE(buyers.confidence_score, 0), excluded.confidence_score),
+        email = CASE WHEN COALESCE(buyers.email, '') = '' THEN excluded.email ELSE buyers.email END,
+        website = CASE WHEN COALESCE(buyers.website, '') = '' THEN excluded.website ELSE buyers.website END,
+        city = CASE WHEN COALESCE(buyers.city, '') = '' THEN excluded.city ELSE buyers.city END,
+        last_seen_at = CURRENT_TIMESTAMP,
+        seen_count = buyers.seen_count + 1
+'''
+
+def init_schema(conn):
+    """Create the buyers table and bring older databases up to date"""
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS buyers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company_name TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            email TEXT,
+            website TEXT,
+            business_type TEXT,
+            city TEXT,
+            state TEXT,
+            confidence_score REAL,
+            source_url TEXT,
+            discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen_at TIMESTAMP,
+            seen_count INTEGER NOT NULL DEFAULT 1,
+            version INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(company_name, phone, address)
+        )
+    ''')
+
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(buyers)')}
+    if 'last_seen_at' not in columns:
+        cursor.execute('ALTER TABLE buyers ADD COLUMN last_seen_at TIMESTAMP')
+        cursor.execute('UPDATE buyers SET last_seen_at = discovered_at')
+    if 'seen_count' not in columns:
+        cursor.execute('ALTER TABLE buyers ADD COLUMN seen_count INTEGER NOT NULL DEFAULT 1')
+    if 'version' not in columns:
+        cursor.execute('ALTER TABLE buyers ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+    # Single-row counter bumped by every write transaction; buyers carry
+    # the version that last touched them. The same row keeps the buyer
+    # total, maintained by triggers, so stats never count the table.
+    counter_columns = {row[1] for row in cursor.execute('PRAGMA table_info(data_version)')}
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            buyer_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    if counter_columns and 'buyer_count' not in counter_columns:
+        cursor.execute('ALTER TABLE data_version ADD COLUMN buyer_count INTEGER NOT NULL DEFAULT 0')
+    cursor.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+    if 'buyer_count' not in counter_columns:
+        cursor.execute('UPDATE data_version SET buyer_count = (SELECT COUNT(*) FROM buyers) WHERE id = 1')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS buyers_count_insert AFTER INSERT ON buyers BEGIN
+            UPDATE data_version SET buyer_count = buyer_count + 1 WHERE id = 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS buyers_count_delete AFTER DELETE ON buyers BEGIN
+            UPDATE data_version SET buyer_count = buyer_count - 1 WHERE id = 1;
+        END
+    ''')
+
+    # Indexes behind the dashboard and API filters (see buyer_queries)
+    for column in BUYER_INDEXED_COLUMNS:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_buyers_{column} ON buyers({column})')
+
+    resolver = EntityResolver()
+    resolver.init_schema(cursor)
+    resolver.backfill(cursor)
+
+    buyer_rollups.init_schema(cursor)
+    buyer_rollups.backfill(cursor)
+
+    buyer_search.init_schema(cursor)
+
+    geo.init_schema(cursor)
+
+    conn.commit()
+
+def buyer_row(buyer):
+    """Parameter tuple for UPSERT_BUYER_SQL from a scraped buyer dict"""
+    return (
+        buyer.get('company_name', ''),
+        buyer.get('phone', ''),
+        buyer.get('address', ''),
+        buyer.get('email', ''),
+        buyer.get('website', ''),
+        buyer.get('business_type', ''),
+        buyer.get('city', ''),
+        buyer.get('confidence_score', 0.5),
+        buyer.get('source_url', '')
+    )
+
+class BuyerWriter:
+    """Single long-lived writer that group-commits buyer batches.
+
+    Callers hand over a batch and block until it is durable. A background
+    thread owns the connection, gathers every batch that arrives within
+    DATABASE_CONFIG["group_commit_ms"] of the first, and commits them all
+    in one transaction; if that fails, each batch is retried in its own,
+    so only the caller whose batch is at fault gets the error. Each buyer is first resolved against the existing
+    rows (see entity_resolution); a match is merged into the canonical row,
+    anything else is upserted as a new one. Either way the best confidence
+    wins, empty fields are filled in and last_seen_at/seen_count move. The
+    raw record is kept as an observation of the canonical buyer, and the
+    hourly new/re-seen rollups are bumped in the same transaction. Each
+    transaction also bumps data_version and stamps it on every buyer it
+    inserted or merged into, so readers can ask for changes since a version.
+    Missing state and coordinates are filled in from the offline gazetteer.
+    """
+
+    def __init__(self, db_path, group_commit_ms=None, max_batch_rows=None, resolver=None):
+        self.db_path = db_path
+        self.resolver = resolver or EntityResolver()
+        self.group_commit_ms = (group_commit_ms if group_commit_ms is not None
+                                else DATABASE_CONFIG["group_commit_ms"])
+        self.max_batch_rows = max_batch_rows or DATABASE_CONFIG["max_batch_rows"]
+        self.pending = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """Call `callback()` after every commit, from the writer thread"""
+        self.listeners.append(callback)
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='buyer-writer', daemon=True)
+                self.thread.start()
+
+    def write(self, buyers):
+        """Upsert buyers and return how many of them were new rows"""
+        return self.write_batches([buyers])[0]
+
+    def write_batches(self, batches):
+        """write() for several batches at once, returning each one's count"""
+        requests = []
+        for buyers in batches:
+            rows = []
+            for buyer in buyers:
+                if not buyer.get('company_name'):
+                    logger.warning("Skipping buyer without a company name")
+                    continue
+                rows.append(dict(zip(BUYER_COLUMNS, buyer_row(buyer))))
+            requests.append({'rows': rows, 'done': threading.Event(), 'saved': 0, 'error': None})
+
+        if any(request['rows'] for request in requests):
+            self._ensure_thread()
+        for request in requests:
+            if request['rows']:
+                self.pending.put(request)
+            else:
+                request['done'].set()
+        for request in requests:
+            request['done'].wait()
+        for request in requests:
+            if request['error'] is not None:
+                raise request['error']
+        return [request['saved'] for request in requests]
+
+    def _gather(self, first):
+        """Collect the batches that arrive within the group commit window"""
+        group = [first]
+        rows = len(first['rows'])
+        timeout = self.group_commit_ms / 1000.0
+        while rows < self.max_batch_rows:
+            try:
+                request = self.pending.get(timeout=timeout)
+            except queue.Empty:
+                break
+            group.append(request)
+            rows += len(request['rows'])
+        return group
+
+    def _commit_group(self, conn, group):
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            version = cursor.execute(
+                'UPDATE data_version SET version = version + 1 WHERE id = 1 RETURNING version'
+            ).fetchone()[0]
+            rollups = buyer_rollups.RollupBatch()
+            for request in group:
+                request['saved'] = 0
+                for buyer in request['rows']:
+                    created = self._store(cursor, buyer, version)
+                    rollups.add(buyer, created)
+                    request['saved'] += created
+            rollups.flush(cursor)
+            cursor.execute('COMMIT')
+        except Exception:
+            # Any failure, not just a database one, must not leave the
+            # transaction open on the writer's long-lived connection
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+            raise
+
+    def _store(self, cursor, buyer, version):
+        """Resolve and write one buyer, returning 1 if it is a new row"""
+        buyer_id = self.resolver.resolve(cursor, buyer)
+        created = 0
+        if buyer_id is not None:
+            self.resolver.merge(cursor, buyer_id, buyer)
+        else:
+            last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM buyers').fetchone()[0]
+            cursor.execute(UPSERT_BUYER_SQL, tuple(buyer[column] for column in BUYER_COLUMNS))
+            buyer_id = cursor.execute(
+                'SELECT id FROM buyers WHERE company_name = ? AND phone IS ? AND address IS ?',
+                (buyer['company_name'], buyer['phone'], buyer['address'])
+            ).fetchone()[0]
+            created = int(buyer_id > last_id)
+        geo.apply_geocode(cursor, buyer_id, buyer)
+        cursor.execute('UPDATE buyers SET version = ? WHERE id = ?', (version, buyer_id))
+        self.resolver.index(cursor, buyer_id, buyer)
+        self.resolver.observe(cursor, buyer_id, buyer)
+        return created
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        while True:
+            group = self._gather(self.pending.get())
+            try:
+                try:
+                    self._commit_group(conn, group)
+                    logger.debug(f"Committed {len(group)} buyer batches in one transaction")
+                except Exception as e:
+                    if len(group) == 1:
+                        raise
+                    # Find the batch at fault: the others still go in
+                    logger.warning(f"Group commit failed, saving its {len(group)} batches one by one: {e}")
+                    for request in group:
+                        try:
+                            self._commit_group(conn, [request])
+                        except Exception as e:
+                            logger.warning(f"Error saving buyers: {e}")
+                            request['error'] = e
+            except Exception as e:
+                logger.warning(f"Error saving buyers: {e}")
+                group[0]['error'] = e
+            finally:
+                for request in group:
+                    request['done'].set()
+            for callback in self.listeners:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.warning(f"Buyer writer listener failed: {e}")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Cooperative cancellation for the Battery Buyer Finder Agent
+Deadlines and cancel signals that fetches, sleeps and browsers honour
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class Cancelled(Exception):
+    """Raised inside work whose token was cancelled.
+
+    An ordinary Exception on purpose: scrapers that catch errors per page
+    keep the listings they already parsed and return them.
+    """
+
+class CancelToken:
+    """Cancel signal with an optional deadline, shared by a unit of work.
+
+    Work checks the token between steps (check), sleeps on it instead of
+    time.sleep (sleep), and bounds blocking calls by remaining(). Things
+    that cannot be interrupted that way, like a browser mid page load,
+    register on_cancel callbacks that tear them down. A child token is
+    cancelled with its parent and never outlives its deadline.
+    """
+
+    def __init__(self, timeout=None, parent=None, deadline_reason='deadline'):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        if parent is not None and parent.deadline is not None:
+            self.deadline = parent.deadline if self.deadline is None else min(self.deadline, parent.deadline)
+        self.reason = None
+        self.event = threading.Event()
+        self.callbacks = []
+        self.lock = threading.Lock()
+        self.parent = parent
+        self.timer = None
+        if self.deadline is not None:
+            self.timer = threading.Timer(self.remaining(), self.cancel, args=(deadline_reason,))
+            self.timer.daemon = True
+            self.timer.start()
+        if parent is not None:
+            parent.on_cancel(self._parent_cancelled)
+
+    def _parent_cancelled(self):
+        self.cancel(self.parent.reason)
+
+    def child(self, timeout=None, deadline_reason='deadline'):
+        return CancelToken(timeout, parent=self, deadline_reason=deadline_reason)
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def cancel(self, reason='cancelled'):
+        """Cancel the token and run its callbacks, once"""
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.reason = reason
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        if self.timer is not None:
+            self.timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug(f"Cancel callback failed: {e}")
+
+    def on_cancel(self, callback):
+        """Call `callback()` when cancelled (now, if already)"""
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return callback
+        callback()
+        return callback
+
+    def remove_callback(self, callback):
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
+
+    def remaining(self):
+        """Seconds until the deadline, None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self.event.is_set():
+            raise Cancelled(self.reason)
+
+    def sleep(self, seconds):
+        """time.sleep that wakes up and raises when cancelled"""
+        if self.event.wait(seconds):
+            raise Cancelled(self.reason)
+
+    def close(self):
+        """Stop the deadline timer and detach from the parent"""
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.parent is not None:
+            self.parent.remove_callback(self._parent_cancelled)
+
+_local = threading.local()
+
+def current_token():
+    """The token of the work running on this thread, if any"""
+    return getattr(_local, 'token', None)
+
+@contextmanager
+def active(token):
+    """Make `token` the calling thread's current token for a block"""
+    previous = current_token()
+    _local.token = token
+    try:
+        yield token
+    finally:
+        _local.token = previous
+
+def bounded_timeout(timeout):
+    """`timeout` shortened to the current token's remaining time"""
+    token = current_token()
+    remaining = token.remaining() if token is not None else None
+    if remaining is None:
+        return timeout
+    remaining = max(remaining, 0.1)
+    return remaining if timeout is None else min(timeout, remaining)
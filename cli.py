@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Command line entry point for the Battery Buyer Finder Agent
+Each subcommand imports only what it needs, so one-shot runs start fast
+"""
+
+import sys
+import json
+import argparse
+from config import DATABASE_CONFIG, WEB_CONFIG, COORDINATOR_CONFIG
+
+def crawl_once(args):
+    """Run one crawl cycle and exit, e.g. from cron"""
+    from battery_buyer_agent import BatteryBuyerAgent
+
+    agent = BatteryBuyerAgent()
+    try:
+        saved = 0
+        for _ in range(args.cycles):
+            saved += agent.find_buyers()
+    finally:
+        agent.close()
+    print(f"Saved {saved} new buyers")
+
+def crawl(args):
+    """Crawl at the SCHEDULE_CONFIG pace until stopped, without serving"""
+    from battery_buyer_agent import crawl_forever
+    crawl_forever()
+
+def worker(args):
+    """Crawl jobs as they come ready, alongside any other workers"""
+    import signal
+    from battery_buyer_agent import BatteryBuyerAgent, run_worker
+
+    # Unwind on SIGTERM so held leases are handed back
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    agent = BatteryBuyerAgent(coordinator_url=args.coordinator, coordinator_token=args.token)
+    try:
+        run_worker(agent)
+    finally:
+        agent.close()
+
+def coordinator(args):
+    """Serve crawl job leases and take in buyers from workers"""
+    from crawl_coordinator import serve_coordinator
+    serve_coordinator(args.db, args.host, args.port, args.token)
+
+def serve(args):
+    """Serve the dashboard and API without crawling"""
+    if args.debug:
+        from web_app import create_app
+        create_app(args.db).run(host=args.host, port=args.port, debug=True)
+        return
+    from web_server import serve as serve_forever
+    serve_forever(args.db, host=args.host, port=args.port, workers=args.workers)
+
+def export(args):
+    from buyer_export import run_export
+    run_export(args)
+
+def stats(args):
+    import sqlite3
+    from buyer_store import init_schema
+    from buyer_queries import BuyerQueries
+
+    conn = sqlite3.connect(args.db)
+    init_schema(conn)
+    conn.close()
+    print(json.dumps(BuyerQueries(args.db).stats(), indent=2))
+
+def yields(args):
+    from crawl_frontier import CrawlFrontier
+
+    frontier = CrawlFrontier(args.db)
+    report = {'sources': frontier.stats(), 'jobs': frontier.job_stats(args.source, args.limit)}
+    print(json.dumps(report, indent=2))
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Battery Buyer Finder Agent")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    crawl = subcommands.add_parser('crawl-once', help="Run crawl cycles and exit")
+    crawl.add_argument('--cycles', type=int, default=1, help="Crawl cycles to run (default 1)")
+    crawl.set_defaults(func=crawl_once)
+
+    scheduled = subcommands.add_parser('crawl', help="Crawl at the configured pace until stopped")
+    scheduled.set_defaults(func=crawl)
+
+    crawler = subcommands.add_parser('worker', help="Crawl ready jobs alongside other workers")
+    crawler.add_argument('--coordinator', metavar='URL',
+                         help="Coordinator to lease jobs from and send buyers to (default: the local database)")
+    crawler.add_argument('--token', default=COORDINATOR_CONFIG["token"],
+                         help="Coordinator's shared token (default: $COORDINATOR_TOKEN)")
+    crawler.set_defaults(func=worker)
+
+    hub = subcommands.add_parser('coordinator', help="Lease crawl jobs to workers on other machines")
+    hub.add_argument('--db', default=DATABASE_CONFIG["path"])
+    hub.add_argument('--host', default=COORDINATOR_CONFIG["host"])
+    hub.add_argument('--port', type=int, default=COORDINATOR_CONFIG["port"])
+    hub.add_argument('--token', default=COORDINATOR_CONFIG["token"],
+                     help="Shared token workers must send (default: $COORDINATOR_TOKEN)")
+    hub.set_defaults(func=coordinator)
+
+    web = subcommands.add_parser('serve', help="Serve the dashboard and API")
+    web.add_argument('--db', default=DATABASE_CONFIG["path"])
+    web.add_argument('--host', default=WEB_CONFIG["host"])
+    web.add_argument('--port', type=int, default=WEB_CONFIG["port"])
+    web.add_argument('--workers', type=int, default=WEB_CONFIG["workers"],
+                     help="Server processes (default %(default)s)")
+    web.add_argument('--debug', action='store_true', default=WEB_CONFIG["debug"],
+                     help="Use Flask's single-process development server with the debugger")
+    web.set_defaults(func=serve)
+
+    # Argument definitions live with the exporter so its standalone
+    # command and this one cannot drift apart
+    from buyer_export import add_export_arguments
+    dump = subcommands.add_parser('export', help="Export buyers to a CSV or NDJSON file")
+    add_export_arguments(dump)
+    dump.set_defaults(func=export)
+
+    summary = subcommands.add_parser('stats', help="Print buyer counts")
+    summary.add_argument('--db', default=DATABASE_CONFIG["path"])
+    summary.set_defaults(func=stats)
+
+    productivity = subcommands.add_parser('yields', help="Print new buyers per second and per request")
+    productivity.add_argument('--db', default=DATABASE_CONFIG["path"])
+    productivity.add_argument('--source', help="Only jobs from this source")
+    productivity.add_argument('--limit', type=int, default=20, help="Jobs to list (default 20)")
+    productivity.set_defaults(func=yields)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@
 Configuration settings for the Battery Buyer Finder Agent
 """
 
+import os
+
 # Search configuration
 SEARCH_TERMS = [
     "scrap battery buyers",
@@ -39,12 +41,86 @@ CRAIGSLIST_CITIES = [
 
 # Rate limiting settings (seconds)
 RATE_LIMITS = {
-    "between_requests": (2, 5),     # Random delay between individual requests
+    "between_requests": (2, 5),     # Random delay between requests to the same host
+    "host_burst": 1,                # Requests a host may receive back-to-back
     "between_sources": (3, 7),      # Delay between different data sources
     "selenium_wait": (2, 4),        # Wait time for selenium operations
     "error_backoff": 10             # Backoff time after errors
 }
 
+# Concurrent fetch settings
+FETCH_CONFIG = {
+    "max_workers": 6,               # Sources fetched in parallel per search
+    "cycle_deadline_seconds": 900,  # Hard limit on one find_buyers cycle
+    "cycle_target_buyers": 5,       # New buyers after which a cycle's remaining jobs are cancelled
+    "source_deadline_seconds": {    # Limit on one job, by source
+        "default": 120,
+        "google": 60
+    },
+    "cancel_grace_seconds": 5       # Wait for cancelled jobs to stop before reporting the cycle
+}
+
+# HTML parsing settings
+PARSE_CONFIG = {
+    "processes": 2,                 # Parser worker processes; 0 parses on fetch threads
+    "inline_below_bytes": 50000     # Smaller pages are parsed inline
+}
+
+# Crawl frontier settings
+FRONTIER_CONFIG = {
+    "sources": {                    # Source name -> how its jobs are expanded
+        "yellowpages": "term_city",
+        "google": "term_city",
+        "craigslist": "craigslist_city",
+        "industry_directories": "global",
+        "recycling_centers": "global",
+        "scrap_yards": "global"
+    },
+    "jobs_per_cycle": 6,            # Most jobs claimed by each find_buyers call
+    "cycle_budget_seconds": 600,    # Expected crawl time claimed by each find_buyers call
+    "prior_seconds": 60,            # Weight of a source's average yield when judging one of its jobs
+    "default_job_seconds": 30,      # Assumed duration of a job from a source never timed
+    "revisit_after_hours": {        # Minimum gap before a finished job runs again
+        "default": 168,
+        "craigslist": 24,
+        "industry_directories": 24,
+        "recycling_centers": 24,
+        "scrap_yards": 24
+    },
+    "lease_seconds": 300,           # A job's lease lapses this long after its last heartbeat
+    "heartbeat_seconds": 60,        # How often a worker renews the leases it holds
+    "idle_seconds": 30,             # Worker sleep when no job is ready
+    "error_backoff_seconds": 5,     # Worker sleep after a failed cycle, doubled while cycles keep failing
+    "max_error_backoff_seconds": 300,  # Longest worker sleep between failed cycles
+    "retry_after_minutes": 30       # Delay before a failed job is offered again
+}
+
+# Selenium driver pool settings
+SELENIUM_CONFIG = {
+    "pool_size": 2,                 # Warm Chrome instances kept alive
+    "max_pages_per_driver": 50,     # Recycle a driver after this many pages
+    "page_load_timeout": 20,        # Seconds before a page load is abandoned
+    "blocked_url_patterns": [       # Resources never downloaded by pooled drivers
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+        "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf"
+    ]
+}
+
+# HTTP response cache settings
+HTTP_CACHE_CONFIG = {
+    "path": "http_cache.db",
+    "max_bytes": 200 * 1024 * 1024,  # 200MB, least recently used evicted first
+    "default_ttl": None,             # Hosts not listed below are never cached
+    "ttls": {                        # Seconds a page is served without revalidation
+        "recyclingtoday.com": 24 * 3600,
+        "waste360.com": 24 * 3600,
+        "batteriesplus.com": 24 * 3600,
+        "earth911.com": 24 * 3600,
+        "call2recycle.org": 12 * 3600,
+        "iscrapapp.com": 12 * 3600
+    }
+}
+
 # Scraping targets and confidence scores
 SOURCE_CONFIDENCE = {
     "Google Business": 0.8,
@@ -61,7 +137,26 @@ DATABASE_CONFIG = {
     "path": "battery_buyers.db",
     "backup_interval": 24,  # hours
     "cleanup_old_entries": False,  # Set to True to remove old entries
-    "max_age_days": 365
+    "max_age_days": 365,
+    "group_commit_ms": 50,  # Window for folding concurrent saves into one commit
+    "max_batch_rows": 1000  # Rows after which a group commits immediately
+}
+
+# Entity resolution settings
+ENTITY_RESOLUTION_CONFIG = {
+    "contact_match_similarity": 0.5,  # Name similarity needed when phone or domain agree
+    "name_match_similarity": 0.85,  # Name similarity needed on name alone (same, known city)
+    "max_block_size": 50,  # Blocking keys shared by more buyers are too generic to use
+    "common_name_tokens": [
+        "battery", "recycling", "recycler", "scrap", "metal", "auto",
+        "automotive", "part", "yard", "salvage", "service", "center",
+        "centre", "supply", "solution"
+    ],
+    "ignored_domains": [
+        "gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "aol.com",
+        "icloud.com", "yellowpages.com", "craigslist.org", "google.com",
+        "facebook.com", "yelp.com"
+    ]
 }
 
 # Web interface settings
@@ -69,14 +164,65 @@ WEB_CONFIG = {
     "host": "0.0.0.0",
     "port": 5000,
     "debug": False,
-    "auto_refresh_interval": 60  # seconds
+    "auto_refresh_interval": 60,  # seconds
+    "page_size": 100,  # Buyers per /api/buyers page by default
+    "max_page_size": 1000,  # Largest page a client may ask for
+    "event_poll_interval": 2,  # Seconds between checks for buyers saved by other processes
+    "event_replay_limit": 500,  # Buyers replayed to a resuming client, and per broadcast
+    "event_keepalive": 15,  # Seconds of silence before an SSE keepalive comment
+    "workers": 2,  # Server processes sharing the port (1 serves from the main process)
+    "read_pool_size": 8,  # Idle read connections kept per server process
+    "separate_crawler": True,  # Crawl in a child process so parsing never stalls requests
+    "crawler_restart_seconds": 60  # A crawler process that dies sooner than this is restarted after this long
+}
+
+# Multi-machine crawling settings
+COORDINATOR_CONFIG = {
+    "host": "127.0.0.1",  # Listen on all interfaces ("0.0.0.0") only where workers can reach nothing else
+    "port": 5001,
+    "token": os.environ.get("COORDINATOR_TOKEN"),  # Shared secret every worker request must carry
+    "request_timeout": 30,  # Seconds a worker waits on the coordinator
+    "upload_attempts": 3,  # Tries at sending a batch of buyers before keeping it for later
+    "upload_backoff_seconds": 2,  # Wait before the second try, doubled after each failed one
+    "max_unsent_buyers": 5000  # Buyers a worker keeps while the coordinator is unreachable
+}
+
+# Full-text search settings
+SEARCH_CONFIG = {
+    "page_size": 20,  # Results per /api/search page by default
+    "max_page_size": 200,  # Largest page a client may ask for
+    "column_weights": {  # bm25 weight of a hit in each indexed column
+        "company_name": 10.0,
+        "address": 2.0,
+        "business_type": 1.0,
+        "city": 3.0,
+        "source_url": 0.5
+    }
+}
+
+# Geocoding settings
+GEO_CONFIG = {
+    "gazetteer_path": "gazetteer.csv",  # city,state,latitude,longitude,zip rows; zip is a ZIP, a ZIP3 or empty
+    "address_cache_size": 10000,  # Parsed addresses kept in memory
+    "default_radius_km": 50,  # /api/nearby radius when none is given
+    "max_radius_km": 500,  # Largest radius a client may ask for
+    "distance_band_km": 5,  # Nearby buyers in the same band of this width are ranked by confidence
+    "page_size": 50,  # Buyers per /api/nearby response by default
+    "max_page_size": 500  # Largest response a client may ask for
+}
+
+# Export settings
+EXPORT_CONFIG = {
+    "chunk_rows": 500  # Rows read and encoded per streamed chunk
 }
 
 # Scheduling settings
 SCHEDULE_CONFIG = {
-    "search_interval": 1,  # hours
+    "search_interval": 1,  # hours, whole hours only (pacing reads hourly rollups)
     "target_buyers_per_hour": 5,
-    "max_concurrent_searches": 3
+    "max_concurrent_searches": 3,
+    "backfill_windows": 3,  # Earlier intervals whose shortfall is made up later
+    "poll_seconds": 30  # Seconds between pacing checks while no cycle finishes
 }
 
 # User agent rotation
@@ -92,10 +238,27 @@ USER_AGENTS = [
 BATTERY_KEYWORDS = [
     "battery", "batteries", "lead", "acid", "automotive", "car", "truck",
     "marine", "industrial", "UPS", "backup", "rechargeable", "scrap",
-    "recycling", "disposal", "core", "exchange", "buy", "purchase",
-    "dealer", "yard", "metal", "lead-acid"
+    "recycling", "recycle", "disposal", "core", "exchange", "buy", "buyer",
+    "purchase", "dealer", "yard", "metal", "lead-acid"
 ]
 
+# Relevance weight per keyword (unlisted keywords weigh 1.0). Battery
+# terms dominate; generic trade words only add up in combination.
+KEYWORD_WEIGHTS = {
+    "battery": 2.0, "batteries": 2.0, "lead-acid": 2.0,
+    "lead": 1.5, "automotive": 1.5,
+    "scrap": 0.25, "recycling": 0.25, "recycle": 0.25, "disposal": 0.25,
+    "buy": 0.25, "buyer": 0.25, "purchase": 0.25, "dealer": 0.25,
+    "yard": 0.25, "metal": 0.25
+}
+
+# Minimum relevance score for a result to be kept
+RELEVANCE_THRESHOLDS = {
+    "title": 1.0,                   # Short listing titles
+    "listing": 2.0,                 # Full listing text, which names the trade anyway
+    "context": 1.0                  # Weight a single hit needs to anchor nearby contacts
+}
+
 # Contact info validation patterns
 VALIDATION_PATTERNS = {
     "phone": r"^(\+?1?[-.\s]?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4})$",
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Contact extraction for the Battery Buyer Finder Agent
+Precompiled phone/email patterns with a batch API
+"""
+
+import re
+
+# North American numbers, optionally prefixed with a +1 country code.
+# Digit groups are captured so normalization needs no second regex pass.
+PHONE_PATTERN = re.compile(
+    r'(?<!\d)(?:\+?1[-.\s]?)?\(?(\d{3})\)?[-.\s]?(\d{3})[-.\s]?(\d{4})(?!\d)'
+)
+EMAIL_PATTERN = re.compile(
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b'
+)
+
+def format_phone(e164):
+    """Display form '(555) 123-4567' of an E.164 '+15551234567' number"""
+    digits = e164[-10:]
+    return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+
+def normalize_phone(raw):
+    """E.164 form of a raw phone string, or None if it is not a US number"""
+    digits = ''.join(ch for ch in raw if ch.isdigit())
+    if len(digits) == 11 and digits[0] == '1':
+        digits = digits[1:]
+    if len(digits) != 10:
+        return None
+    return '+1' + digits
+
+def extract_contacts(text):
+    """Deduplicated phones and emails in text with their character offsets.
+
+    Returns {'phones': [...], 'emails': [...]} in order of first
+    appearance. Each phone is {'e164', 'display', 'offsets'} and each
+    email {'email', 'offsets'}, where offsets lists the (start, end) span
+    of every occurrence. Emails are lowercased.
+    """
+    phones = {}
+    for match in PHONE_PATTERN.finditer(text):
+        e164 = '+1' + match.group(1) + match.group(2) + match.group(3)
+        entry = phones.get(e164)
+        if entry is None:
+            entry = phones[e164] = {'e164': e164, 'display': format_phone(e164), 'offsets': []}
+        entry['offsets'].append(match.span())
+
+    emails = {}
+    for match in EMAIL_PATTERN.finditer(text):
+        email = match.group(0).lower()
+        entry = emails.get(email)
+        if entry is None:
+            entry = emails[email] = {'email': email, 'offsets': []}
+        entry['offsets'].append(match.span())
+
+    return {'phones': list(phones.values()), 'emails': list(emails.values())}
+
+def extract_contacts_batch(texts):
+    """extract_contacts() over many documents or chunks at once.
+
+    A module-level function over plain data, so whole batches can be
+    shipped to a ParsePool worker in one round trip.
+    """
+    return [extract_contacts(text or '') for text in texts]
+
+def extract_contact_info(text):
+    """Display-formatted phones and lowercased emails found in text"""
+    contacts = extract_contacts(text)
+    phones = [phone['display'] for phone in contacts['phones']]
+    emails = [email['email'] for email in contacts['emails']]
+    return phones, emails
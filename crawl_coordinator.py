@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Crawl coordinator for the Battery Buyer Finder Agent
+Serves crawl job leases and takes in buyers for workers on other machines
+"""
+
+import hmac
+import time
+import sqlite3
+import logging
+import threading
+import requests
+from flask import Flask, jsonify, request
+from buyer_store import init_schema, BuyerWriter
+from crawl_frontier import SQLiteLeaseStore
+from cancellation import current_token, bounded_timeout
+from config import DATABASE_CONFIG, COORDINATOR_CONFIG
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = 'X-Coordinator-Token'
+
+def create_coordinator_app(db_path=None, token=None):
+    """JSON API over one lease store and one buyer writer.
+
+    Every worker's leases go through the store and every worker's buyers
+    through the single BuyerWriter, whose group commits fold concurrent
+    uploads into shared transactions. Every request must carry `token`
+    (default COORDINATOR_CONFIG["token"]) in the X-Coordinator-Token
+    header; there is no default token, so an unconfigured coordinator
+    refuses to start rather than take writes from anyone.
+    """
+    db_path = db_path or DATABASE_CONFIG["path"]
+    token = token or COORDINATOR_CONFIG["token"]
+    if not token:
+        raise ValueError("The coordinator needs a shared token: set COORDINATOR_TOKEN or pass --token")
+    conn = sqlite3.connect(db_path)
+    init_schema(conn)
+    conn.close()
+
+    app = Flask(__name__)
+    store = SQLiteLeaseStore(db_path)
+    writer = BuyerWriter(db_path)
+    app.config['DB_PATH'] = db_path
+    app.extensions['lease_store'] = store
+    app.extensions['buyer_writer'] = writer
+
+    @app.before_request
+    def authenticate():
+        sent = request.headers.get(TOKEN_HEADER, '')
+        if not hmac.compare_digest(sent.encode(), token.encode()):
+            return jsonify({'error': "Missing or wrong coordinator token"}), 401
+
+    @app.errorhandler(KeyError)
+    def missing_field(e):
+        return jsonify({'error': f"Missing field {e}"}), 400
+
+    @app.route('/leases/claim', methods=['POST'])
+    def claim():
+        data = request.get_json(force=True)
+        jobs = store.claim(data['worker_id'], data.get('limit'), data.get('sources'), data.get('budget_seconds'))
+        return jsonify({'jobs': jobs})
+
+    @app.route('/leases/renew', methods=['POST'])
+    def renew():
+        data = request.get_json(force=True)
+        return jsonify({'job_ids': store.renew(data['worker_id'], data['job_ids'])})
+
+    @app.route('/leases/complete', methods=['POST'])
+    def complete():
+        data = request.get_json(force=True)
+        completed = store.complete(data['worker_id'], data['job_id'], data['new_buyers'],
+                                   data.get('seconds'), data.get('requests', 0))
+        return jsonify({'completed': completed})
+
+    @app.route('/leases/release', methods=['POST'])
+    def release():
+        data = request.get_json(force=True)
+        released = store.release(data['worker_id'], data['job_id'], data.get('retry_minutes'))
+        return jsonify({'released': released})
+
+    @app.route('/frontier/stats')
+    def frontier_stats():
+        return jsonify(store.stats())
+
+    @app.route('/frontier/jobs')
+    def frontier_jobs():
+        return jsonify(store.job_stats(request.args.get('source'), request.args.get('limit', 50, type=int)))
+
+    @app.route('/buyers', methods=['POST'])
+    def save_buyers():
+        data = request.get_json(force=True)
+        if 'batches' in data:
+            # New-buyer counts per batch, so each goes to the job that found them
+            return jsonify({'saved': writer.write_batches(data['batches'])})
+        return jsonify({'saved': writer.write(data['buyers'])})
+
+    return app
+
+def serve_coordinator(db_path=None, host=None, port=None, token=None):
+    """Run the coordinator on a threaded server until interrupted"""
+    from werkzeug.serving import make_server
+
+    host = host or COORDINATOR_CONFIG["host"]
+    port = port or COORDINATOR_CONFIG["port"]
+    app = create_coordinator_app(db_path, token)
+    logger.info(f"Coordinating crawl workers on http://{host}:{port}")
+    make_server(host, port, app, threaded=True).serve_forever()
+
+class CoordinatorClient:
+    """JSON-over-HTTP calls to a coordinator"""
+
+    def __init__(self, url, timeout=None, token=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout or COORDINATOR_CONFIG["request_timeout"]
+        self.session = requests.Session()
+        self.session.headers[TOKEN_HEADER] = token or COORDINATOR_CONFIG["token"] or ''
+
+    def post(self, path, **data):
+        response = self.session.post(self.url + path, json=data, timeout=bounded_timeout(self.timeout))
+        response.raise_for_status()
+        return response.json()
+
+    def get(self, path, **params):
+        response = self.session.get(self.url + path, params=params, timeout=bounded_timeout(self.timeout))
+        response.raise_for_status()
+        return response.json()
+
+class RemoteLeaseStore(CoordinatorClient):
+    """SQLiteLeaseStore's methods, served by a coordinator"""
+
+    def claim(self, worker_id, limit=None, sources=None, budget_seconds=None):
+        return self.post('/leases/claim', worker_id=worker_id, limit=limit, sources=sources,
+                         budget_seconds=budget_seconds)['jobs']
+
+    def renew(self, worker_id, job_ids):
+        if not job_ids:
+            return []
+        return self.post('/leases/renew', worker_id=worker_id, job_ids=list(job_ids))['job_ids']
+
+    def complete(self, worker_id, job_id, new_buyers, seconds=None, requests=0):
+        return self.post('/leases/complete', worker_id=worker_id, job_id=job_id, new_buyers=new_buyers,
+                         seconds=seconds, requests=requests)['completed']
+
+    def release(self, worker_id, job_id, retry_minutes=None):
+        return self.post('/leases/release', worker_id=worker_id, job_id=job_id,
+                         retry_minutes=retry_minutes)['released']
+
+    def stats(self):
+        return self.get('/frontier/stats')
+
+    def job_stats(self, source=None, limit=50):
+        return self.get('/frontier/jobs', source=source, limit=limit)
+
+def retryable(error):
+    """Whether a failed coordinator call may succeed if simply repeated"""
+    response = getattr(error, 'response', None)
+    return response is None or response.status_code >= 500
+
+class RemoteBuyerWriter(CoordinatorClient):
+    """BuyerWriter.write() that hands buyers to the coordinator's writer.
+
+    An upload that fails on the network or a server error is tried again,
+    COORDINATOR_CONFIG["upload_attempts"] times in all, backing off on the
+    calling job's cancel token. If it still fails, its batch is kept (up
+    to max_unsent_buyers in all) and goes out alongside the next one, or
+    on flush(), so an outage delays results instead of losing them;
+    write() raises all the same. write() only counts the caller's own new
+    buyers: those of carried batches belong to no job still running.
+    """
+
+    def __init__(self, url, timeout=None, token=None):
+        super().__init__(url, timeout, token)
+        self.unsent = []
+        self.lock = threading.Lock()
+
+    def write(self, buyers):
+        buyers = list(buyers)
+        saved = self._send([buyers] if buyers else [])
+        return saved[-1] if buyers else 0
+
+    def flush(self):
+        """Send buyers kept back by failed uploads"""
+        return sum(self._send([]))
+
+    def _send(self, batches):
+        """Upload carried batches and `batches`; new-buyer counts per batch"""
+        # The upload runs outside the lock so that jobs don't queue behind
+        # a slow one; whichever goes next takes the carried batches along
+        with self.lock:
+            carried, self.unsent = self.unsent, []
+        batches = carried + batches
+        if not batches:
+            return []
+        try:
+            saved = self._upload(batches)
+        except Exception as e:
+            if not isinstance(e, requests.RequestException) or retryable(e):
+                with self.lock:
+                    self.unsent = self._keep(batches + self.unsent)
+            raise
+        if carried:
+            logger.info(f"Sent {sum(map(len, carried))} buyers held back by earlier failures, "
+                        f"{sum(saved[:len(carried)])} of them new")
+        return saved
+
+    def _keep(self, batches):
+        """The newest max_unsent_buyers of the batches"""
+        excess = sum(map(len, batches)) - COORDINATOR_CONFIG["max_unsent_buyers"]
+        if excess > 0:
+            logger.error(f"Dropping {excess} buyers the coordinator never took")
+        while excess > 0:
+            if len(batches[0]) <= excess:
+                excess -= len(batches.pop(0))
+            else:
+                batches[0] = batches[0][excess:]
+                excess = 0
+        return batches
+
+    def _upload(self, batches):
+        delay = COORDINATOR_CONFIG["upload_backoff_seconds"]
+        token = current_token()
+        for attempt in range(1, COORDINATOR_CONFIG["upload_attempts"] + 1):
+            try:
+                return self.post('/buyers', batches=batches)['saved']
+            except requests.RequestException as e:
+                if attempt == COORDINATOR_CONFIG["upload_attempts"] or not retryable(e):
+                    raise
+                logger.warning(f"Sending {sum(map(len, batches))} buyers to the coordinator failed, "
+                               f"retrying in {delay}s: {e}")
+                if token is not None:
+                    token.sleep(delay)
+                else:
+                    time.sleep(delay)
+                delay *= 2
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Persistent crawl frontier for the Battery Buyer Finder Agent
+Leases every (search term, city, source) job to one worker at a time
+"""
+
+import os
+import random
+import socket
+import sqlite3
+import logging
+import threading
+from config import SEARCH_TERMS, TARGET_CITIES, CRAIGSLIST_CITIES, FRONTIER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def build_job_matrix(sources=None):
+    """Expand FRONTIER_CONFIG["sources"] into (search_term, city, source) jobs.
+
+    Sources scoped to "term_city" run for every search term in every target
+    city, "craigslist_city" sources once per Craigslist city code, and
+    "global" sources once in total.
+    """
+    sources = sources or FRONTIER_CONFIG["sources"]
+    jobs = []
+    for source, scope in sources.items():
+        if scope == 'term_city':
+            jobs.extend((term, city, source) for term in SEARCH_TERMS for city in TARGET_CITIES)
+        elif scope == 'craigslist_city':
+            jobs.extend(('', city_code, source) for city_code in CRAIGSLIST_CITIES)
+        elif scope == 'global':
+            jobs.append(('', '', source))
+        else:
+            raise ValueError(f"Unknown scope {scope!r} for source {source}")
+    return jobs
+
+def default_worker_id():
+    """Identifier recorded against leased jobs"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class SQLiteLeaseStore:
+    """Crawl jobs and their leases in SQLite, chosen by expected yield.
+
+    Every finished visit records its new buyers, crawl seconds and network
+    requests against the (search term, city, source) job, so yield per
+    second and per request is known for each. A claim spends
+    FRONTIER_CONFIG["cycle_budget_seconds"] of expected crawl time on the
+    ready jobs by Thompson sampling: each job's buyers-per-second is drawn
+    from a Gamma posterior whose prior is its source's average, and jobs
+    are taken best draw first until the budget or `limit` is used up.
+    Proven jobs win most draws while thinly tried ones still get picked
+    now and then, and a job with no history starts out as good as its
+    source. A finished job is not offered again until its source's
+    revisit interval has passed.
+
+    A claim leases each job to one worker for FRONTIER_CONFIG["lease_seconds"];
+    claims run in one write transaction, so no two workers ever hold the
+    same job. The holder renews its leases while it works, and a lease
+    left to expire, e.g. by a crashed worker, makes the job claimable
+    again. Finishing or giving back a job only takes effect for its
+    current holder, so a worker that lost a lease cannot overwrite the
+    new holder's result. Every method names the worker it acts for,
+    which lets one store serve workers in many processes or, behind
+    crawl_coordinator, on many machines.
+    """
+
+    def __init__(self, db_path, rng=None):
+        self.db_path = db_path
+        self.rng = rng or random.Random()
+        self.init_database()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """Create the job table and seed it from the configured job matrix"""
+        conn = self.connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                search_term TEXT NOT NULL,
+                city TEXT NOT NULL,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                claimed_by TEXT,
+                claimed_at TIMESTAMP,
+                last_visited_at TIMESTAMP,
+                next_visit_at TIMESTAMP,
+                visits INTEGER NOT NULL DEFAULT 0,
+                total_yield INTEGER NOT NULL DEFAULT 0,
+                last_yield INTEGER NOT NULL DEFAULT 0,
+                UNIQUE(search_term, city, source)
+            )
+        ''')
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(crawl_jobs)')}
+        if 'total_seconds' not in columns:
+            cursor.execute('ALTER TABLE crawl_jobs ADD COLUMN total_seconds REAL NOT NULL DEFAULT 0')
+        if 'total_requests' not in columns:
+            cursor.execute('ALTER TABLE crawl_jobs ADD COLUMN total_requests INTEGER NOT NULL DEFAULT 0')
+        if 'timed_visits' not in columns:
+            cursor.execute('ALTER TABLE crawl_jobs ADD COLUMN timed_visits INTEGER NOT NULL DEFAULT 0')
+        if 'lease_expires_at' not in columns:
+            cursor.execute('ALTER TABLE crawl_jobs ADD COLUMN lease_expires_at TIMESTAMP')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_crawl_jobs_ready
+            ON crawl_jobs(status, next_visit_at)
+        ''')
+
+        cursor.executemany('''
+            INSERT OR IGNORE INTO crawl_jobs (search_term, city, source)
+            VALUES (?, ?, ?)
+        ''', build_job_matrix())
+
+        conn.commit()
+        conn.close()
+
+    def claim(self, worker_id, limit=None, sources=None, budget_seconds=None):
+        """Atomically lease ready jobs worth up to `budget_seconds` of crawling"""
+        limit = limit or FRONTIER_CONFIG["jobs_per_cycle"]
+        budget = budget_seconds or FRONTIER_CONFIG["cycle_budget_seconds"]
+
+        source_filter = ''
+        params = []
+        if sources:
+            source_filter = f"AND source IN ({', '.join('?' for _ in sources)})"
+            params.extend(sources)
+
+        conn = self.connect()
+        conn.isolation_level = None
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            ready = conn.execute(f'''
+                SELECT id, search_term, city, source, total_yield, total_seconds, timed_visits
+                FROM crawl_jobs
+                WHERE (status = 'pending' OR lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+                  AND (next_visit_at IS NULL OR next_visit_at <= CURRENT_TIMESTAMP)
+                  {source_filter}
+            ''', params).fetchall()
+            chosen = self.select(ready, self.source_priors(conn), limit, budget)
+            conn.executemany('''
+                UPDATE crawl_jobs
+                SET status = 'claimed', claimed_by = ?, claimed_at = CURRENT_TIMESTAMP,
+                    lease_expires_at = datetime('now', ?)
+                WHERE id = ?
+            ''', [(worker_id, f"+{FRONTIER_CONFIG['lease_seconds']} seconds", row[0]) for row in chosen])
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        return [
+            {'id': row[0], 'search_term': row[1], 'city': row[2], 'source': row[3]}
+            for row in chosen
+        ]
+
+    def renew(self, worker_id, job_ids):
+        """Extend the worker's leases on `job_ids`; returns the ids it still holds"""
+        if not job_ids:
+            return []
+        conn = self.connect()
+        rows = conn.execute(f'''
+            UPDATE crawl_jobs SET lease_expires_at = datetime('now', ?)
+            WHERE status = 'claimed' AND claimed_by = ? AND id IN ({', '.join('?' for _ in job_ids)})
+            RETURNING id
+        ''', [f"+{FRONTIER_CONFIG['lease_seconds']} seconds", worker_id] + list(job_ids)).fetchall()
+        conn.commit()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def source_priors(self, conn):
+        """{source: (buyers per second, seconds per visit)} over its timed visits"""
+        priors = {}
+        for source, buyers, seconds, visits in conn.execute('''
+            SELECT source, SUM(total_yield), SUM(total_seconds), SUM(timed_visits)
+            FROM crawl_jobs WHERE timed_visits > 0 GROUP BY source
+        '''):
+            priors[source] = ((buyers + 1.0) / (seconds + FRONTIER_CONFIG["prior_seconds"]), seconds / visits)
+        return priors
+
+    def select(self, ready, priors, limit, budget):
+        """Ready job rows to claim, best sampled yield first, within budget"""
+        prior_seconds = FRONTIER_CONFIG["prior_seconds"]
+        default_rate = 1.0 / prior_seconds
+        default_cost = FRONTIER_CONFIG["default_job_seconds"]
+
+        draws = []
+        for row in ready:
+            buyers, seconds, visits = row[4], row[5], row[6]
+            rate, cost = priors.get(row[3], (default_rate, default_cost))
+            # Gamma-Poisson posterior: the source's rate counts as
+            # prior_seconds of observation, then the job's own history
+            shape = rate * prior_seconds + buyers
+            scale = 1.0 / (prior_seconds + seconds)
+            if visits:
+                cost = seconds / visits
+            draws.append((self.rng.gammavariate(shape, scale), max(cost, 1.0), row))
+        draws.sort(key=lambda draw: draw[0], reverse=True)
+
+        chosen = []
+        spent = 0.0
+        for _, cost, row in draws:
+            if len(chosen) >= limit:
+                break
+            if chosen and spent + cost > budget:
+                continue
+            chosen.append(row)
+            spent += cost
+        return chosen
+
+    def complete(self, worker_id, job_id, new_buyers, seconds=None, requests=0):
+        """Record a finished visit and schedule the job's next one.
+
+        Returns False, changing nothing, if the worker no longer holds the job.
+        """
+        conn = self.connect()
+        source = conn.execute('SELECT source FROM crawl_jobs WHERE id = ?', (job_id,)).fetchone()
+        revisit = FRONTIER_CONFIG["revisit_after_hours"]
+        hours = revisit.get(source[0], revisit["default"]) if source else revisit["default"]
+
+        updated = conn.execute('''
+            UPDATE crawl_jobs
+            SET status = 'pending', claimed_by = NULL, claimed_at = NULL, lease_expires_at = NULL,
+                last_visited_at = CURRENT_TIMESTAMP,
+                next_visit_at = datetime('now', ?),
+                visits = visits + 1,
+                total_yield = total_yield + ?,
+                last_yield = ?,
+                total_seconds = total_seconds + ?,
+                total_requests = total_requests + ?,
+                timed_visits = timed_visits + ?
+            WHERE id = ? AND status = 'claimed' AND claimed_by = ?
+        ''', (f"+{hours} hours", new_buyers, new_buyers, seconds or 0.0, requests,
+              int(seconds is not None), job_id, worker_id)).rowcount
+        conn.commit()
+        conn.close()
+        return updated > 0
+
+    def release(self, worker_id, job_id, retry_minutes=None):
+        """Give a leased job back without counting a visit"""
+        retry_minutes = retry_minutes if retry_minutes is not None else FRONTIER_CONFIG["retry_after_minutes"]
+        conn = self.connect()
+        updated = conn.execute('''
+            UPDATE crawl_jobs
+            SET status = 'pending', claimed_by = NULL, claimed_at = NULL, lease_expires_at = NULL,
+                next_visit_at = datetime('now', ?)
+            WHERE id = ? AND status = 'claimed' AND claimed_by = ?
+        ''', (f"+{retry_minutes} minutes", job_id, worker_id)).rowcount
+        conn.commit()
+        conn.close()
+        return updated > 0
+
+    def stats(self):
+        """Summary of the frontier per source"""
+        conn = self.connect()
+        rows = conn.execute('''
+            SELECT source,
+                   COUNT(*),
+                   SUM(last_visited_at IS NOT NULL),
+                   SUM((status = 'pending' OR lease_expires_at < CURRENT_TIMESTAMP)
+                       AND (next_visit_at IS NULL OR next_visit_at <= CURRENT_TIMESTAMP)),
+                   SUM(status = 'claimed' AND lease_expires_at >= CURRENT_TIMESTAMP),
+                   SUM(total_yield),
+                   SUM(total_seconds),
+                   SUM(total_requests)
+            FROM crawl_jobs
+            GROUP BY source
+        ''').fetchall()
+        conn.close()
+        return {
+            source: {
+                'jobs': jobs, 'visited': visited, 'ready': ready, 'leased': leased,
+                'total_yield': total_yield,
+                'buyers_per_second': total_yield / seconds if seconds else None,
+                'buyers_per_request': total_yield / requests if requests else None
+            }
+            for source, jobs, visited, ready, leased, total_yield, seconds, requests in rows
+        }
+
+    def job_stats(self, source=None, limit=50):
+        """Yield per (search term, city, source), most productive per second first"""
+        conn = self.connect()
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(f'''
+            SELECT search_term, city, source, visits, total_yield, total_seconds, total_requests,
+                   total_yield / NULLIF(total_seconds, 0) AS buyers_per_second,
+                   CAST(total_yield AS REAL) / NULLIF(total_requests, 0) AS buyers_per_request
+            FROM crawl_jobs
+            WHERE timed_visits > 0 {'AND source = ?' if source else ''}
+            ORDER BY buyers_per_second DESC, buyers_per_request DESC
+            LIMIT ?
+        ''', ([source] if source else []) + [limit]).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+class CrawlFrontier:
+    """One worker's handle on the crawl jobs: the leases it holds.
+
+    Jobs come from a lease store, SQLiteLeaseStore on the database at
+    `db_path` by default, or any object with the same methods, such as
+    crawl_coordinator.RemoteLeaseStore for workers on other machines.
+    While the worker holds leases, a background thread renews them every
+    FRONTIER_CONFIG["heartbeat_seconds"]; a lease the store refuses to
+    renew has been taken over, and the callbacks registered for it with
+    watch() run so the work can be abandoned.
+    """
+
+    def __init__(self, db_path=None, worker_id=None, rng=None, store=None):
+        self.store = store or SQLiteLeaseStore(db_path, rng=rng)
+        self.worker_id = worker_id or default_worker_id()
+        self.held = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _ensure_thread(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopped.clear()
+                self.thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(FRONTIER_CONFIG["heartbeat_seconds"]):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                # Leases outlive a few missed beats; keep trying
+                logger.warning(f"Lease heartbeat failed: {e}")
+
+    def claim(self, limit=None, sources=None, budget_seconds=None):
+        """Lease ready jobs and return them as dicts"""
+        jobs = self.store.claim(self.worker_id, limit, sources, budget_seconds)
+        with self.lock:
+            for job in jobs:
+                self.held[job['id']] = []
+        if jobs:
+            self._ensure_thread()
+        return jobs
+
+    def _drop(self, job_id):
+        with self.lock:
+            self.held.pop(job_id, None)
+
+    def complete(self, job_id, new_buyers, seconds=None, requests=0):
+        """Record a finished visit; False if the lease had been lost"""
+        self._drop(job_id)
+        return self.store.complete(self.worker_id, job_id, new_buyers, seconds, requests)
+
+    def release(self, job_id, retry_minutes=None):
+        """Give a leased job back without counting a visit"""
+        self._drop(job_id)
+        return self.store.release(self.worker_id, job_id, retry_minutes)
+
+    def watch(self, job_id, callback):
+        """Call `callback()` if the lease on `job_id` is lost"""
+        with self.lock:
+            if job_id in self.held:
+                self.held[job_id].append(callback)
+
+    def heartbeat(self):
+        """Renew every held lease, running the callbacks of lost ones"""
+        with self.lock:
+            job_ids = list(self.held)
+        if not job_ids:
+            return []
+        renewed = set(self.store.renew(self.worker_id, job_ids))
+        lost = []
+        with self.lock:
+            for job_id in job_ids:
+                if job_id not in renewed and job_id in self.held:
+                    lost.append((job_id, self.held.pop(job_id)))
+        for job_id, callbacks in lost:
+            logger.warning(f"Lost the lease on crawl job {job_id}")
+            for callback in callbacks:
+                callback()
+        return [job_id for job_id, _ in lost]
+
+    def close(self):
+        """Stop renewing and hand back every job still held"""
+        self.stopped.set()
+        with self.lock:
+            job_ids = list(self.held)
+        for job_id in job_ids:
+            try:
+                self.release(job_id, retry_minutes=0)
+            except Exception as e:
+                logger.warning(f"Could not release crawl job {job_id}: {e}")
+
+    def stats(self):
+        return self.store.stats()
+
+    def job_stats(self, source=None, limit=50):
+        return self.store.job_stats(source, limit)
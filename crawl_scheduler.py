@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Crawl scheduler for the Battery Buyer Finder Agent
+Paces concurrent crawl cycles to the configured buyers-per-hour target
+"""
+
+import math
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from fetch_engine import FetchEngine
+from config import SCHEDULE_CONFIG, FETCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+def hour_key(timestamp):
+    """buyer_rollups hour bucket for a Unix timestamp"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:00:00')
+
+class CrawlScheduler:
+    """Runs crawl cycles until each window's target is met.
+
+    Time is cut into windows of SCHEDULE_CONFIG["search_interval"] hours,
+    each owing target_buyers_per_hour for every hour it spans, plus
+    whatever earlier windows (up to backfill_windows of them, counted
+    from when the scheduler started) fell short by. New buyers are
+    counted from buyer_rollups, so saves from any crawler process count.
+
+    While a window is behind, cycles run back to back, as many at once
+    as the remaining time calls for given the average cycle's duration
+    and yield, up to max_concurrent_searches; once it is met, crawling
+    pauses until the next window. Concurrent cycles never share a job,
+    a FetchEngine or a report: each claims its own jobs from the frontier
+    and runs them on one of max_concurrent engines of FETCH_CONFIG["max_workers"]
+    threads, and the agent's run_cycle() hands it back its own results.
+
+    Rollups are hourly, so windows must be a whole number of hours.
+    `clock` (time.time by default) tells the time.
+    """
+
+    def __init__(self, agent, interval_hours=None, target_per_hour=None, max_concurrent=None,
+                 backfill_windows=None, poll_seconds=None, clock=None):
+        self.agent = agent
+        self.interval = (interval_hours or SCHEDULE_CONFIG["search_interval"]) * 3600
+        if self.interval < 3600 or self.interval % 3600:
+            raise ValueError(f"search_interval must be a whole number of hours, not {self.interval / 3600}")
+        self.interval = int(self.interval)
+        self.clock = clock or time.time
+        target_per_hour = (target_per_hour if target_per_hour is not None
+                           else SCHEDULE_CONFIG["target_buyers_per_hour"])
+        self.target = math.ceil(target_per_hour * self.interval / 3600)
+        self.max_concurrent = max_concurrent or SCHEDULE_CONFIG["max_concurrent_searches"]
+        self.backfill_windows = (backfill_windows if backfill_windows is not None
+                                 else SCHEDULE_CONFIG["backfill_windows"])
+        self.poll_seconds = poll_seconds or SCHEDULE_CONFIG["poll_seconds"]
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='cycle')
+        self.engines = queue.Queue()
+        for _ in range(self.max_concurrent):
+            self.engines.put(FetchEngine(max_workers=FETCH_CONFIG["max_workers"]))
+        self.running = set()
+        self.lock = threading.Lock()
+        self.started = None
+        # Running averages over finished cycles, before any: one buyer a minute
+        self.cycle_seconds = 60.0
+        self.cycle_yield = 1.0
+
+    def window(self, now):
+        start = now - now % self.interval
+        return start, start + self.interval
+
+    def saved_between(self, start, end):
+        """New buyers committed in [start, end)"""
+        conn = sqlite3.connect(self.agent.db_path, timeout=30)
+        try:
+            return conn.execute(
+                'SELECT COALESCE(SUM(new_count), 0) FROM buyer_rollups WHERE hour >= ? AND hour < ?',
+                (hour_key(start), hour_key(end))
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def remaining(self, now):
+        """Buyers still owed in the current window, including backfill"""
+        start, end = self.window(now)
+        past_start = max(start - self.backfill_windows * self.interval, self.window(self.started)[0])
+        past_windows = int((start - past_start) // self.interval)
+        backlog = 0
+        if past_windows:
+            backlog = max(0, self.target * past_windows - self.saved_between(past_start, start))
+        return self.target + backlog - self.saved_between(start, end)
+
+    def wanted_cycles(self, remaining, time_left):
+        """How many cycles should be running to meet `remaining` in time"""
+        if remaining <= 0:
+            return 0
+        cycles = math.ceil(remaining / max(self.cycle_yield, 0.1))
+        busy_seconds = cycles * self.cycle_seconds
+        return max(1, min(self.max_concurrent, math.ceil(busy_seconds / max(time_left, 1))))
+
+    def ready_jobs(self):
+        return sum(stats['ready'] or 0 for stats in self.agent.frontier.stats().values())
+
+    def _cycle(self):
+        engine = self.engines.get()
+        start = time.monotonic()
+        try:
+            saved = self.agent.run_cycle(engine)['saved']
+        finally:
+            self.engines.put(engine)
+        elapsed = time.monotonic() - start
+        with self.lock:
+            self.cycle_seconds = 0.7 * self.cycle_seconds + 0.3 * elapsed
+            self.cycle_yield = 0.7 * self.cycle_yield + 0.3 * saved
+        return saved
+
+    def _finished(self, future):
+        with self.lock:
+            self.running.discard(future)
+        try:
+            future.result()
+        except Exception as e:
+            logger.error(f"Scheduled search failed: {e}")
+
+    def tick(self, now=None):
+        """Start cycles if the current window needs them; returns how many"""
+        now = now if now is not None else self.clock()
+        if self.started is None:
+            self.started = now
+        _, end = self.window(now)
+        remaining = self.remaining(now)
+        with self.lock:
+            running = sum(not future.done() for future in self.running)
+        wanted = self.wanted_cycles(remaining, end - now)
+        if wanted <= running or not self.ready_jobs():
+            return 0
+
+        logger.info(f"{remaining} buyers still wanted by {hour_key(end)}, "
+                    f"running {wanted} crawl cycles (was {running})")
+        for _ in range(wanted - running):
+            future = self.executor.submit(self._cycle)
+            with self.lock:
+                self.running.add(future)
+            future.add_done_callback(self._finished)
+        return wanted - running
+
+    def run_forever(self):
+        """Tick on every finished cycle, or every poll_seconds"""
+        while True:
+            self.tick()
+            with self.lock:
+                running = set(self.running)
+            if running:
+                wait(running, timeout=self.poll_seconds, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(self.poll_seconds)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+        while not self.engines.empty():
+            self.engines.get().shutdown(wait=wait)
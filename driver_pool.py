@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Warm Selenium WebDriver pool for the Battery Buyer Finder Agent
+Keeps a bounded set of headless Chrome instances alive between searches
+"""
+
+import atexit
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from cancellation import current_token
+from config import SELENIUM_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# How often a checkout waiting for a free driver checks its cancel token
+SLOT_POLL_SECONDS = 0.2
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def get_driver_path():
+    """Resolve the chromedriver binary once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+            logger.info(f"Using chromedriver at {_driver_path}")
+        return _driver_path
+
+class DriverPool:
+    """Size-bounded pool of warm headless Chrome drivers.
+
+    Drivers are created lazily up to `size`, health-checked when borrowed
+    and recycled after `max_pages` checkouts to cap memory growth. Pages
+    load with the eager strategy and images, fonts and stylesheets are
+    blocked, since only the DOM text is scraped.
+    """
+
+    def __init__(self, size=None, max_pages=None, user_agent_factory=None):
+        self.size = size or SELENIUM_CONFIG["pool_size"]
+        self.max_pages = max_pages or SELENIUM_CONFIG["max_pages_per_driver"]
+        self.user_agent_factory = user_agent_factory
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        atexit.register(self.close)
+
+    def _build_options(self):
+        options = Options()
+        options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--disable-extensions')
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.fonts': 2,
+            'profile.managed_default_content_settings.stylesheets': 2,
+        })
+        return options
+
+    def _create_driver(self):
+        """Launch a new Chrome instance configured for scraping"""
+        driver = webdriver.Chrome(service=Service(get_driver_path()), options=self._build_options())
+        driver.set_page_load_timeout(SELENIUM_CONFIG["page_load_timeout"])
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': SELENIUM_CONFIG["blocked_url_patterns"]})
+        except Exception as e:
+            logger.warning(f"Could not enable resource blocking: {e}")
+        with self.lock:
+            self.pages[id(driver)] = 0
+        logger.info("Started pooled Chrome driver")
+        return driver
+
+    def _discard(self, driver):
+        """Quit a driver and forget its page count"""
+        with self.lock:
+            self.pages.pop(id(driver), None)
+        self._quit(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting driver: {e}")
+
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """Borrow a healthy driver, starting one if none are idle.
+
+        Under a cancel token, waiting for a free slot ends in Cancelled as
+        soon as the token is cancelled.
+        """
+        if self.closed:
+            raise RuntimeError("Driver pool is closed")
+        token = current_token()
+        if token is None:
+            self.slots.acquire()
+        else:
+            while not self.slots.acquire(timeout=SLOT_POLL_SECONDS):
+                token.check()
+        try:
+            while True:
+                try:
+                    driver = self.idle.get_nowait()
+                except queue.Empty:
+                    driver = self._create_driver()
+                    break
+                if self._is_healthy(driver):
+                    break
+                logger.info("Replacing unhealthy pooled driver")
+                self._discard(driver)
+        except Exception:
+            self.slots.release()
+            raise
+
+        with self.lock:
+            self.pages[id(driver)] = self.pages.get(id(driver), 0) + 1
+
+        if self.user_agent_factory:
+            try:
+                driver.execute_cdp_cmd('Network.setUserAgentOverride', {'userAgent': self.user_agent_factory()})
+            except Exception as e:
+                logger.debug(f"Could not override user agent: {e}")
+        return driver
+
+    def release(self, driver, broken=False):
+        """Return a driver to the pool, recycling it when worn out or broken"""
+        try:
+            with self.lock:
+                pages = self.pages.get(id(driver), 0)
+            if broken or self.closed or pages >= self.max_pages:
+                self._discard(driver)
+            else:
+                self.idle.put(driver)
+        finally:
+            self.slots.release()
+
+    @contextmanager
+    def driver(self):
+        """Context manager that borrows a driver for the duration of a block.
+
+        Under a cancel token, cancellation quits the driver so a page load
+        or wait in progress fails at once; the dead driver is replaced.
+        """
+        token = current_token()
+        if token is not None:
+            token.check()
+        driver = self.acquire()
+        broken = False
+        abort = None
+        if token is not None:
+            abort = token.on_cancel(lambda: self._quit(driver))
+        try:
+            yield driver
+        except Exception:
+            broken = not self._is_healthy(driver)
+            raise
+        finally:
+            if token is not None:
+                token.remove_callback(abort)
+                broken = broken or token.cancelled
+            self.release(driver, broken=broken)
+
+    def close(self):
+        """Quit every idle driver and refuse further checkouts"""
+        self.closed = True
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
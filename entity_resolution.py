@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Entity resolution for the Battery Buyer Finder Agent
+Merges records of the same business found under different spellings
+"""
+
+import re
+import logging
+from urllib.parse import urlparse
+from contact_extractor import normalize_phone
+from config import ENTITY_RESOLUTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+NAME_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Legal suffixes and filler words that never distinguish two businesses
+NAME_STOPWORDS = {
+    'the', 'and', 'of', 'co', 'company', 'inc', 'incorporated', 'llc',
+    'ltd', 'limited', 'corp', 'corporation', 'group', 'enterprises'
+}
+
+def singular(token):
+    """Crude plural folding so "metals" and "metal" compare equal"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def name_tokens(name):
+    """Lowercased, singular name tokens without legal suffixes or filler words"""
+    return [singular(token) for token in NAME_TOKEN_PATTERN.findall((name or '').lower().replace('&', ' and '))
+            if token not in NAME_STOPWORDS]
+
+def normalize_name(name):
+    return ' '.join(name_tokens(name))
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def name_similarity(a, b):
+    """Similarity in [0, 1] blending trigram and token Jaccard scores"""
+    norm_a, norm_b = normalize_name(a), normalize_name(b)
+    if not norm_a or not norm_b:
+        return 0.0
+    if norm_a == norm_b:
+        return 1.0
+    # Compare with spaces removed too, so "A.B.C." lines up with "ABC"
+    trigram_score = 0.0
+    for text_a, text_b in ((norm_a, norm_b), (norm_a.replace(' ', ''), norm_b.replace(' ', ''))):
+        grams_a, grams_b = trigrams(text_a), trigrams(text_b)
+        trigram_score = max(trigram_score, len(grams_a & grams_b) / len(grams_a | grams_b))
+    tokens_a, tokens_b = set(norm_a.split()), set(norm_b.split())
+    token_score = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    return 0.6 * trigram_score + 0.4 * token_score
+
+def domain_of(value):
+    """Registrable-looking host of a URL or email address, without www."""
+    if not value:
+        return ''
+    if '@' in value and '://' not in value:
+        host = value.rsplit('@', 1)[1]
+    else:
+        host = urlparse(value if '://' in value else f"http://{value}").hostname or ''
+    host = host.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def canonical_keys(buyer):
+    """Blocking keys for a buyer dict.
+
+    Phone and domain keys identify a business on their own. Name keys
+    are one per distinctive token, so spelling variants still land in a
+    shared block. Domains of the page the record was scraped from, and
+    of free mail providers, say nothing about the business and are
+    skipped.
+    """
+    keys = set()
+
+    phone = normalize_phone(buyer.get('phone') or '')
+    if phone:
+        keys.add(f"phone:{phone}")
+
+    source_domain = domain_of(buyer.get('source_url'))
+    ignored = set(ENTITY_RESOLUTION_CONFIG["ignored_domains"]) | {source_domain}
+    for value in (buyer.get('website'), buyer.get('email')):
+        domain = domain_of(value)
+        if domain and domain not in ignored and not any(domain.endswith('.' + d) for d in ignored if d):
+            keys.add(f"domain:{domain}")
+
+    common = set(ENTITY_RESOLUTION_CONFIG["common_name_tokens"])
+    for token in name_tokens(buyer.get('company_name')):
+        if len(token) > 2 and token not in common:
+            keys.add(f"name:{token}")
+
+    return keys
+
+class EntityResolver:
+    """Resolves incoming buyers to existing canonical rows.
+
+    Candidates come from the buyer_keys blocking index, so each lookup
+    touches only the few rows sharing a phone, domain or distinctive name
+    token. Blocks larger than max_block_size are skipped as too generic.
+    A candidate matches when it shares a phone or domain and the names are
+    similar, or when the names are near-identical in the same city.
+    Every record, merged or not, is kept as an observation linked to its
+    canonical buyer.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or ENTITY_RESOLUTION_CONFIG
+
+    def init_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS buyer_keys (
+                key TEXT NOT NULL,
+                buyer_id INTEGER NOT NULL,
+                PRIMARY KEY (key, buyer_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_buyer_keys_buyer ON buyer_keys(buyer_id)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS buyer_observations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                buyer_id INTEGER NOT NULL,
+                company_name TEXT,
+                phone TEXT,
+                address TEXT,
+                email TEXT,
+                website TEXT,
+                business_type TEXT,
+                city TEXT,
+                confidence_score REAL,
+                source_url TEXT,
+                observed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_buyer_observations_buyer ON buyer_observations(buyer_id)')
+
+    def backfill(self, cursor):
+        """Index buyers stored before the blocking index existed"""
+        rows = cursor.execute('''
+            SELECT id, company_name, phone, email, website, source_url FROM buyers
+            WHERE id NOT IN (SELECT buyer_id FROM buyer_keys)
+        ''').fetchall()
+        for buyer_id, company_name, phone, email, website, source_url in rows:
+            self.index(cursor, buyer_id, {
+                'company_name': company_name, 'phone': phone, 'email': email,
+                'website': website, 'source_url': source_url
+            })
+        if rows:
+            logger.info(f"Indexed {len(rows)} existing buyers for entity resolution")
+
+    def index(self, cursor, buyer_id, buyer):
+        cursor.executemany(
+            'INSERT OR IGNORE INTO buyer_keys (key, buyer_id) VALUES (?, ?)',
+            [(key, buyer_id) for key in canonical_keys(buyer)]
+        )
+
+    def candidates(self, cursor, keys):
+        """Buyer ids sharing a key with the record, per key kind"""
+        max_block = self.config["max_block_size"]
+        found = {}
+        for key in keys:
+            ids = [row[0] for row in cursor.execute(
+                'SELECT buyer_id FROM buyer_keys WHERE key = ? LIMIT ?', (key, max_block + 1)
+            )]
+            if len(ids) > max_block:
+                continue
+            kind = key.split(':', 1)[0]
+            for buyer_id in ids:
+                found.setdefault(buyer_id, set()).add(kind)
+        return found
+
+    def resolve(self, cursor, buyer):
+        """Id of the canonical buyer this record belongs to, or None"""
+        keys = canonical_keys(buyer)
+        candidates = self.candidates(cursor, keys)
+        if not candidates:
+            return None
+
+        best_id, best_score = None, 0.0
+        for buyer_id, kinds in candidates.items():
+            row = cursor.execute(
+                'SELECT company_name, city FROM buyers WHERE id = ?', (buyer_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            similarity = name_similarity(buyer.get('company_name'), row[0])
+            # Without a city on both sides a name is no evidence of a match
+            city = (buyer.get('city') or '').lower()
+            same_city = bool(city) and city == (row[1] or '').lower()
+
+            if kinds & {'phone', 'domain'}:
+                matched = similarity >= self.config["contact_match_similarity"]
+            else:
+                matched = same_city and similarity >= self.config["name_match_similarity"]
+
+            if matched and similarity > best_score:
+                best_id, best_score = buyer_id, similarity
+
+        return best_id
+
+    def merge(self, cursor, buyer_id, buyer):
+        """Fold a record into its canonical buyer.
+
+        Filling in a missing phone or address changes the row's unique
+        key, so that is done separately, with OR IGNORE: on a collision
+        with another row the two stay empty, while confidence, the other
+        fields and the sighting counters always move.
+        """
+        cursor.execute('''
+            UPDATE buyers SET
+                confidence_score = MAX(COALESCE(confidence_score, 0), ?),
+                email = CASE WHEN COALESCE(email, '') = '' THEN ? ELSE email END,
+                website = CASE WHEN COALESCE(website, '') = '' THEN ? ELSE website END,
+                city = CASE WHEN COALESCE(city, '') = '' THEN ? ELSE city END,
+                last_seen_at = CURRENT_TIMESTAMP,
+                seen_count = seen_count + 1
+            WHERE id = ?
+        ''', (buyer['confidence_score'], buyer['email'], buyer['website'], buyer['city'], buyer_id))
+        if buyer['phone'] or buyer['address']:
+            cursor.execute('''
+                UPDATE OR IGNORE buyers SET
+                    phone = CASE WHEN COALESCE(phone, '') = '' THEN ? ELSE phone END,
+                    address = CASE WHEN COALESCE(address, '') = '' THEN ? ELSE address END
+                WHERE id = ? AND (COALESCE(phone, '') = '' OR COALESCE(address, '') = '')
+            ''', (buyer['phone'], buyer['address'], buyer_id))
+
+    def observe(self, cursor, buyer_id, buyer):
+        """Link the raw record to its canonical buyer"""
+        cursor.execute('''
+            INSERT INTO buyer_observations
+            (buyer_id, company_name, phone, address, email, website,
+             business_type, city, confidence_score, source_url)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            buyer_id, buyer['company_name'], buyer['phone'], buyer['address'], buyer['email'],
+            buyer['website'], buyer['business_type'], buyer['city'],
+            buyer['confidence_score'], buyer['source_url']
+        ))
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Concurrent fetch engine for the Battery Buyer Finder Agent
+Runs scraper sources in parallel on a bounded thread pool
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from cancellation import CancelToken, Cancelled, active
+from config import FETCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class FetchEngine:
+    """Bounded thread pool that runs scraper sources concurrently.
+
+    Each source is a callable returning a list of buyer dicts. Sources
+    are I/O bound (HTTP or Selenium), so threads overlap the network
+    waits while each source keeps issuing its own requests in order,
+    which keeps per-host politeness intact.
+    """
+
+    def __init__(self, max_workers=6):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='fetch'
+        )
+
+    def _run_source(self, name, func, args, token=None, timeout=None):
+        """Run a single source, logging and swallowing its errors.
+
+        Returns (buyers, cut) where cut is why the source was stopped
+        early, or None if it ran to completion.
+        """
+        if token is not None and token.cancelled:
+            return [], token.reason
+        token = (token or CancelToken()).child(timeout, deadline_reason='source deadline')
+        start = time.monotonic()
+        try:
+            with active(token):
+                buyers = func(*args) or []
+        except Cancelled:
+            buyers = []
+        except Exception as e:
+            logger.error(f"Source {name} failed: {e}")
+            buyers = []
+        finally:
+            token.close()
+        elapsed = time.monotonic() - start
+        cut = token.reason if token.cancelled else None
+        logger.info(f"Found {len(buyers)} buyers from {name} in {elapsed:.1f}s"
+                    + (f" (cut short: {cut})" if cut else ''))
+        return buyers, cut
+
+    def run(self, tasks):
+        """Run tasks concurrently and return {name: buyers}.
+
+        `tasks` is an ordered mapping of source name to a (callable, args)
+        tuple. The result preserves the order of `tasks` so merged output
+        is deterministic regardless of completion order.
+        """
+        return self.run_until(tasks)[0]
+
+    def run_until(self, tasks, token=None, timeouts=None):
+        """Run tasks until done or `token` is cancelled.
+
+        Returns ({name: buyers}, {name: reason}) for the tasks that
+        finished and those that were cut. Each task runs under a child of
+        `token` that also expires after its entry in `timeouts` (seconds
+        from when it starts); cancellation reaches running tasks
+        cooperatively, tasks still queued never start, and ones that have
+        not stopped within FETCH_CONFIG["cancel_grace_seconds"] are left to
+        wind down on their own.
+        """
+        token = token or CancelToken()
+        timeouts = timeouts or {}
+        futures = {
+            name: self.executor.submit(self._run_source, name, func, args, token, timeouts.get(name))
+            for name, (func, args) in tasks.items()
+        }
+
+        pending = set(futures.values())
+        while pending and not token.cancelled:
+            _, pending = wait(pending, timeout=token.remaining(), return_when=FIRST_COMPLETED)
+        if pending:
+            for future in pending:
+                future.cancel()
+            wait(pending, timeout=FETCH_CONFIG["cancel_grace_seconds"])
+
+        results, cut = {}, {}
+        for name, future in futures.items():
+            if future.cancelled():
+                cut[name] = f"{token.reason}, not started"
+            elif not future.done():
+                cut[name] = f"{token.reason}, still stopping"
+            else:
+                results[name], reason = future.result()
+                if reason:
+                    cut[name] = reason
+        return results, cut
+
+    def run_merged(self, tasks):
+        """Run tasks concurrently and return a single merged buyer list"""
+        merged = []
+        for buyers in self.run(tasks).values():
+            merged.extend(buyers)
+        return merged
+
+    def shutdown(self, wait=True):
+        """Stop accepting work and release the worker threads"""
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Offline geocoding for the Battery Buyer Finder Agent
+Gazetteer lookups, address parsing and the R*Tree behind /api/nearby
+"""
+
+import os
+import re
+import csv
+import math
+import sqlite3
+import logging
+import threading
+from functools import lru_cache
+from buyer_queries import parse_fields, filter_clause
+from config import GEO_CONFIG
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# First three ZIP digits -> state, as inclusive ranges
+ZIP3_STATES = [
+    (5, 5, 'NY'), (6, 9, 'PR'), (10, 27, 'MA'), (28, 29, 'RI'), (30, 38, 'NH'),
+    (39, 49, 'ME'), (50, 54, 'VT'), (55, 55, 'MA'), (56, 59, 'VT'), (60, 69, 'CT'),
+    (70, 89, 'NJ'), (100, 149, 'NY'), (150, 196, 'PA'), (197, 199, 'DE'),
+    (200, 205, 'DC'), (206, 219, 'MD'), (220, 246, 'VA'), (247, 268, 'WV'),
+    (270, 289, 'NC'), (290, 299, 'SC'), (300, 319, 'GA'), (320, 349, 'FL'),
+    (350, 369, 'AL'), (370, 385, 'TN'), (386, 397, 'MS'), (398, 399, 'GA'),
+    (400, 427, 'KY'), (430, 459, 'OH'), (460, 479, 'IN'), (480, 499, 'MI'),
+    (500, 528, 'IA'), (530, 549, 'WI'), (550, 567, 'MN'), (569, 569, 'DC'),
+    (570, 577, 'SD'), (580, 588, 'ND'), (590, 599, 'MT'), (600, 629, 'IL'),
+    (630, 658, 'MO'), (660, 679, 'KS'), (680, 693, 'NE'), (700, 715, 'LA'),
+    (716, 729, 'AR'), (730, 749, 'OK'), (750, 799, 'TX'), (800, 816, 'CO'),
+    (820, 831, 'WY'), (832, 838, 'ID'), (840, 847, 'UT'), (850, 865, 'AZ'),
+    (870, 884, 'NM'), (885, 885, 'TX'), (889, 898, 'NV'), (900, 961, 'CA'),
+    (967, 968, 'HI'), (970, 979, 'OR'), (980, 994, 'WA'), (995, 999, 'AK')
+]
+
+STATES = {state for _, _, state in ZIP3_STATES}
+
+ZIP_PATTERN = re.compile(r'\b(\d{5})(?:-\d{4})?\s*$')
+STATE_PATTERN = re.compile(r'(?:^|[\s,])([A-Za-z]{2})\.?\s*$')
+
+def zip_state(zip_code):
+    prefix = int(zip_code[:3])
+    for low, high, state in ZIP3_STATES:
+        if low <= prefix <= high:
+            return state
+    return ''
+
+def city_key(city):
+    return ' '.join(re.sub(r'[^a-z ]', ' ', (city or '').lower().replace('saint ', 'st ')).split())
+
+class Gazetteer:
+    """City and ZIP coordinates loaded from a CSV file.
+
+    Rows need city, state, latitude and longitude. A row with a zip is a
+    ZIP centroid, found by that ZIP code rather than by its city: five
+    digits for a single ZIP, three for a ZIP3 area as a whole (at its
+    sectional center city). Where a city name exists in several states,
+    the first row listed wins lookups that don't name a state.
+    """
+
+    def __init__(self, path=None):
+        path = path or GEO_CONFIG["gazetteer_path"]
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        self.cities = {}
+        self.zips = {}
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                place = {
+                    'city': row['city'], 'state': row['state'].upper(),
+                    'latitude': float(row['latitude']), 'longitude': float(row['longitude'])
+                }
+                if row.get('zip'):
+                    self.zips.setdefault(row['zip'][:5], place)
+                    continue
+                key = city_key(row['city'])
+                self.cities.setdefault((key, place['state']), place)
+                self.cities.setdefault((key, None), place)
+
+    def city(self, name, state=None):
+        key = city_key(name)
+        return self.cities.get((key, state.upper() if state else None)) or (
+            None if state else self.cities.get((key, None))
+        )
+
+    def zip(self, zip_code):
+        return self.zips.get(zip_code)
+
+    def zip_area(self, zip_code):
+        """The ZIP3 area's center, for ZIP codes not listed themselves"""
+        return self.zips.get(zip_code[:3])
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def gazetteer():
+    """The shared gazetteer, loaded on first use"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer()
+        return _gazetteer
+
+@lru_cache(maxsize=GEO_CONFIG["address_cache_size"])
+def parse_address(address):
+    """(city, state, zip) from a US street address, '' where unknown.
+
+    Handles the usual "123 Main St, Houston, TX 77002" and
+    "Houston TX 77002" layouts. Listings repeat the same addresses across
+    crawls, so results are memoized.
+    """
+    rest = (address or '').strip().rstrip('.')
+    zip_code = ''
+    match = ZIP_PATTERN.search(rest)
+    if match:
+        zip_code = match.group(1)
+        rest = rest[:match.start()].rstrip(' ,')
+
+    state = ''
+    match = STATE_PATTERN.search(rest)
+    if match and match.group(1).upper() in STATES:
+        state = match.group(1).upper()
+        rest = rest[:match.start()].rstrip(' ,')
+    elif zip_code:
+        state = zip_state(zip_code)
+
+    # The city is the segment before the state; street lines have digits
+    city = ''
+    if state:
+        candidate = rest.rsplit(',', 1)[-1].strip()
+        if candidate and not any(ch.isdigit() for ch in candidate):
+            city = candidate
+    return city, state, zip_code
+
+def geocode(buyer):
+    """{'state', 'latitude', 'longitude'} for a buyer, or None.
+
+    The ZIP code is most precise when the gazetteer has it, then the city
+    named in the address, then the ZIP code's ZIP3 area, then the city the
+    buyer was searched in. A state alone (from the address or ZIP range)
+    is still returned.
+    """
+    city, state, zip_code = parse_address(buyer.get('address') or '')
+    places = gazetteer()
+    place = (
+        (zip_code and places.zip(zip_code))
+        or (city and places.city(city, state))
+        or (zip_code and places.zip_area(zip_code))
+        or (buyer.get('city') and places.city(buyer['city'], state or None))
+    )
+    if place:
+        return {'state': state or place['state'], 'latitude': place['latitude'], 'longitude': place['longitude']}
+    if state:
+        return {'state': state, 'latitude': None, 'longitude': None}
+    return None
+
+def init_schema(cursor):
+    """Coordinate columns, the R*Tree over them and its sync triggers"""
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(buyers)')}
+    for column in ('latitude', 'longitude'):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE buyers ADD COLUMN {column} REAL')
+
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'buyers_geo'"
+    ).fetchone()
+    cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS buyers_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS buyers_geo_insert AFTER INSERT ON buyers
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+            INSERT OR REPLACE INTO buyers_geo VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS buyers_geo_update AFTER UPDATE OF latitude, longitude ON buyers BEGIN
+            DELETE FROM buyers_geo WHERE id = old.id;
+            INSERT INTO buyers_geo
+            SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS buyers_geo_delete AFTER DELETE ON buyers BEGIN
+            DELETE FROM buyers_geo WHERE id = old.id;
+        END
+    ''')
+    if not exists:
+        backfill(cursor)
+
+def backfill(cursor):
+    """Geocode buyers stored before coordinates were tracked.
+
+    Located buyers are stamped with a new data_version, bumped in the same
+    transaction, so cached nearby results and change feeds see them.
+    """
+    rows = cursor.execute(
+        "SELECT id, address, city FROM buyers WHERE latitude IS NULL OR COALESCE(state, '') = ''"
+    ).fetchall()
+    located = [buyer_id for buyer_id, address, city in rows
+               if apply_geocode(cursor, buyer_id, {'address': address, 'city': city})]
+    if located:
+        version = cursor.execute(
+            'UPDATE data_version SET version = version + 1 WHERE id = 1 RETURNING version'
+        ).fetchone()[0]
+        cursor.executemany('UPDATE buyers SET version = ? WHERE id = ?',
+                           [(version, buyer_id) for buyer_id in located])
+        logger.info(f"Geocoded {len(located)} existing buyers")
+
+def apply_geocode(cursor, buyer_id, buyer):
+    """Fill a stored buyer's missing state and coordinates"""
+    geo = geocode(buyer)
+    if geo is None:
+        return False
+    cursor.execute('''
+        UPDATE buyers SET
+            state = CASE WHEN COALESCE(state, '') = '' THEN ? ELSE state END,
+            latitude = COALESCE(latitude, ?),
+            longitude = COALESCE(longitude, ?)
+        WHERE id = ? AND (latitude IS NULL OR COALESCE(state, '') = '')
+    ''', (geo['state'], geo['latitude'], geo['longitude'], buyer_id))
+    return cursor.rowcount > 0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def use_haversine(conn):
+    """Make haversine_km() callable from SQL on `conn`, once"""
+    try:
+        conn.execute('SELECT haversine_km(0, 0, 0, 0)')
+    except sqlite3.OperationalError:
+        conn.create_function('haversine_km', 4, haversine_km, deterministic=True)
+
+def nearby_buyers(conn, latitude, longitude, radius_km=None, limit=None, fields=None, **filters):
+    """Buyers within radius_km of a point, nearest first.
+
+    Distances are ranked in bands of GEO_CONFIG["distance_band_km"]:
+    within a band the most confident buyers come first, then the nearest.
+    SQLite does the ranking over the R*Tree's candidates, searching rings
+    that widen from a few bands out to radius_km until a full page is
+    known to be final, so a dense area never reads the whole table.
+    """
+    radius_km = min(float(radius_km or GEO_CONFIG["default_radius_km"]), GEO_CONFIG["max_radius_km"])
+    limit = min(int(limit or GEO_CONFIG["page_size"]), GEO_CONFIG["max_page_size"])
+    if radius_km <= 0 or limit < 1:
+        raise ValueError("radius_km and limit must be positive")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+
+    use_haversine(conn)
+    columns = parse_fields(fields)
+    conditions, params = filter_clause(**filters)
+    band = GEO_CONFIG["distance_band_km"]
+    sql = f'''
+        SELECT {', '.join(columns)}, latitude, longitude, distance_km, CAST(distance_km / ? AS INTEGER) AS band
+        FROM (
+            SELECT *, haversine_km(?, ?, latitude, longitude) AS distance_km FROM buyers
+            WHERE id IN (
+                SELECT id FROM buyers_geo
+                WHERE min_lat <= ? AND max_lat >= ? AND min_lon <= ? AND max_lon >= ?
+            )
+            {''.join(' AND ' + condition for condition in conditions)}
+        )
+        WHERE distance_km <= ?
+        ORDER BY band, COALESCE(confidence_score, 0) DESC, distance_km, id
+        LIMIT ?
+    '''
+
+    ring = min(radius_km, band * 4)
+    while True:
+        lat_delta = math.degrees(ring / EARTH_RADIUS_KM)
+        cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+        lon_delta = min(math.degrees(ring / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+        box = [latitude + lat_delta, latitude - lat_delta, longitude + lon_delta, longitude - lon_delta]
+        rows = conn.execute(sql, [band, latitude, longitude] + box + params + [ring, limit]).fetchall()
+        # Bands wholly inside the ring are complete; the page is final once
+        # it ends in one of them, or the ring has reached radius_km
+        if ring >= radius_km or (len(rows) == limit and (rows[-1][-1] + 1) * band <= ring):
+            break
+        ring = min(radius_km, ring * 4)
+
+    buyers = []
+    for row in rows:
+        buyer = dict(zip(columns, row))
+        buyer['latitude'], buyer['longitude'] = row[-4], row[-3]
+        buyer['distance_km'] = round(row[-2], 3)
+        buyers.append(buyer)
+    return {'buyers': buyers, 'radius_km': radius_km}
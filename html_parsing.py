@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+HTML parsing stage for the Battery Buyer Finder Agent
+lxml-backed parsers limited to the subtrees each scraper needs
+"""
+
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from cancellation import Cancelled, bounded_timeout
+from config import PARSE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Only these subtrees are built; the rest of each page is skipped by the parser
+YELLOWPAGES_STRAINER = SoupStrainer('div', class_=['result', 'organic'])
+CRAIGSLIST_STRAINER = SoupStrainer('li', class_='result-row')
+SCRAP_YARD_STRAINER = SoupStrainer('div', class_=['scrap-yard', 'listing'])
+
+DIRECTORY_LISTING_SELECTORS = [
+    '.listing', '.result', '.business-listing',
+    '.search-result', '.directory-listing'
+]
+DIRECTORY_NAME_SELECTORS = ['h3', 'h2', '.business-name', '.name', '.title']
+
+def page_text(content):
+    """Visible text of a page, without script and style contents"""
+    if not content:
+        return ''
+    doc = lxml.html.fromstring(content)
+    for elem in doc.xpath('//script|//style|//noscript'):
+        elem.drop_tree()
+    return doc.text_content()
+
+def parse_yellowpages(content, limit=3):
+    """Business listings from a Yellow Pages search page"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=YELLOWPAGES_STRAINER)
+    listings = []
+
+    for listing in soup.find_all('div', class_=['result', 'organic']):
+        if len(listings) >= limit:
+            break
+        name_elem = listing.find('a', class_=['business-name', 'n'])
+        if not name_elem:
+            continue
+
+        phone_elem = listing.find('div', class_=['phones', 'phone'])
+        address_elem = listing.find('div', class_=['adr', 'street-address'])
+        website_elem = listing.find('a', class_=['track-visit-website'])
+
+        listings.append({
+            'company_name': name_elem.get_text(strip=True),
+            'phone': phone_elem.get_text(strip=True) if phone_elem else '',
+            'address': address_elem.get_text(strip=True) if address_elem else '',
+            'website': website_elem.get('href', '') if website_elem else ''
+        })
+
+    return listings
+
+def parse_craigslist_results(content, limit=2):
+    """(title, href) pairs from a Craigslist search page"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=CRAIGSLIST_STRAINER)
+    results = []
+
+    for row in soup.find_all('li', class_='result-row')[:limit]:
+        title_elem = row.find('a', class_='result-title')
+        if title_elem:
+            results.append((title_elem.get_text(strip=True), title_elem.get('href', '')))
+
+    return results
+
+def parse_scrap_yard_listings(content, limit=3):
+    """(name, text) pairs from a scrap yard directory page"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=SCRAP_YARD_STRAINER)
+    results = []
+
+    for listing in soup.find_all('div', class_=['scrap-yard', 'listing'])[:limit]:
+        name_elem = listing.find(['h3', 'h2', 'h4'])
+        if name_elem:
+            results.append((name_elem.get_text(strip=True), listing.get_text()))
+
+    return results
+
+def parse_directory_listings(content, limit=2):
+    """(name, text) pairs from a generic business directory page"""
+    soup = BeautifulSoup(content, 'lxml')
+
+    listings = []
+    for selector in DIRECTORY_LISTING_SELECTORS:
+        found = soup.select(selector)[:limit]
+        if found:
+            listings = found
+            break
+
+    results = []
+    for listing in listings:
+        for selector in DIRECTORY_NAME_SELECTORS:
+            name_elem = listing.select_one(selector)
+            if name_elem:
+                results.append((name_elem.get_text(strip=True), listing.get_text()))
+                break
+
+    return results
+
+class ParsePool:
+    """Runs parser functions off the fetch threads.
+
+    Large pages go to a process pool so CPU-bound parsing neither holds
+    the GIL nor stalls fetchers; small pages are parsed inline where the
+    pickling round trip would cost more than it saves. Parsers must be
+    module-level functions taking and returning plain data.
+    """
+
+    def __init__(self, processes=None, inline_below_bytes=None):
+        self.processes = processes if processes is not None else PARSE_CONFIG["processes"]
+        self.inline_below_bytes = (inline_below_bytes if inline_below_bytes is not None
+                                   else PARSE_CONFIG["inline_below_bytes"])
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def _get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                # spawn avoids forking a process whose other threads may hold locks
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self.executor
+
+    def parse(self, parser, content, *args):
+        """Run parser(content, *args), in a worker process for large pages"""
+        if not self.processes or len(content or b'') < self.inline_below_bytes:
+            return parser(content, *args)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(parser, content, *args)
+            try:
+                return future.result(timeout=bounded_timeout(None))
+            except FutureTimeout:
+                # Out of time for this job; the worker finishes on its own
+                future.cancel()
+                raise Cancelled("deadline")
+        except BrokenProcessPool as e:
+            logger.warning(f"Process pool broke, parsing inline: {e}")
+            self._discard(executor)
+            return parser(content, *args)
+
+    def _discard(self, executor):
+        """Drop a broken executor, unless another thread already replaced it"""
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False)
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache for the Battery Buyer Finder Agent
+Stores pages on disk and revalidates them with conditional requests
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.models import PreparedRequest
+from rate_limiter import RateLimitedSession
+from config import HTTP_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """On-disk response cache keyed by URL and query parameters.
+
+    Each entry keeps the body with its ETag/Last-Modified validators. The
+    cache is bounded by total body size and evicts least recently used
+    entries first. Per-host TTLs decide how long an entry is served
+    without contacting the origin at all.
+    """
+
+    def __init__(self, path=None, max_bytes=None, ttls=None, default_ttl=None):
+        self.path = path or HTTP_CACHE_CONFIG["path"]
+        self.max_bytes = max_bytes or HTTP_CACHE_CONFIG["max_bytes"]
+        self.ttls = ttls if ttls is not None else HTTP_CACHE_CONFIG["ttls"]
+        self.default_ttl = default_ttl if default_ttl is not None else HTTP_CACHE_CONFIG["default_ttl"]
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.init_database()
+
+    def init_database(self):
+        """Create the cache table"""
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    status_code INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER,
+                    stored_at REAL,
+                    accessed_at REAL
+                )
+            ''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+            self.conn.commit()
+
+    @staticmethod
+    def make_key(url, params=None):
+        """Cache key for a URL plus its query parameters"""
+        prepared = PreparedRequest()
+        prepared.prepare_url(url, params)
+        return hashlib.sha256(prepared.url.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, url):
+        """TTL in seconds for the URL's host, or None if it is not cacheable"""
+        host = (urlparse(url).hostname or '').lower()
+        for domain, ttl in self.ttls.items():
+            if host == domain or host.endswith('.' + domain):
+                return ttl
+        return self.default_ttl
+
+    def get(self, key):
+        """Return the cached entry for key as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT url, status_code, headers, body, etag, last_modified, stored_at '
+                'FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        url, status_code, headers, body, etag, last_modified, stored_at = row
+        return {
+            'url': url,
+            'status_code': status_code,
+            'headers': json.loads(headers or '{}'),
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': stored_at
+        }
+
+    def put(self, key, response):
+        """Store a 200 response and evict old entries if over budget"""
+        body = response.content
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')}
+        now = time.time()
+        with self.lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO responses
+                (key, url, status_code, headers, body, etag, last_modified, size, stored_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                key, response.url, response.status_code, json.dumps(headers), body,
+                response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                len(body), now, now
+            ))
+            self.conn.commit()
+            self._evict()
+
+    def touch(self, key):
+        """Mark an entry as freshly validated after a 304"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute('UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size or 0
+            evicted += 1
+        self.conn.commit()
+        logger.info(f"Evicted {evicted} cached responses")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def build_response(entry, request=None):
+    """Rebuild a requests.Response from a cache entry"""
+    response = requests.Response()
+    response.status_code = entry['status_code']
+    response.headers.update(entry['headers'])
+    response._content = entry['body']
+    response.url = entry['url']
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = request
+    return response
+
+class CachedSession(RateLimitedSession):
+    """Rate limited session that serves GETs from a ResponseCache.
+
+    Fresh entries are returned without touching the network. Stale ones
+    are revalidated with If-None-Match/If-Modified-Since; on a 304 the
+    stored body is returned. Responses served from disk carry
+    `from_cache = True` so callers can skip re-parsing unchanged pages.
+    """
+
+    def __init__(self, limiter, cache=None):
+        super().__init__(limiter)
+        self.cache = cache
+
+    def request(self, method, url, *args, **kwargs):
+        ttl = self.cache.ttl_for(url) if self.cache is not None else None
+        if method.upper() != 'GET' or ttl is None:
+            response = super().request(method, url, *args, **kwargs)
+            response.from_cache = False
+            return response
+
+        key = self.cache.make_key(url, kwargs.get('params'))
+        entry = self.cache.get(key)
+
+        if entry is not None and time.time() - entry['stored_at'] < ttl:
+            logger.debug(f"Cache hit for {url}")
+            response = build_response(entry)
+            response.from_cache = True
+            return response
+
+        if entry is not None:
+            headers = dict(kwargs.get('headers') or {})
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            kwargs['headers'] = headers
+
+        response = super().request(method, url, *args, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"Revalidated {url}")
+            self.cache.touch(key)
+            cached = build_response(entry, response.request)
+            cached.from_cache = True
+            return cached
+
+        if response.status_code == 200:
+            self.cache.put(key, response)
+        response.from_cache = False
+        return response
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Multi-keyword relevance matching for the Battery Buyer Finder Agent
+Aho-Corasick automaton built once from config.BATTERY_KEYWORDS
+"""
+
+from collections import deque
+from config import BATTERY_KEYWORDS, KEYWORD_WEIGHTS
+
+class KeywordMatcher:
+    """Aho-Corasick matcher that finds every keyword in one pass.
+
+    Matching is case-insensitive and anchored at word starts. Keywords of
+    five or more characters also match as prefixes ("buyer" matches
+    "buyers", "recycle" matches "recycled"); shorter ones such as "car"
+    or "lead" must match whole words so they don't fire inside "card" or
+    "leader".
+    """
+
+    def __init__(self, keywords=None, weights=None, prefix_min_length=5):
+        self.keywords = [k.lower() for k in (keywords or BATTERY_KEYWORDS)]
+        weights = {k.lower(): w for k, w in (weights if weights is not None else KEYWORD_WEIGHTS).items()}
+        self.weights = {k: weights.get(k, 1.0) for k in self.keywords}
+        self.prefix_min_length = prefix_min_length
+
+        # goto[state] maps a character to the next state; output[state]
+        # lists the keyword indices ending at that state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(index)
+
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(ch, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    @staticmethod
+    def _is_word_char(ch):
+        return ch.isalnum()
+
+    def scan(self, text):
+        """All keyword hits in text as (start, end, keyword) tuples"""
+        hits = []
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+
+        for i, ch in enumerate(text):
+            lowered = ch.lower()
+            if len(lowered) == 1:
+                ch = lowered
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not output[state]:
+                continue
+
+            for index in output[state]:
+                keyword = self.keywords[index]
+                start = i - len(keyword) + 1
+                if start > 0 and self._is_word_char(text[start - 1]):
+                    continue
+                end = i + 1
+                if (len(keyword) < self.prefix_min_length and end < len(text)
+                        and self._is_word_char(text[end])):
+                    continue
+                hits.append((start, end, keyword))
+
+        return hits
+
+    def positions(self, text):
+        """Start offsets of every hit, grouped by keyword"""
+        positions = {}
+        for start, _, keyword in self.scan(text):
+            positions.setdefault(keyword, []).append(start)
+        return positions
+
+    def counts(self, text):
+        """Number of hits per keyword"""
+        return {keyword: len(starts) for keyword, starts in self.positions(text).items()}
+
+    def score(self, text):
+        """Sum of the weights of the distinct keywords present in text"""
+        return sum(self.weights[keyword] for keyword in {hit[2] for hit in self.scan(text)})
+
+    def is_relevant(self, text, threshold=1.0):
+        """Whether text scores at least `threshold`"""
+        return self.score(text) >= threshold
+
+# Shared matcher built once from the configured keywords
+BATTERY_MATCHER = KeywordMatcher()
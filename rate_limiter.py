@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Per-host rate limiting for the Battery Buyer Finder Agent
+Token buckets with jitter, honoring robots.txt crawl-delay
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+import requests
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+from cancellation import current_token, bounded_timeout
+from config import RATE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+# How often an asyncio wait under a cancel token checks it
+ASYNC_CANCEL_POLL_SECONDS = 0.1
+
+class RobotsDisallowed(requests.RequestException):
+    """Raised instead of fetching a URL that robots.txt disallows"""
+
+class HostBucket:
+    """Token bucket for a single host.
+
+    Tokens refill at one per jittered interval up to `burst`. Reservations
+    are made under a short lock and the caller sleeps outside it, so a slow
+    host never holds up callers waiting on other hosts.
+    """
+
+    def __init__(self, interval_range, burst=1, crawl_delay=None):
+        self.interval_range = interval_range
+        self.burst = burst
+        self.crawl_delay = crawl_delay
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _next_interval(self):
+        low, high = self.interval_range
+        interval = random.uniform(low, high)
+        if self.crawl_delay:
+            interval = max(interval, self.crawl_delay)
+        return interval
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait for it"""
+        with self.lock:
+            now = time.monotonic()
+            interval = self._next_interval()
+            if interval <= 0:
+                return 0.0
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / interval)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            # Debt is paid off by waiting; the next caller queues behind us
+            return -self.tokens * interval
+
+class RateLimiter:
+    """Shared, thread-safe per-host rate limiter.
+
+    Delays come from RATE_LIMITS["between_requests"], raised to the host's
+    robots.txt crawl-delay when one is published. Robots files are fetched
+    once per host and cached. Every wait() is one request on the network,
+    so requests_made() counts them per calling thread.
+    """
+
+    def __init__(self, interval_range=None, burst=None, user_agent='*', respect_robots=True):
+        self.interval_range = interval_range or RATE_LIMITS["between_requests"]
+        self.burst = burst or RATE_LIMITS.get("host_burst", 1)
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.buckets = {}
+        self.robots = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def get_robots(self, url):
+        """Return the cached robots.txt parser for the URL's host"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+
+        with self.lock:
+            if origin in self.robots:
+                return self.robots[origin]
+
+        parser = RobotFileParser()
+        try:
+            response = requests.get(f"{origin}/robots.txt", timeout=5)
+            if response.status_code == 200:
+                parser.parse(response.text.splitlines())
+            else:
+                parser = None
+        except Exception as e:
+            logger.debug(f"Could not fetch robots.txt for {origin}: {e}")
+            parser = None
+
+        with self.lock:
+            return self.robots.setdefault(origin, parser)
+
+    def crawl_delay(self, url):
+        """Crawl-delay published in robots.txt for the URL's host, if any"""
+        if not self.respect_robots:
+            return None
+        parser = self.get_robots(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.user_agent)
+        return float(delay) if delay else None
+
+    def allowed(self, url):
+        """Whether robots.txt permits fetching the URL"""
+        if not self.respect_robots:
+            return True
+        parser = self.get_robots(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def get_bucket(self, url):
+        """Return the token bucket for the URL's host, creating it on first use"""
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            bucket = self.buckets.get(host)
+        if bucket is not None:
+            return bucket
+
+        bucket = HostBucket(self.interval_range, self.burst, self.crawl_delay(url))
+        with self.lock:
+            return self.buckets.setdefault(host, bucket)
+
+    def reserve(self, url):
+        """Reserve a request slot for the URL and return the delay in seconds"""
+        return self.get_bucket(url).reserve()
+
+    def requests_made(self):
+        """Requests the calling thread has waited for so far"""
+        return getattr(self.local, 'requests', 0)
+
+    def _count(self):
+        self.local.requests = self.requests_made() + 1
+
+    def _admit(self, url):
+        """Refuse a URL robots.txt disallows, else reserve its slot and return the delay"""
+        if not self.allowed(url):
+            logger.info(f"Skipping {url}: disallowed by robots.txt")
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+        return self.reserve(url)
+
+    def wait(self, url):
+        """Block the calling thread until a request to the URL may be sent.
+
+        Raises RobotsDisallowed for a URL the host's robots.txt disallows,
+        and Cancelled when the current cancel token is.
+        """
+        token = current_token()
+        if token is not None:
+            token.check()
+        delay = self._admit(url)
+        self._count()
+        if delay > 0:
+            if token is not None:
+                token.sleep(delay)
+            else:
+                time.sleep(delay)
+        return delay
+
+    async def wait_async(self, url):
+        """Asyncio variant of wait() that yields to the event loop"""
+        token = current_token()
+        if token is not None:
+            token.check()
+        # Robots files may have to be fetched, and buckets take a lock
+        delay = await asyncio.to_thread(self._admit, url)
+        self._count()
+        if delay > 0:
+            if token is None:
+                await asyncio.sleep(delay)
+            else:
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + delay
+                while True:
+                    token.check()
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    await asyncio.sleep(min(remaining, ASYNC_CANCEL_POLL_SECONDS))
+        return delay
+
+class RateLimitedSession(requests.Session):
+    """requests.Session that routes every request through a RateLimiter.
+
+    URLs the host's robots.txt disallows are never fetched: the request
+    raises RobotsDisallowed instead. Under a cancel token the wait is
+    abandoned on cancellation and the request timeout is cut to the
+    token's remaining time.
+    """
+
+    def __init__(self, limiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def request(self, method, url, *args, **kwargs):
+        self.limiter.wait(url)
+        if current_token() is not None and not isinstance(kwargs.get('timeout'), tuple):
+            kwargs['timeout'] = bounded_timeout(kwargs.get('timeout'))
+        return super().request(method, url, *args, **kwargs)
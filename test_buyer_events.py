@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test script for the Server-Sent Events fan-out
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import tempfile
+import threading
+from buyer_store import init_schema, BuyerWriter
+from buyer_events import BuyerEvents
+
+def parse_event(message):
+    """(event, data, id) from one SSE message"""
+    fields = dict(line.split(': ', 1) for line in message.strip().splitlines())
+    return fields['event'], json.loads(fields['data']), fields.get('id')
+
+class Dashboard:
+    """One SSE client, reading its stream on its own thread like a server would"""
+
+    def __init__(self, events, last_event_id=None):
+        self.messages = queue.Queue()
+        self.stopped = threading.Event()
+        self.stream = events.subscribe(last_event_id)
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        for message in self.stream:
+            if self.stopped.is_set():
+                break
+            if not message.startswith(':'):
+                self.messages.put(parse_event(message))
+        self.stream.close()
+
+    def read(self, count, timeout=5):
+        """The next `count` events, keepalives skipped"""
+        return [self.messages.get(timeout=timeout) for _ in range(count)]
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join(5)
+
+def test_buyer_events():
+    """Every dashboard gets each save once, and a resumed one catches up"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        events = BuyerEvents(db_path, poll_interval=0.05, keepalive=0.2)
+        writer = BuyerWriter(db_path, group_commit_ms=0)
+        writer.add_listener(events.wake)
+
+        dashboards = [Dashboard(events) for _ in range(3)]
+        for dashboard in dashboards:
+            assert dashboard.read(1)[0][:2] == ('stats', {'total_buyers': 0, 'last_24_hours': 0, 'last_hour': 0})
+
+        writer.write([{'company_name': 'Acme Recycling', 'phone': '1'},
+                      {'company_name': 'Lead Scrap', 'phone': '2'}])
+        writer.write([{'company_name': 'Acme Recycling', 'phone': '1'}])
+        for dashboard in dashboards:
+            # The two writes may arrive as one batch or two; stats close each
+            received = []
+            while sum(event == 'buyer' for event, _, _ in received) < 3:
+                received += dashboard.read(1)
+            received += dashboard.read(1)
+            buyers = [(data['company_name'], data['new']) for event, data, _ in received if event == 'buyer']
+            assert buyers == [('Acme Recycling', True), ('Lead Scrap', True), ('Acme Recycling', False)]
+            assert received[-1][0] == 'stats' and received[-1][1]['total_buyers'] == 2
+        assert len(events.subscribers) == 3
+
+        # A client reconnecting with Last-Event-ID gets only what it missed
+        first_id = int(received[0][2])
+        resumed = Dashboard(events, last_event_id=first_id)
+        replay = resumed.read(3)
+        assert [data['company_name'] for event, data, _ in replay if event == 'buyer'] == [
+            'Lead Scrap', 'Acme Recycling']
+
+        for dashboard in dashboards + [resumed]:
+            dashboard.close()
+        assert not events.subscribers
+    print("✓ Buyer event tests passed")
+
+if __name__ == "__main__":
+    test_buyer_events()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming buyer exports
+"""
+
+import io
+import os
+import csv
+import gzip
+import json
+import sqlite3
+import tempfile
+from buyer_store import init_schema, BuyerWriter
+from buyer_export import export_stream, export_to_file
+
+def test_buyer_export():
+    """Exports stream in chunks, honour filters and fields, and gzip cleanly"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': f'Buyer {i}', 'phone': f'555-01{i:02d}', 'city': 'Houston' if i % 2 else 'Dallas'}
+            for i in range(1, 8)
+        ])
+
+        chunks = list(export_stream(db_path, 'ndjson', fields='company_name', chunk_rows=3))
+        assert len(chunks) == 3
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        assert rows[0] == {'id': 1, 'company_name': 'Buyer 1'} and len(rows) == 7
+
+        data = b''.join(export_stream(db_path, 'csv', True, fields='company_name,city', city='Houston'))
+        table = list(csv.reader(io.StringIO(gzip.decompress(data).decode())))
+        assert table[0] == ['id', 'company_name', 'city']
+        assert [row[1] for row in table[1:]] == ['Buyer 1', 'Buyer 3', 'Buyer 5', 'Buyer 7']
+
+        path = os.path.join(tmp, 'buyers.ndjson.gz')
+        assert export_to_file(path, db_path=db_path, city='Dallas') == os.path.getsize(path)
+        with gzip.open(path, 'rt') as exported:
+            assert [json.loads(line)['company_name'] for line in exported] == ['Buyer 2', 'Buyer 4', 'Buyer 6']
+
+        # Bad requests fail before any row is read
+        for bad in ({'fmt': 'xlsx'}, {'fields': 'password'}, {'since': 'last week'}):
+            try:
+                export_stream(db_path, **bad)
+                raise AssertionError(f"{bad} should be rejected")
+            except ValueError:
+                pass
+    print("✓ Buyer export tests passed")
+
+if __name__ == "__main__":
+    test_buyer_export()
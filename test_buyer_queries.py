@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for the buyers read side
+"""
+
+import os
+import sqlite3
+import tempfile
+from buyer_store import init_schema, BuyerWriter
+from buyer_queries import BuyerQueries
+
+def make_database(tmp, count=10):
+    """Buyers 1..count alternating between Houston and Dallas"""
+    db_path = os.path.join(tmp, 'buyers.db')
+    conn = sqlite3.connect(db_path)
+    init_schema(conn)
+    conn.close()
+    BuyerWriter(db_path, group_commit_ms=0).write([
+        {'company_name': f'Buyer {i}', 'phone': f'555-01{i:02d}',
+         'city': 'Houston' if i % 2 else 'Dallas', 'confidence_score': i / 10}
+        for i in range(1, count + 1)
+    ])
+    return db_path
+
+def test_dashboard_queries():
+    """Counters, recent buyers and pooled query-only connections"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_database(tmp)
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE buyers SET discovered_at = datetime('now', '-3 hours') WHERE id <= 4")
+        conn.execute("UPDATE buyers SET discovered_at = datetime('now', '-3 days') WHERE id <= 2")
+        conn.commit()
+
+        queries = BuyerQueries(db_path, pool_size=1)
+        assert queries.stats() == {'total_buyers': 10, 'last_24_hours': 8, 'last_hour': 6}
+        assert len(queries.recent_buyers(2)) == 6
+        assert len(queries.recent_buyers(24)) == 8
+        assert len(queries.all_buyers()) == 10
+
+        # Filters are answered from their indexes
+        plan = ' '.join(row[-1] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM buyers WHERE city = ?', ('Houston',)))
+        assert 'idx_buyers_city' in plan
+        conn.close()
+
+        # Read connections refuse writes and are reused after release()
+        reader = queries.connection()
+        try:
+            reader.execute('DELETE FROM buyers')
+            raise AssertionError("read connections must be query-only")
+        except sqlite3.OperationalError:
+            pass
+        queries.release()
+        assert queries.connection() is reader
+        queries.release()
+    print("✓ Dashboard query tests passed")
+
+def test_buyers_page():
+    """Keyset pages walk every match once, newest first, with the fields asked for"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = make_database(tmp)
+        queries = BuyerQueries(db_path)
+
+        seen = []
+        cursor = None
+        while True:
+            page = queries.buyers_page(limit=4, cursor=cursor, fields='company_name,city')
+            assert all(set(buyer) == {'id', 'company_name', 'city'} for buyer in page['buyers'])
+            seen.extend(buyer['id'] for buyer in page['buyers'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == list(range(10, 0, -1))
+
+        page = queries.buyers_page(city='Houston', min_confidence=0.5, limit=2)
+        assert [buyer['id'] for buyer in page['buyers']] == [9, 7]
+        page = queries.buyers_page(city='Houston', min_confidence=0.5, limit=2, cursor=page['next_cursor'])
+        assert [buyer['id'] for buyer in page['buyers']] == [5] and page['next_cursor'] is None
+
+        # since_version returns only what changed after the version a page reported
+        version = page['version']
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Buyer 3', 'phone': '555-0103', 'email': 'new@buyer3.example'},
+            {'company_name': 'Buyer 11', 'phone': '555-0111'},
+        ])
+        changed = queries.buyers_page(since_version=version, fields='company_name')
+        assert [buyer['company_name'] for buyer in changed['buyers']] == ['Buyer 11', 'Buyer 3']
+        assert changed['version'] == version + 1
+
+        # A write landing mid-walk, on a row already passed, is still picked
+        # up by the next sync: every page reports the walk's starting version
+        first = queries.buyers_page(limit=4)
+        started = first['version']
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Buyer 10', 'phone': '555-0110', 'email': 'new@buyer10.example'}])
+        page = first
+        while page['next_cursor'] is not None:
+            page = queries.buyers_page(limit=4, cursor=page['next_cursor'])
+            assert page['version'] == started
+        changed = queries.buyers_page(since_version=page['version'], fields='company_name')
+        assert [buyer['company_name'] for buyer in changed['buyers']] == ['Buyer 10']
+
+        for bad in ({'fields': 'password'}, {'limit': -1}, {'since': 'yesterday'}, {'cursor': 'x:1'}):
+            try:
+                queries.buyers_page(**bad)
+                raise AssertionError(f"{bad} should be rejected")
+            except ValueError:
+                pass
+        queries.release()
+    print("✓ Buyer page tests passed")
+
+if __name__ == "__main__":
+    test_dashboard_queries()
+    test_buyers_page()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for full-text buyer search
+"""
+
+import os
+import sqlite3
+import tempfile
+from buyer_store import init_schema, BuyerWriter
+from buyer_search import search_buyers, fts_query
+
+def names(page):
+    return [buyer['company_name'] for buyer in page['buyers']]
+
+def test_buyer_search():
+    """Matches rank by name first, follow typed prefixes and page without gaps"""
+    assert fts_query('acme batt') == '"acme" "batt"*'
+    assert fts_query('lead* OR "scrap"') == '"lead"* "OR" "scrap"*'
+    try:
+        fts_query(' -- ')
+        raise AssertionError("an empty query should be rejected")
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Houston Metals', 'phone': '1', 'business_type': 'Battery Recycling',
+             'city': 'Houston', 'confidence_score': 0.5},
+            {'company_name': 'Battery Recycling Co', 'phone': '2', 'city': 'Dallas', 'confidence_score': 0.5},
+            {'company_name': 'Battery Recycling Co', 'phone': '3', 'city': 'Austin', 'confidence_score': 0.9},
+            {'company_name': 'Café Batterie Recyclers', 'phone': '4', 'city': 'Houston'},
+            {'company_name': 'Tire Depot', 'phone': '5', 'address': '9 Recycling Rd', 'city': 'Houston'},
+        ])
+        conn = sqlite3.connect(db_path)
+
+        # A name match outranks a business type match; confidence breaks ties
+        page = search_buyers(conn, 'battery recycling', fields='company_name,city')
+        assert [(buyer['company_name'], buyer['city']) for buyer in page['buyers']] == [
+            ('Battery Recycling Co', 'Austin'), ('Battery Recycling Co', 'Dallas'), ('Houston Metals', 'Houston')]
+
+        # The last word is a prefix, matched in any indexed column; accents are folded
+        assert 'Tire Depot' in names(search_buyers(conn, 'recycl'))
+        assert 'Café Batterie Recyclers' in names(search_buyers(conn, 'cafe batt'))
+        page = search_buyers(conn, 'recycl', city='Houston', fields='company_name')
+        assert sorted(names(page)) == ['Café Batterie Recyclers', 'Houston Metals', 'Tire Depot']
+        assert all(set(buyer) == {'id', 'company_name', 'score'} for buyer in page['buyers'])
+
+        # Paging with the cursor visits every match once, in rank order
+        everything = names(search_buyers(conn, 'recycl', limit=50))
+        paged, cursor = [], None
+        while True:
+            page = search_buyers(conn, 'recycl', limit=2, cursor=cursor)
+            paged += names(page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert paged == everything and len(paged) == 5
+
+        # The index follows renames
+        conn.execute("UPDATE buyers SET company_name = 'Tire Town' WHERE company_name = 'Tire Depot'")
+        assert names(search_buyers(conn, 'depot')) == []
+        assert names(search_buyers(conn, 'tire town')) == ['Tire Town']
+        conn.execute("DELETE FROM buyers WHERE company_name = 'Tire Town'")
+        assert names(search_buyers(conn, 'tire')) == []
+
+        try:
+            search_buyers(conn, 'recycl', cursor='not-a-cursor')
+            raise AssertionError("a bad cursor should be rejected")
+        except ValueError:
+            pass
+        conn.close()
+    print("✓ Buyer search tests passed")
+
+if __name__ == "__main__":
+    test_buyer_search()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test script for the group-committing buyer writer
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from buyer_store import init_schema, BuyerWriter
+from entity_resolution import EntityResolver
+
+class FailingResolver(EntityResolver):
+    """Resolver whose observation step blows up for one company"""
+
+    def observe(self, cursor, buyer_id, buyer):
+        if buyer['company_name'] == 'Broken Batteries':
+            raise ValueError("observation failed")
+        super().observe(cursor, buyer_id, buyer)
+
+def test_group_commit():
+    """Concurrent batches share commits; re-found buyers are merged, not duplicated"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        writer = BuyerWriter(db_path, group_commit_ms=200)
+        commits = []
+        writer.add_listener(lambda: commits.append(1))
+        saved = []
+        threads = [threading.Thread(target=lambda i=i: saved.append(writer.write([
+            {'company_name': f'Buyer {i}', 'phone': f'555-01{i:02d}', 'confidence_score': 0.5},
+            {'company_name': '', 'phone': 'skipped'},
+        ]))) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(saved) == [1] * 8
+        assert len(commits) < 8
+
+        assert writer.write([{'company_name': 'Buyer 0', 'phone': '555-0100', 'email': 'sales@buyer0.example',
+                              'confidence_score': 0.9}]) == 0
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM buyers').fetchone()[0] == 8
+        row = conn.execute("SELECT email, confidence_score, seen_count FROM buyers WHERE company_name = 'Buyer 0'").fetchone()
+        assert row == ('sales@buyer0.example', 0.9, 2)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        conn.close()
+    print("✓ Buyer writer group commit tests passed")
+
+def test_writer_errors():
+    """A failing batch is rolled back and reported, and the writer keeps going"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        writer = BuyerWriter(db_path, group_commit_ms=0, resolver=FailingResolver())
+        try:
+            writer.write([{'company_name': 'Good Batteries', 'phone': '1'},
+                          {'company_name': 'Broken Batteries', 'phone': '2'}])
+            raise AssertionError("write() should re-raise the writer's error")
+        except ValueError as e:
+            assert str(e) == "observation failed"
+
+        assert writer.write([{'company_name': 'Later Batteries', 'phone': '3'}]) == 1
+        conn = sqlite3.connect(db_path)
+        names = [row[0] for row in conn.execute('SELECT company_name FROM buyers')]
+        conn.close()
+        assert names == ['Later Batteries']
+
+        # Sharing a transaction with a bad batch costs the others nothing
+        writer = BuyerWriter(db_path, group_commit_ms=300, resolver=FailingResolver())
+        results = {}
+
+        def write(name, phone):
+            try:
+                results[name] = writer.write([{'company_name': name, 'phone': phone}])
+            except ValueError as e:
+                results[name] = str(e)
+
+        callers = [threading.Thread(target=write, args=(name, str(phone)))
+                   for phone, name in enumerate(['North Batteries', 'Broken Batteries', 'South Batteries'], 4)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join(10)
+        assert results == {'North Batteries': 1, 'Broken Batteries': "observation failed", 'South Batteries': 1}
+    print("✓ Buyer writer error tests passed")
+
+def test_buyer_count():
+    """The stored buyer total follows inserts and deletes, and is seeded on upgrade"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        writer = BuyerWriter(db_path, group_commit_ms=0)
+        writer.write([{'company_name': f'Buyer {i}', 'phone': str(i)} for i in range(5)])
+        writer.write([{'company_name': 'Buyer 0', 'phone': '0'}])
+
+        conn = sqlite3.connect(db_path)
+        total = lambda: conn.execute('SELECT buyer_count FROM data_version').fetchone()[0]
+        assert total() == 5
+        conn.execute("DELETE FROM buyers WHERE company_name = 'Buyer 4'")
+        conn.commit()
+        assert total() == 4
+
+        # A database from before the counter existed is counted once
+        conn.execute('DROP TRIGGER buyers_count_insert')
+        conn.execute('DROP TRIGGER buyers_count_delete')
+        conn.execute('DROP TABLE data_version')
+        conn.execute('CREATE TABLE data_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)')
+        conn.execute('INSERT INTO data_version VALUES (1, 7)')
+        conn.commit()
+        init_schema(conn)
+        assert conn.execute('SELECT version, buyer_count FROM data_version').fetchone() == (7, 4)
+        conn.close()
+    print("✓ Buyer count tests passed")
+
+if __name__ == "__main__":
+    test_group_commit()
+    test_writer_errors()
+    test_buyer_count()
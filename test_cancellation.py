@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for deadline-bounded fetches and cooperative cancellation
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from cancellation import CancelToken, current_token
+from fetch_engine import FetchEngine
+from rate_limiter import RateLimiter, RateLimitedSession
+from battery_buyer_agent import BatteryBuyerAgent
+from buyer_store import init_schema, BuyerWriter
+from crawl_frontier import CrawlFrontier
+from config import FETCH_CONFIG
+
+class StalledHandler(BaseHTTPRequestHandler):
+    """Accepts the request, then never answers in time"""
+
+    def do_GET(self):
+        time.sleep(5)
+
+    def log_message(self, *args):
+        pass
+
+def test_cancellation():
+    """Stalled and slow sources are cut at their deadlines, the cycle when its target is met"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StalledHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    session = RateLimitedSession(RateLimiter(interval_range=(0, 0), respect_robots=False))
+    slow_limiter = RateLimiter(interval_range=(30, 30), respect_robots=False)
+
+    def stalled_fetch():
+        session.get(url, timeout=30)
+        return [{'company_name': 'never'}]
+
+    def polite_crawl():
+        found = []
+        for page in range(3):
+            slow_limiter.wait('http://example.com/')  # second wait sleeps 30s
+            found.append({'company_name': f'page {page}'})
+        return found
+
+    engine = FetchEngine(max_workers=2)
+    start = time.monotonic()
+    results, cut = engine.run_until(
+        {'stalled': (stalled_fetch, ()), 'polite': (polite_crawl, ()), 'quick': (lambda: [{}], ())},
+        CancelToken(10, deadline_reason='cycle deadline'),
+        {'stalled': 0.5, 'polite': 0.5}
+    )
+    assert time.monotonic() - start < 3
+    assert cut == {'stalled': 'source deadline', 'polite': 'source deadline'}
+    assert results['quick'] == [{}] and results['stalled'] == []
+
+    # Meeting the target stops the rest, including tasks never started
+    token = CancelToken()
+    results, cut = engine.run_until({
+        'first': (lambda: token.cancel('target met') or [{}], ()),
+        'blocked': (lambda: token.sleep(30), ()),
+        'queued': (lambda: [{}], ()),
+    }, token)
+    assert results['first'] == [{}]
+    assert cut['blocked'] == 'target met'
+    assert cut['queued'].startswith('target met')
+
+    engine.shutdown()
+    server.shutdown()
+    print("✓ Cancellation tests passed")
+
+class CycleAgent(BatteryBuyerAgent):
+    """Agent whose every source finds one buyer, then stalls until cut"""
+
+    def __init__(self, db_path):
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+        self.db_path = db_path
+        self.frontier = CrawlFrontier(db_path)
+        self.writer = BuyerWriter(db_path, group_commit_ms=0)
+        self.rate_limiter = RateLimiter(respect_robots=False)
+        self.fetch_engine = FetchEngine(max_workers=2)
+        self.found = 0
+        self.lock = threading.Lock()
+        self.sources = {'yellowpages': self.scrape}
+        self.last_cycle = None
+
+    def scrape(self, search_term, city):
+        with self.lock:
+            self.found += 1
+            first = self.found == 1
+        if not first:
+            current_token().sleep(30)
+        return [{'company_name': f'{search_term} {city}', 'city': city}]
+
+def test_target_met_release():
+    """Jobs cut or never started because the target was met are due again at once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        agent = CycleAgent(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM crawl_jobs WHERE id NOT IN "
+                     "(SELECT id FROM crawl_jobs WHERE source = 'yellowpages' LIMIT 4)")
+        conn.commit()
+
+        target = FETCH_CONFIG["cycle_target_buyers"]
+        FETCH_CONFIG["cycle_target_buyers"] = 1
+        try:
+            start = time.monotonic()
+            assert agent.find_buyers() == 1
+            assert time.monotonic() - start < 5
+        finally:
+            FETCH_CONFIG["cycle_target_buyers"] = target
+        assert set(agent.last_cycle['cut'].values()) <= {'target met', 'target met (not started)'}
+        assert agent.last_cycle['cut']
+
+        # Wait for cut jobs still stopping to hand back their leases
+        for _ in range(50):
+            if not conn.execute("SELECT COUNT(*) FROM crawl_jobs WHERE status = 'claimed'").fetchone()[0]:
+                break
+            time.sleep(0.1)
+        visited, retried = conn.execute(
+            "SELECT SUM(visits > 0), SUM(visits = 0 AND next_visit_at <= datetime('now')) FROM crawl_jobs"
+        ).fetchone()
+        assert visited == 1 and retried == agent.last_cycle['jobs'] - 1 > 0
+        conn.close()
+        agent.frontier.close()
+        agent.fetch_engine.shutdown()
+    print("✓ Target met release tests passed")
+
+if __name__ == "__main__":
+    test_cancellation()
+    test_target_met_release()
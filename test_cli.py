@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the command line entry point and its lazy imports
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+HEAVY_MODULES = ('selenium', 'webdriver_manager', 'fake_useragent', 'schedule', 'pandas', 'driver_pool')
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def test_lazy_imports():
+    """Serving and the CLI never load the browser stack until a crawl needs it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        code = ("import sys, cli, web_app, battery_buyer_agent\n"
+                "web_app.create_app('buyers.db')\n"
+                f"print(sorted(m for m in sys.modules if m.split('.')[0] in {HEAVY_MODULES!r}))")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60,
+                                cwd=tmp, env=dict(os.environ, PYTHONPATH=HERE))
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == '[]'
+    print("✓ Lazy import tests passed")
+
+def test_stats_command():
+    """cli.py stats prints the counters of a fresh database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        result = subprocess.run([sys.executable, os.path.join(HERE, 'cli.py'), 'stats', '--db', db_path],
+                                capture_output=True, text=True, timeout=60, cwd=tmp)
+        assert result.returncode == 0, result.stderr
+        assert json.loads(result.stdout) == {'total_buyers': 0, 'last_24_hours': 0, 'last_hour': 0}
+    print("✓ CLI stats tests passed")
+
+if __name__ == "__main__":
+    test_lazy_imports()
+    test_stats_command()
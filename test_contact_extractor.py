@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared contact extractor
+"""
+
+from contact_extractor import extract_contacts, extract_contacts_batch, extract_contact_info
+
+SAMPLE = (
+    "ABC Battery Co.\n"
+    "Phone: (555) 123-4567 or 555.123.4567\n"
+    "Fax: +1 555-987-6543\n"
+    "Email: Sales@ABCBattery.com, sales@abcbattery.com\n"
+    "Account 123456789012\n"
+)
+
+def test_contact_extractor():
+    """Phones and emails are normalized, deduplicated and located"""
+    contacts = extract_contacts(SAMPLE)
+
+    phones = contacts['phones']
+    assert [p['e164'] for p in phones] == ['+15551234567', '+15559876543']
+    assert phones[0]['display'] == '(555) 123-4567'
+    assert len(phones[0]['offsets']) == 2
+    start, end = phones[0]['offsets'][0]
+    assert SAMPLE[start:end] == '(555) 123-4567'
+
+    emails = contacts['emails']
+    assert [e['email'] for e in emails] == ['sales@abcbattery.com']
+    assert len(emails[0]['offsets']) == 2
+
+    # Long digit runs are not phone numbers
+    assert extract_contacts("Account 123456789012")['phones'] == []
+
+    batch = extract_contacts_batch([SAMPLE, None, "Call 800-555-0199"])
+    assert len(batch) == 3
+    assert batch[1] == {'phones': [], 'emails': []}
+    assert batch[2]['phones'][0]['e164'] == '+18005550199'
+
+    assert extract_contact_info(SAMPLE) == (
+        ['(555) 123-4567', '(555) 987-6543'],
+        ['sales@abcbattery.com']
+    )
+    print("✓ Contact extractor tests passed")
+
+if __name__ == "__main__":
+    test_contact_extractor()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test script for sharded crawling through a coordinator
+"""
+
+import os
+import time
+import socket
+import sqlite3
+import tempfile
+import threading
+import multiprocessing
+import requests
+from werkzeug.serving import make_server
+from config import COORDINATOR_CONFIG
+from crawl_coordinator import create_coordinator_app, RemoteLeaseStore, RemoteBuyerWriter
+from crawl_frontier import CrawlFrontier
+from cancellation import CancelToken, Cancelled, active
+
+JOBS = 24
+TOKEN = 'test-token'
+
+def crawl_worker(url, name):
+    """Lease jobs until none are left; each takes 0.1s and finds one buyer"""
+    frontier = CrawlFrontier(store=RemoteLeaseStore(url, token=TOKEN), worker_id=name)
+    writer = RemoteBuyerWriter(url, token=TOKEN)
+    while True:
+        jobs = frontier.claim(limit=2)
+        if not jobs:
+            break
+        for job in jobs:
+            time.sleep(0.1)
+            saved = writer.write([{'company_name': f"Buyer {job['id']}", 'phone': str(job['id'])}])
+            assert frontier.complete(job['id'], saved, seconds=0.1, requests=1)
+    frontier.close()
+
+def run_workers(url, count):
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=crawl_worker, args=(url, f'worker-{i}')) for i in range(count)]
+    start = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    return time.monotonic() - start
+
+def test_crawl_coordinator():
+    """Workers in separate processes share the jobs without overlap"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        app = create_coordinator_app(db_path, TOKEN)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        conn = sqlite3.connect(db_path)
+        conn.execute('DELETE FROM crawl_jobs WHERE id > ?', (JOBS,))
+        conn.commit()
+
+        # Without the shared token nothing can be read or written
+        for path in ('/leases/claim', '/buyers'):
+            assert requests.post(url + path, json={'worker_id': 'anyone', 'buyers': []}).status_code == 401
+        assert requests.get(url + '/frontier/stats', headers={'X-Coordinator-Token': 'wrong'}).status_code == 401
+        configured, COORDINATOR_CONFIG["token"] = COORDINATOR_CONFIG["token"], None
+        try:
+            create_coordinator_app(db_path)
+            raise AssertionError("a coordinator without a token must not start")
+        except ValueError:
+            pass
+        finally:
+            COORDINATOR_CONFIG["token"] = configured
+
+        run_workers(url, 4)
+
+        visits = conn.execute('SELECT visits, status FROM crawl_jobs').fetchall()
+        assert visits == [(1, 'pending')] * JOBS
+        assert conn.execute('SELECT COUNT(*) FROM buyers').fetchone()[0] == JOBS
+
+        # A lease left to lapse goes to another worker; the first loses it
+        conn.execute('UPDATE crawl_jobs SET next_visit_at = NULL')
+        conn.commit()
+        store = RemoteLeaseStore(url, token=TOKEN)
+        crashed = CrawlFrontier(store=store, worker_id='crashed')
+        lost = []
+        job = crashed.claim(limit=1)[0]
+        crashed.watch(job['id'], lambda: lost.append(job['id']))
+        assert job['id'] not in [j['id'] for j in store.claim('other', limit=JOBS)]
+
+        conn.execute("UPDATE crawl_jobs SET lease_expires_at = datetime('now', '-1 seconds') WHERE id = ?",
+                     (job['id'],))
+        conn.commit()
+        assert [j['id'] for j in store.claim('other', limit=JOBS)] == [job['id']]
+        assert crashed.heartbeat() == [job['id']] and lost == [job['id']]
+        assert not crashed.complete(job['id'], 5)
+        assert store.complete('other', job['id'], 1)
+        conn.close()
+        server.shutdown()
+    print("✓ Crawl coordinator tests passed")
+
+def test_unsent_buyers():
+    """Buyers the coordinator could not take are sent with the next batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        server = make_server('127.0.0.1', 0, create_coordinator_app(db_path, TOKEN), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        # Nothing listens on a closed socket's port
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        down = f"http://127.0.0.1:{probe.getsockname()[1]}"
+        probe.close()
+
+        writer = RemoteBuyerWriter(down, timeout=2, token=TOKEN)
+        backoff = COORDINATOR_CONFIG["upload_backoff_seconds"]
+        COORDINATOR_CONFIG["upload_backoff_seconds"] = 0.01
+        try:
+            writer.write([{'company_name': 'Early Batteries', 'phone': '1'}])
+            raise AssertionError("write() should raise while the coordinator is down")
+        except requests.ConnectionError:
+            pass
+        finally:
+            COORDINATOR_CONFIG["upload_backoff_seconds"] = backoff
+        assert [[buyer['company_name'] for buyer in batch] for batch in writer.unsent] == [['Early Batteries']]
+
+        # A cancelled job stops backing off, and its buyers are kept too
+        token = CancelToken()
+        token.cancel('cycle deadline')
+        with active(token):
+            try:
+                writer.write([{'company_name': 'Cut Batteries', 'phone': '3'}])
+                raise AssertionError("write() should give up when its job is cancelled")
+            except Cancelled:
+                pass
+        assert [len(batch) for batch in writer.unsent] == [1, 1]
+
+        # Only the caller's own buyers count as its new ones
+        writer.url = f"http://127.0.0.1:{server.server_port}"
+        assert writer.write([{'company_name': 'Late Batteries', 'phone': '2'}]) == 1
+        assert writer.unsent == [] and writer.flush() == 0
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM buyers').fetchone()[0] == 3
+        conn.close()
+        server.shutdown()
+    print("✓ Unsent buyer tests passed")
+
+if __name__ == "__main__":
+    test_crawl_coordinator()
+    test_unsent_buyers()
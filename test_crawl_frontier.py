@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent crawl frontier
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+from collections import Counter
+from crawl_frontier import CrawlFrontier, build_job_matrix
+
+def test_crawl_frontier():
+    """Claims favour the jobs that have paid off while still exploring"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        frontier = CrawlFrontier(db_path, rng=random.Random(7))
+
+        # Make every job ready again right after a visit
+        conn = sqlite3.connect(db_path)
+        conn.execute("DELETE FROM crawl_jobs WHERE source NOT IN ('yellowpages', 'google')")
+        conn.commit()
+        conn.close()
+
+        # Yellow Pages jobs find 3 buyers in 10s, Google ones 1 in 60s
+        picked = Counter()
+        for _ in range(40):
+            jobs = frontier.claim(limit=4, budget_seconds=10000)
+            assert len({job['id'] for job in jobs}) == len(jobs)
+            for job in jobs:
+                picked[job['source']] += 1
+                if job['source'] == 'yellowpages':
+                    frontier.complete(job['id'], 3, seconds=10.0, requests=2)
+                else:
+                    frontier.complete(job['id'], 1, seconds=60.0, requests=6)
+            conn = sqlite3.connect(db_path)
+            conn.execute('UPDATE crawl_jobs SET next_visit_at = NULL')
+            conn.commit()
+            conn.close()
+
+        assert picked['yellowpages'] > 3 * picked['google'] > 0
+
+        stats = frontier.stats()
+        assert abs(stats['yellowpages']['buyers_per_second'] - 0.3) < 1e-9
+        assert abs(stats['google']['buyers_per_request'] - 1 / 6) < 1e-9
+        best = frontier.job_stats(limit=1)[0]
+        assert best['source'] == 'yellowpages' and abs(best['buyers_per_request'] - 1.5) < 1e-9
+
+        # The time budget caps a claim once one job is in
+        assert len(frontier.claim(limit=10, budget_seconds=15)) == 1
+    print("✓ Crawl frontier tests passed")
+
+def test_claim_and_release():
+    """Each job is held by one worker; finished and released ones wait their turn"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        first = CrawlFrontier(db_path, worker_id='first')
+        second = CrawlFrontier(db_path, worker_id='second')
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM crawl_jobs').fetchone()[0] == len(build_job_matrix())
+        conn.execute("DELETE FROM crawl_jobs WHERE source != 'craigslist'")
+        conn.commit()
+        total = conn.execute('SELECT COUNT(*) FROM crawl_jobs').fetchone()[0]
+
+        mine = first.claim(limit=3, budget_seconds=10000)
+        assert len(mine) == 3 and all(job['source'] == 'craigslist' for job in mine)
+        theirs = second.claim(limit=total, budget_seconds=10000)
+        assert len(theirs) == total - 3
+        assert not {job['id'] for job in mine} & {job['id'] for job in theirs}
+        assert first.claim(budget_seconds=10000) == []
+
+        # Only the holder can finish or give back a job
+        done, given_back, kept = mine
+        assert not second.complete(done['id'], 2) and not second.release(given_back['id'])
+        assert first.complete(done['id'], 2, seconds=5.0, requests=1)
+        assert first.release(given_back['id'])
+        assert not first.complete(done['id'], 2)
+
+        # Neither is offered again before its revisit or retry time
+        for job in theirs:
+            second.release(job['id'], retry_minutes=0)
+        conn.execute("UPDATE crawl_jobs SET next_visit_at = datetime('now', '-1 seconds') "
+                     "WHERE next_visit_at <= datetime('now')")
+        conn.commit()
+        again = {job['id'] for job in first.claim(limit=total, budget_seconds=10000)}
+        assert again == {job['id'] for job in theirs}
+        row = conn.execute('SELECT visits, total_yield, status FROM crawl_jobs WHERE id = ?',
+                           (done['id'],)).fetchone()
+        assert row == (1, 2, 'pending')
+        assert conn.execute('SELECT status, claimed_by FROM crawl_jobs WHERE id = ?',
+                            (kept['id'],)).fetchone() == ('claimed', 'first')
+
+        # Leases are handed back when a worker shuts down
+        first.close()
+        second.close()
+        assert conn.execute("SELECT COUNT(*) FROM crawl_jobs WHERE status = 'claimed'").fetchone()[0] == 0
+        conn.close()
+    print("✓ Crawl frontier lease tests passed")
+
+if __name__ == "__main__":
+    test_crawl_frontier()
+    test_claim_and_release()
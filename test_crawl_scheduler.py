@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the paced crawl scheduler
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+from buyer_store import init_schema
+from crawl_scheduler import CrawlScheduler, hour_key
+
+# 2026-01-01 00:30:00 UTC, half way through an hourly window
+NOW = 1767227400
+
+class StubFrontier:
+    def stats(self):
+        return {'yellowpages': {'ready': 10}}
+
+class StubAgent:
+    """Saves `per_cycle` new buyers per cycle, at the clock's hour"""
+
+    def __init__(self, db_path, per_cycle, clock):
+        self.db_path = db_path
+        self.frontier = StubFrontier()
+        self.per_cycle = per_cycle
+        self.clock = clock
+        self.cycles = 0
+        self.active = 0
+        self.peak = 0
+        self.engines = set()
+        self.lock = threading.Lock()
+
+    def run_cycle(self, fetch_engine=None):
+        with self.lock:
+            self.cycles += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.engines.add(fetch_engine)
+        time.sleep(0.05)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        with conn:
+            conn.execute('''
+                INSERT INTO buyer_rollups (hour, business_type, source, city, new_count, reseen_count)
+                VALUES (?, '', 'example.com', 'Houston', ?, 0)
+                ON CONFLICT(hour, business_type, source, city) DO UPDATE SET
+                    new_count = new_count + excluded.new_count
+            ''', (hour_key(self.clock()), self.per_cycle))
+        conn.close()
+        with self.lock:
+            self.active -= 1
+        return {'saved': self.per_cycle, 'jobs': 1}
+
+def test_crawl_scheduler():
+    """Cycles run until the window's target is met, concurrently when behind"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        now = NOW
+        agent = StubAgent(db_path, per_cycle=2, clock=lambda: now)
+        scheduler = CrawlScheduler(agent, interval_hours=1, target_per_hour=6, max_concurrent=3,
+                                   backfill_windows=2, poll_seconds=0.01, clock=lambda: now)
+        window_start, window_end = scheduler.window(now)
+        assert (window_start, window_end) == (NOW - 1800, NOW + 1800)
+
+        # Near the end of the window every slot is used
+        now = window_end - 5
+        assert scheduler.tick() == 3
+        scheduler.shutdown()
+        # Concurrent cycles each ran on a fetch engine of their own
+        assert agent.peak == 3 and len(agent.engines) == 3 and None not in agent.engines
+        assert scheduler.remaining(now) == 0
+        assert scheduler.tick() == 0
+
+        # An earlier window's shortfall is owed on top of this one's target
+        scheduler.started = window_start - 3600
+        assert scheduler.remaining(now) == 6
+
+        # The next window starts from its own target
+        now = window_end
+        assert scheduler.remaining(now) == 6 + 6
+
+        # Windows are counted from hourly rollups, so they must be whole hours
+        for hours in (0.5, 1.5):
+            try:
+                CrawlScheduler(agent, interval_hours=hours)
+                raise AssertionError(f"{hours}h windows should be rejected")
+            except ValueError:
+                pass
+    print("✓ Crawl scheduler tests passed")
+
+if __name__ == "__main__":
+    test_crawl_scheduler()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for the warm Selenium driver pool
+"""
+
+import time
+import threading
+from cancellation import CancelToken, Cancelled, active
+from driver_pool import DriverPool
+
+class FakeDriver:
+    """Stands in for Chrome: answers scripts until it is quit or crashes"""
+
+    def __init__(self):
+        self.alive = True
+        self.quits = 0
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return 1
+
+    def quit(self):
+        self.alive = False
+        self.quits += 1
+
+class FakeDriverPool(DriverPool):
+    """DriverPool that launches FakeDrivers instead of Chrome"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+
+    def _create_driver(self):
+        driver = FakeDriver()
+        with self.lock:
+            self.pages[id(driver)] = 0
+        self.started.append(driver)
+        return driver
+
+def test_driver_pool():
+    """Drivers are reused, recycled when worn out or broken, and bounded in number"""
+    pool = FakeDriverPool(size=2, max_pages=3)
+
+    # One warm driver serves checkouts until max_pages, then is replaced
+    for _ in range(3):
+        with pool.driver():
+            pass
+    assert len(pool.started) == 1 and pool.started[0].quits == 1
+    with pool.driver() as driver:
+        assert driver is pool.started[1]
+
+    # A driver that crashed while idle is replaced when next borrowed
+    driver.alive = False
+    with pool.driver() as replacement:
+        assert replacement is pool.started[2]
+
+    # A driver that failed mid-page is not returned to the pool
+    try:
+        with pool.driver() as driver:
+            driver.alive = False
+            raise ValueError("page load failed")
+    except ValueError:
+        pass
+    assert pool.idle.qsize() == 0
+
+    # No more than `size` drivers are out at once
+    first, second = pool.acquire(), pool.acquire()
+    third = []
+    waiter = threading.Thread(target=lambda: third.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.2)
+    assert not third
+    pool.release(first)
+    waiter.join(2)
+    assert third == [first]
+
+    # Waiting for a driver ends with the waiting work's deadline
+    start = time.monotonic()
+    try:
+        with active(CancelToken(timeout=0.3)), pool.driver():
+            raise AssertionError("the pool is full")
+    except Cancelled:
+        pass
+    assert time.monotonic() - start < 1
+    pool.release(second)
+    pool.release(third[0])
+
+    # Cancelling the borrowing work quits its driver at once
+    token = CancelToken()
+    try:
+        with active(token), pool.driver() as driver:
+            token.cancel('cycle deadline')
+            assert not driver.alive
+            token.check()
+    except Cancelled:
+        pass
+    assert driver not in list(pool.idle.queue)
+
+    pool.close()
+    assert all(not driver.alive for driver in pool.started)
+    print("✓ Driver pool tests passed")
+
+if __name__ == "__main__":
+    test_driver_pool()
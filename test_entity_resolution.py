@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script for entity resolution of scraped buyers
+"""
+
+import os
+import sqlite3
+import tempfile
+from buyer_store import init_schema, BuyerWriter
+from entity_resolution import canonical_keys, name_similarity
+
+def test_entity_resolution():
+    """Variants of one business collapse into a single canonical buyer"""
+    assert name_similarity('ABC Battery Co.', 'ABC Batteries, Inc') == 1.0
+    assert name_similarity('Houston Scrap Metal', 'Dallas Auto Parts') < 0.5
+
+    keys = canonical_keys({
+        'company_name': 'ABC Battery Co.', 'phone': '(555) 123-4567',
+        'email': 'sales@abcbattery.com', 'website': 'https://www.yellowpages.com/abc',
+        'source_url': 'https://www.yellowpages.com/search'
+    })
+    assert keys == {'phone:+15551234567', 'domain:abcbattery.com', 'name:abc'}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        saved = BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'ABC Battery Co.', 'phone': '(555) 123-4567', 'city': 'Houston',
+             'confidence_score': 0.6},
+            {'company_name': 'ABC Battery Company Inc', 'phone': '555.123.4567', 'city': 'Houston',
+             'email': 'sales@abcbattery.com', 'confidence_score': 0.8},
+            {'company_name': 'Houston Scrap Metals Recycling LLC', 'city': 'Houston'},
+            {'company_name': 'Houston Scrap Metal Recycling', 'city': 'Houston'},
+            {'company_name': 'Dallas Scrap', 'phone': '(555) 123-4567', 'city': 'Dallas'},
+        ])
+        assert saved == 3
+
+        conn = sqlite3.connect(db_path)
+        abc = conn.execute(
+            "SELECT id, email, confidence_score, seen_count FROM buyers WHERE company_name = 'ABC Battery Co.'"
+        ).fetchone()
+        assert abc[1:] == ('sales@abcbattery.com', 0.8, 2)
+        observations = conn.execute(
+            'SELECT COUNT(*) FROM buyer_observations WHERE buyer_id = ?', (abc[0],)
+        ).fetchone()[0]
+        assert observations == 2
+
+        # A fill-in that would collide with another row's unique key is
+        # skipped, but the sighting still counts
+        conn.execute("INSERT INTO buyers (company_name, phone, address, city) "
+                     "VALUES ('ABC Battery Co.', '(555) 123-4567', '1 Main St, Houston, TX', 'Houston')")
+        conn.commit()
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'ABC Battery Co.', 'phone': '(555) 123-4567', 'address': '1 Main St, Houston, TX',
+             'city': 'Houston', 'confidence_score': 0.9}
+        ])
+        assert conn.execute(
+            'SELECT address, confidence_score, seen_count FROM buyers WHERE id = ?', (abc[0],)
+        ).fetchone() == ('', 0.9, 3)
+
+        # Names alone never match buyers without a city
+        saved = BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Lead Recovery Services', 'confidence_score': 0.5},
+            {'company_name': 'Lead Recovery Service LLC', 'confidence_score': 0.5},
+        ])
+        assert saved == 2
+        conn.close()
+    print("✓ Entity resolution tests passed")
+
+if __name__ == "__main__":
+    test_entity_resolution()
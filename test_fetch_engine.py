@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the concurrent fetch engine
+"""
+
+import time
+from fetch_engine import FetchEngine
+
+def slow_source(name, seconds):
+    time.sleep(seconds)
+    return [{'company_name': name}]
+
+def broken_source():
+    raise RuntimeError("site changed its markup")
+
+def test_fetch_engine():
+    """Sources overlap, keep their order and fail on their own"""
+    engine = FetchEngine(max_workers=3)
+    start = time.monotonic()
+    results = engine.run({
+        'slowest': (slow_source, ('A', 0.3)),
+        'broken': (broken_source, ()),
+        'quick': (slow_source, ('B', 0.05)),
+        'slow': (slow_source, ('C', 0.2)),
+    })
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.55, f"sources ran one after another ({elapsed:.2f}s)"
+    assert list(results) == ['slowest', 'broken', 'quick', 'slow']
+    assert results['broken'] == []
+
+    merged = engine.run_merged({
+        'first': (slow_source, ('A', 0.1)),
+        'second': (slow_source, ('B', 0.0)),
+    })
+    assert [buyer['company_name'] for buyer in merged] == ['A', 'B']
+    engine.shutdown()
+    print("✓ Fetch engine tests passed")
+
+if __name__ == "__main__":
+    test_fetch_engine()
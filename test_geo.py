@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for offline geocoding and the nearby-buyer search
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+from buyer_store import init_schema, BuyerWriter
+from geo import parse_address, geocode, gazetteer, nearby_buyers, backfill, haversine_km
+
+def test_geo():
+    """Addresses are geocoded at ingest and found by distance"""
+    assert parse_address('123 Main St, Houston, TX 77002') == ('Houston', 'TX', '77002')
+    assert parse_address('Kansas City, KS') == ('Kansas City', 'KS', '')
+    assert parse_address('Suite 4, 10001') == ('', 'NY', '10001')
+    assert parse_address('Main St') == ('', '', '')
+
+    # A listed ZIP beats the city's centroid; other ZIPs fall back to their ZIP3 area
+    places = gazetteer()
+    located = geocode({'address': '1 Main St, Houston, TX 77002', 'city': 'Houston'})
+    assert (located['latitude'], located['longitude']) == (29.7573, -95.3655)
+    assert (located['latitude'], located['longitude']) != (places.city('Houston', 'TX')['latitude'],
+                                                           places.city('Houston', 'TX')['longitude'])
+    located = geocode({'address': 'Suite 4, 77019'})
+    assert located['state'] == 'TX' and located['latitude'] == places.city('Houston', 'TX')['latitude']
+    assert geocode({'address': 'PO Box 1, 99501'})['latitude'] == places.zip_area('99501')['latitude']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Houston Scrap', 'address': '1 Main St, Houston, TX 77002', 'city': 'Houston'},
+            {'company_name': 'Austin Metals', 'address': '2 Oak St', 'city': 'Austin'},
+            {'company_name': 'Dallas Recycling', 'city': 'Dallas'},
+        ])
+
+        conn = sqlite3.connect(db_path)
+        states = dict(conn.execute('SELECT company_name, state FROM buyers'))
+        assert states == {'Houston Scrap': 'TX', 'Austin Metals': 'TX', 'Dallas Recycling': 'TX'}
+
+        result = nearby_buyers(conn, 29.76, -95.37, radius_km=300, fields='company_name')
+        assert [b['company_name'] for b in result['buyers']] == ['Houston Scrap', 'Austin Metals']
+        assert result['buyers'][0]['distance_km'] < 1
+
+        conn.execute("UPDATE buyers SET latitude = NULL, longitude = NULL WHERE company_name = 'Austin Metals'")
+        result = nearby_buyers(conn, 29.76, -95.37, radius_km=300, fields='company_name')
+        assert [b['company_name'] for b in result['buyers']] == ['Houston Scrap']
+
+        # Backfilled coordinates come with a new data version
+        before = conn.execute('SELECT version FROM data_version').fetchone()[0]
+        backfill(conn.cursor())
+        conn.commit()
+        after = conn.execute('SELECT version FROM data_version').fetchone()[0]
+        assert after == before + 1
+        assert conn.execute("SELECT version FROM buyers WHERE company_name = 'Austin Metals'").fetchone()[0] == after
+        conn.close()
+
+        # Within a distance band confidence decides; a nearer band still wins
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': 'Houston Batteries', 'city': 'Houston', 'confidence_score': 0.95},
+            {'company_name': 'Austin Recyclers', 'city': 'Austin', 'confidence_score': 1.0},
+        ])
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE buyers SET confidence_score = 0.5 WHERE company_name = 'Houston Scrap'")
+        result = nearby_buyers(conn, 29.76, -95.37, radius_km=300, fields='company_name')
+        assert [b['company_name'] for b in result['buyers']] == [
+            'Houston Batteries', 'Houston Scrap', 'Austin Recyclers', 'Austin Metals']
+        conn.close()
+    print("✓ Geocoding tests passed")
+
+def test_nearby_rings():
+    """Pages found by widening rings match ranking every buyer in the radius"""
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        conn = sqlite3.connect(db_path)
+        init_schema(conn)
+        conn.close()
+        BuyerWriter(db_path, group_commit_ms=0).write([
+            {'company_name': f'Buyer {i}', 'phone': str(i), 'city': 'Houston',
+             'confidence_score': rng.choice([0.2, 0.5, 0.9])}
+            for i in range(400)
+        ])
+        conn = sqlite3.connect(db_path)
+        conn.executemany('UPDATE buyers SET latitude = ?, longitude = ? WHERE id = ?', [
+            (29.76 + rng.uniform(-2, 2) * rng.random() ** 2, -95.37 + rng.uniform(-2, 2) * rng.random() ** 2, buyer_id)
+            for (buyer_id,) in conn.execute('SELECT id FROM buyers').fetchall()
+        ])
+        everyone = conn.execute('SELECT id, latitude, longitude, confidence_score FROM buyers').fetchall()
+
+        for radius_km, limit in [(500, 10), (500, 120), (60, 50), (8, 500), (500, 500)]:
+            expected = []
+            for buyer_id, latitude, longitude, confidence in everyone:
+                distance = haversine_km(29.76, -95.37, latitude, longitude)
+                if distance <= radius_km:
+                    expected.append((int(distance // 5), -confidence, distance, buyer_id))
+            expected = [buyer_id for *_, buyer_id in sorted(expected)[:limit]]
+            result = nearby_buyers(conn, 29.76, -95.37, radius_km=radius_km, limit=limit)
+            assert [buyer['id'] for buyer in result['buyers']] == expected, (radius_km, limit)
+        conn.close()
+    print("✓ Nearby ring search tests passed")
+
+if __name__ == "__main__":
+    test_geo()
+    test_nearby_rings()
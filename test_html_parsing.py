@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the lxml parsing stage
+"""
+
+import os
+import multiprocessing
+from html_parsing import (
+    ParsePool, page_text, parse_yellowpages, parse_craigslist_results,
+    parse_scrap_yard_listings, parse_directory_listings
+)
+
+YELLOWPAGES_PAGE = b'''
+<html><head><script>var ads = "Fake Listing";</script></head><body>
+<div class="ad"><a class="business-name">Sponsored Ad</a></div>
+<div class="result"><a class="business-name">Acme Battery Recycling</a>
+  <div class="phones">(713) 555-0100</div><div class="adr">1 Main St, Houston, TX</div>
+  <a class="track-visit-website" href="https://acme.example">Website</a></div>
+<div class="organic"><a class="n">Lead Scrap Co</a></div>
+<div class="result"><span>No name here</span></div>
+</body></html>
+'''
+
+def test_parsers():
+    """Each parser reads only its listings and keeps their fields"""
+    assert parse_yellowpages(YELLOWPAGES_PAGE) == [
+        {'company_name': 'Acme Battery Recycling', 'phone': '(713) 555-0100',
+         'address': '1 Main St, Houston, TX', 'website': 'https://acme.example'},
+        {'company_name': 'Lead Scrap Co', 'phone': '', 'address': '', 'website': ''},
+    ]
+    assert len(parse_yellowpages(YELLOWPAGES_PAGE, limit=1)) == 1
+
+    text = page_text(YELLOWPAGES_PAGE)
+    assert 'Acme Battery Recycling' in text and 'Fake Listing' not in text
+    assert page_text(b'') == ''
+
+    craigslist = b'''<ul><li class="result-row"><a class="result-title" href="/bat/1">Buying scrap batteries</a></li>
+        <li class="result-row"><a class="result-title" href="/bat/2">Old batteries wanted</a></li>
+        <li class="result-row"><a class="result-title" href="/bat/3">Third</a></li></ul>'''
+    assert parse_craigslist_results(craigslist) == [
+        ('Buying scrap batteries', '/bat/1'), ('Old batteries wanted', '/bat/2')]
+
+    yards = b'<div class="scrap-yard"><h3>Metro Metals</h3><p>We buy batteries</p></div>'
+    assert parse_scrap_yard_listings(yards) == [('Metro Metals', 'Metro MetalsWe buy batteries')]
+
+    directory = b'<div class="business-listing"><span class="name">Green Cells</span> Call 555-0101</div>'
+    assert parse_directory_listings(directory) == [('Green Cells', 'Green Cells Call 555-0101')]
+    print("✓ HTML parser tests passed")
+
+def crashing_parser(content, *args):
+    """parse_yellowpages that takes its worker process down with it"""
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+    return parse_yellowpages(content, *args)
+
+def test_parse_pool():
+    """Small pages are parsed inline, large ones in a worker process, alike"""
+    pool = ParsePool(processes=1, inline_below_bytes=len(YELLOWPAGES_PAGE))
+    try:
+        small = YELLOWPAGES_PAGE[:200]
+        assert pool.parse(parse_yellowpages, small) == parse_yellowpages(small)
+        assert pool.executor is None
+        assert pool.parse(parse_yellowpages, YELLOWPAGES_PAGE, 1) == parse_yellowpages(YELLOWPAGES_PAGE, 1)
+        assert pool.executor is not None
+
+        # A crashed worker breaks the pool: that page is parsed inline and
+        # the dead pool is dropped for a fresh one
+        broken = pool.executor
+        assert pool.parse(crashing_parser, YELLOWPAGES_PAGE) == parse_yellowpages(YELLOWPAGES_PAGE)
+        assert pool.executor is None
+        assert pool.parse(parse_yellowpages, YELLOWPAGES_PAGE) == parse_yellowpages(YELLOWPAGES_PAGE)
+        assert pool.executor is not broken
+    finally:
+        pool.shutdown()
+    print("✓ Parse pool tests passed")
+
+if __name__ == "__main__":
+    test_parsers()
+    test_parse_pool()
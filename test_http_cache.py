@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent HTTP response cache
+"""
+
+import os
+import time
+import tempfile
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rate_limiter import RateLimiter
+from http_cache import ResponseCache, CachedSession
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves one page with an ETag, answering matching revalidations with 304"""
+
+    version = 'v1'
+    requests = []
+
+    def do_GET(self):
+        etag = f'"{self.version}"'
+        self.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = f"page {self.version}".encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_http_cache():
+    """Fresh pages skip the network, stale ones are revalidated, changed ones refetched"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/directory"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, 'cache.db'), ttls={'127.0.0.1': 60}, default_ttl=None)
+        session = CachedSession(RateLimiter(interval_range=(0, 0), respect_robots=False), cache)
+
+        first = session.get(url, timeout=5)
+        assert first.text == 'page v1' and not first.from_cache
+        again = session.get(url, timeout=5)
+        assert again.text == 'page v1' and again.from_cache
+        assert PageHandler.requests == [('/directory', None)]
+
+        # Past its TTL the entry is revalidated; a 304 serves the stored body
+        def expire():
+            with cache.lock:
+                cache.conn.execute('UPDATE responses SET stored_at = stored_at - 3600')
+                cache.conn.commit()
+        expire()
+        revalidated = session.get(url, timeout=5)
+        assert revalidated.status_code == 200 and revalidated.text == 'page v1' and revalidated.from_cache
+        assert PageHandler.requests[-1] == ('/directory', '"v1"')
+        assert session.get(url, timeout=5).from_cache
+        assert len(PageHandler.requests) == 2
+
+        # A changed page replaces the entry
+        PageHandler.version = 'v2'
+        expire()
+        changed = session.get(url, timeout=5)
+        assert changed.text == 'page v2' and not changed.from_cache
+        assert session.get(url, timeout=5).text == 'page v2'
+
+        # Hosts without a TTL always go to the network
+        cache.ttls = {}
+        PageHandler.requests.clear()
+        assert not session.get(url, timeout=5).from_cache
+        assert not session.get(url, timeout=5).from_cache
+        assert PageHandler.requests == [('/directory', None)] * 2
+        cache.close()
+    server.shutdown()
+    print("✓ HTTP cache tests passed")
+
+def test_eviction():
+    """Least recently used entries go first once the cache is over budget"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, 'cache.db'), max_bytes=250)
+        for name in ('a', 'b', 'c'):
+            response = requests.Response()
+            response.status_code = 200
+            response.url = f"http://example.com/{name}"
+            response._content = name.encode() * 100
+            cache.put(name, response)
+            time.sleep(0.01)
+        assert cache.get('a') is None
+        assert cache.get('b')['body'] == b'b' * 100 and cache.get('c') is not None
+        cache.close()
+    print("✓ HTTP cache eviction tests passed")
+
+if __name__ == "__main__":
+    test_http_cache()
+    test_eviction()
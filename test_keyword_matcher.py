@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Test script for the Aho-Corasick keyword matcher
+"""
+
+from keyword_matcher import KeywordMatcher, BATTERY_MATCHER
+
+def test_keyword_matcher():
+    """Every keyword is found in one pass, at word starts only"""
+    matcher = KeywordMatcher(['battery', 'batteries', 'lead', 'scrap', 'recycle', 'car'],
+                             {'battery': 2.0, 'batteries': 2.0, 'scrap': 1.5})
+    text = "We RECYCLE car batteries; Leaders in scrap-lead recycled battery buying. Card accepted"
+
+    hits = matcher.scan(text)
+    assert [keyword for _, _, keyword in hits] == [
+        'recycle', 'car', 'batteries', 'scrap', 'lead', 'recycle', 'battery']
+    start, end, _ = hits[0]
+    assert text[start:end] == 'RECYCLE'
+
+    # Short keywords match whole words only; long ones also as prefixes
+    assert matcher.counts("leader cards carload") == {}
+    assert matcher.counts("scrapped batteryless") == {'scrap': 1, 'battery': 1}
+    assert matcher.positions("lead, lead") == {'lead': [0, 6]}
+
+    # Overlapping keywords all count, each distinct one weighed once
+    assert KeywordMatcher(['recycle', 'recycler', 'cycle'], {}).counts("recyclers") == {'recycle': 1, 'recycler': 1}
+    assert matcher.score("battery battery scrap") == 3.5
+    assert matcher.is_relevant("scrap car", threshold=2.5)
+    assert not matcher.is_relevant("car", threshold=2.5)
+
+    assert BATTERY_MATCHER.score("Scrap battery buyers wanted") > 0
+    print("✓ Keyword matcher tests passed")
+
+if __name__ == "__main__":
+    test_keyword_matcher()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for per-host rate limiting and robots.txt rules
+"""
+
+import time
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from cancellation import CancelToken, Cancelled, active
+from rate_limiter import RateLimiter, RateLimitedSession, RobotsDisallowed
+
+class RobotsHandler(BaseHTTPRequestHandler):
+    """Publishes a robots.txt closing /private and records other requests"""
+
+    fetched = []
+
+    def do_GET(self):
+        if self.path == '/robots.txt':
+            body = b"User-agent: *\nDisallow: /private\n"
+        else:
+            self.fetched.append(self.path)
+            body = b"ok"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_robots_rules():
+    """Disallowed URLs are never requested; the rest are"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RobotsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    limiter = RateLimiter(interval_range=(0, 0))
+    session = RateLimitedSession(limiter)
+    assert session.get(url + '/listings', timeout=5).text == 'ok'
+    try:
+        session.get(url + '/private/leads', timeout=5)
+        raise AssertionError("a disallowed URL should not be fetched")
+    except RobotsDisallowed:
+        pass
+    assert RobotsHandler.fetched == ['/listings']
+    assert limiter.requests_made() == 1
+
+    # With respect_robots off, the rules are ignored
+    session = RateLimitedSession(RateLimiter(interval_range=(0, 0), respect_robots=False))
+    assert session.get(url + '/private/leads', timeout=5).text == 'ok'
+    server.shutdown()
+    print("✓ Rate limiter tests passed")
+
+class CrawlDelayHandler(BaseHTTPRequestHandler):
+    """Publishes a robots.txt asking for a second between requests"""
+
+    def do_GET(self):
+        body = b"User-agent: *\nCrawl-delay: 1\nDisallow: /private\n" if self.path == '/robots.txt' else b"ok"
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_host_spacing():
+    """One host's requests are spaced by its interval; other hosts don't wait on it"""
+    limiter = RateLimiter(interval_range=(0.2, 0.2), burst=1, respect_robots=False)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.wait('http://a.example/listings')
+    elapsed = time.monotonic() - start
+    assert 0.55 < elapsed < 0.9, f"4 requests took {elapsed:.2f}s, expected about 0.6s"
+
+    # While a.example's next slot is 0.5s away, b.example goes at once
+    limiter = RateLimiter(interval_range=(0.5, 0.5), burst=1, respect_robots=False)
+    limiter.wait('http://a.example/')
+    waiter = threading.Thread(target=limiter.wait, args=('http://a.example/',))
+    waiter.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert limiter.wait('http://b.example/') == 0
+    assert time.monotonic() - start < 0.1
+    assert waiter.is_alive()
+    waiter.join(2)
+    print("✓ Host spacing tests passed")
+
+def test_crawl_delay():
+    """A published crawl-delay stretches the interval, for async callers too"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CrawlDelayHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    limiter = RateLimiter(interval_range=(0, 0))
+
+    async def crawl():
+        start = time.monotonic()
+        await limiter.wait_async(url + '/a')
+        await limiter.wait_async(url + '/b')
+        elapsed = time.monotonic() - start
+        assert 0.9 < elapsed < 1.5, f"crawl-delay not honoured ({elapsed:.2f}s)"
+        try:
+            await limiter.wait_async(url + '/private/leads')
+            raise AssertionError("a disallowed URL should not be admitted")
+        except RobotsDisallowed:
+            pass
+
+        # A cancelled caller stops waiting for its slot
+        token = CancelToken(timeout=0.2)
+        with active(token):
+            start = time.monotonic()
+            try:
+                await limiter.wait_async(url + '/c')
+                raise AssertionError("the wait should be cancelled")
+            except Cancelled:
+                pass
+            assert time.monotonic() - start < 0.6
+
+    asyncio.run(crawl())
+    server.shutdown()
+    print("✓ Crawl-delay tests passed")
+
+if __name__ == "__main__":
+    test_robots_rules()
+    test_host_spacing()
+    test_crawl_delay()
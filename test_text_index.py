@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for the one-pass text index
+"""
+
+from keyword_matcher import KeywordMatcher
+from text_index import TextIndex
+
+PAGE = (
+    "Local Recyclers Directory\n"
+    "\n"
+    "Acme Battery Recycling\n"
+    "12 Industrial Way\n"
+    "Call (713) 555-0100\n"
+    "sales@acme.example\n"
+    "\n\n\n"
+    "Riverside Furniture Outlet\n"
+    "Tel 713-555-0199\n"
+)
+
+def test_text_index():
+    """Phones are paired with the names and emails around them"""
+    index = TextIndex(PAGE)
+    phone = PAGE.index('(713)')
+
+    # Blank lines are not indexed, so the next listing is only lines away
+    assert index.line_text(index.line_of(phone)) == 'Call (713) 555-0100'
+    assert index.names_near(phone) == ['Acme Battery Recycling', 'Local Recyclers Directory', '12 Industrial Way']
+    assert index.email_near(phone) == 'sales@acme.example'
+
+    listings = list(index.listings())
+    assert [(listing['company_name'], listing['phone']) for listing in listings] == [
+        ('Acme Battery Recycling', '(713) 555-0100'), ('Riverside Furniture Outlet', '(713) 555-0199')]
+
+    # With a matcher, phones far from any keyword are dropped
+    index = TextIndex(PAGE, matcher=KeywordMatcher(['battery', 'recycling'], {}))
+    assert [listing['phone'] for listing in index.listings(keyword_lines=2)] == ['(713) 555-0100']
+    assert not index.has_keyword_near(PAGE.index('Tel'), lines=1)
+
+    # No name nearby falls back to the default
+    index = TextIndex("(713) 555-0111\nOK\n")
+    assert list(index.listings()) == []
+    assert list(index.listings(default_name='Unknown buyer'))[0]['company_name'] == 'Unknown buyer'
+    print("✓ Text index tests passed")
+
+if __name__ == "__main__":
+    test_text_index()
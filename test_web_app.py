@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for the web API's conditional and delta-sync responses
+"""
+
+import os
+import tempfile
+from buyer_store import BuyerWriter
+from web_app import create_app
+
+def test_conditional_requests():
+    """Unchanged resources answer 304; a write changes their ETags"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'buyers.db')
+        app = create_app(db_path)
+        client = app.test_client()
+        writer = BuyerWriter(db_path, group_commit_ms=0)
+        writer.write([{'company_name': 'Acme Recycling', 'phone': '1', 'city': 'Houston'}])
+
+        for url in ('/api/buyers?limit=10', '/api/search?q=acme', '/api/export/csv', '/api/stats',
+                    '/api/recent?hours=24'):
+            response = client.get(url)
+            etag = response.headers['ETag']
+            assert response.status_code == 200 and etag, url
+            repeat = client.get(url, headers={'If-None-Match': etag})
+            assert repeat.status_code == 304 and repeat.data == b'', url
+
+        # Version ETags depend on the query too
+        first = client.get('/api/buyers?limit=10').headers['ETag']
+        assert client.get('/api/buyers?limit=5').headers['ETag'] != first
+
+        page = client.get('/api/buyers').get_json()
+        writer.write([{'company_name': 'Lead Scrap', 'phone': '2', 'city': 'Dallas'}])
+        assert client.get('/api/buyers?limit=10', headers={'If-None-Match': first}).status_code == 200
+
+        # Syncing from the last version seen returns only the change
+        changed = client.get(f"/api/buyers?since_version={page['version']}").get_json()
+        assert [buyer['company_name'] for buyer in changed['buyers']] == ['Lead Scrap']
+        assert changed['version'] == page['version'] + 1
+        recent = client.get(f"/api/recent?since_version={page['version']}").get_json()
+        assert [buyer['company_name'] for buyer in recent] == ['Lead Scrap']
+
+        assert client.get('/api/buyers?fields=password').status_code == 400
+    print("✓ Conditional request tests passed")
+
+if __name__ == "__main__":
+    test_conditional_requests()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-forked production web server
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import subprocess
+import urllib.request
+from battery_buyer_agent import CrawlerSupervisor
+from config import WEB_CONFIG
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in its own process, since serve() forks and takes over SIGTERM.
+# `other` stands in for the crawler: a child of the caller's own that
+# exits while the workers are serving and must still be the caller's to reap.
+SERVER_SCRIPT = '''
+import time, socket, sqlite3, threading, multiprocessing
+import web_server
+from buyer_store import init_schema
+
+conn = sqlite3.connect('buyers.db')
+init_schema(conn)
+conn.close()
+probe = socket.socket()
+probe.bind(('127.0.0.1', 0))
+port = probe.getsockname()[1]
+probe.close()
+
+other = multiprocessing.Process(target=time.sleep, args=(1,))
+other.start()
+print(port, flush=True)
+threads = []
+web_server.serve('buyers.db', '127.0.0.1', port, workers=2,
+                 on_poll=lambda: threads.append(threading.active_count()))
+other.join(10)
+print('other exitcode', other.exitcode, flush=True)
+print('polled on', set(threads), 'threads', flush=True)
+'''
+
+def get_stats(port):
+    for _ in range(100):
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/stats', timeout=5) as response:
+                return response.status, json.load(response)
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError("the workers never answered")
+
+def test_prefork_serving():
+    """Workers answer on the shared port, leave other children alone and stop on SIGTERM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT], stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE, text=True, cwd=tmp,
+                                  env=dict(os.environ, PYTHONPATH=HERE))
+        try:
+            port = int(server.stdout.readline())
+            for _ in range(4):
+                status, stats = get_stats(port)
+                assert status == 200 and stats['total_buyers'] == 0
+            time.sleep(1.5)
+            server.send_signal(signal.SIGTERM)
+            out, err = server.communicate(timeout=30)
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+        assert server.returncode == 0, err
+        # on_poll runs in the parent's loop, which has no threads to fork with
+        assert out.splitlines() == ['other exitcode 0', 'polled on {1} threads'], out
+    print("✓ Pre-fork server tests passed")
+
+def short_lived_crawler():
+    sys.exit(3)
+
+def sleeping_crawler():
+    time.sleep(30)
+
+def test_crawler_supervisor():
+    """A crawler that dies is restarted, no sooner than crawler_restart_seconds"""
+    restart = WEB_CONFIG["crawler_restart_seconds"]
+    WEB_CONFIG["crawler_restart_seconds"] = 3
+    supervisor = CrawlerSupervisor(target=short_lived_crawler)
+    try:
+        supervisor.poll()
+        first = supervisor.process
+        first.join(10)
+        assert first.exitcode == 3
+        supervisor.poll()
+        assert supervisor.process is first
+        time.sleep(3.1)
+        supervisor.poll()
+        assert supervisor.process is not first
+        supervisor.process.join(10)
+    finally:
+        WEB_CONFIG["crawler_restart_seconds"] = restart
+        supervisor.stop()
+
+    supervisor = CrawlerSupervisor(target=sleeping_crawler)
+    supervisor.poll()
+    running = supervisor.process
+    supervisor.poll()
+    assert supervisor.process is running and running.is_alive()
+    supervisor.stop()
+    assert running.exitcode == -signal.SIGTERM
+    print("✓ Crawler supervisor tests passed")
+
+if __name__ == "__main__":
+    test_prefork_serving()
+    test_crawler_supervisor()
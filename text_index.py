@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+One-pass text index for the Battery Buyer Finder Agent
+Associates contacts on a page with nearby company names
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from contact_extractor import extract_contacts
+
+LINE_PATTERN = re.compile(r'[^\n]*\S[^\n]*')
+
+class TextIndex:
+    """Line, keyword and contact positions for a page of text.
+
+    Everything is computed in a single pass when the index is built, so
+    proximity queries cost a binary search plus the size of the window
+    rather than a rescan of the page. Blank lines are not indexed, which
+    keeps "nearby" meaningful on pages full of whitespace.
+    """
+
+    def __init__(self, text, matcher=None, min_keyword_weight=1.0, min_name_length=6, max_name_length=59):
+        self.text = text
+        self.min_name_length = min_name_length
+        self.max_name_length = max_name_length
+
+        # Non-blank lines as (start, end) offsets
+        self.lines = [match.span() for match in LINE_PATTERN.finditer(text)]
+        self.line_starts = [start for start, _ in self.lines]
+
+        # Contacts with the lines they appear on
+        self.contacts = extract_contacts(text)
+        self.contact_lines = set()
+        for entry in self.contacts['phones'] + self.contacts['emails']:
+            for start, _ in entry['offsets']:
+                self.contact_lines.add(self.line_of(start))
+        self.email_positions = sorted(
+            (start, entry['email'])
+            for entry in self.contacts['emails']
+            for start, _ in entry['offsets']
+        )
+
+        # Keyword hits weighty enough to anchor contacts, as sorted line numbers
+        self.keyword_hits = []
+        self.keyword_lines = []
+        if matcher is not None:
+            self.keyword_hits = [hit for hit in matcher.scan(text)
+                                 if matcher.weights[hit[2]] >= min_keyword_weight]
+            self.keyword_lines = sorted({self.line_of(start) for start, _, _ in self.keyword_hits})
+
+    def line_of(self, offset):
+        """Index of the non-blank line containing or preceding offset"""
+        return max(bisect_right(self.line_starts, offset) - 1, 0)
+
+    def line_text(self, line_no):
+        start, end = self.lines[line_no]
+        return self.text[start:end].strip()
+
+    def _window(self, offset, before, after):
+        line_no = self.line_of(offset)
+        return line_no, max(line_no - before, 0), min(line_no + after, len(self.lines) - 1)
+
+    def has_keyword_near(self, offset, lines=3):
+        """Whether a keyword hit lies within `lines` lines of offset"""
+        line_no, low, high = self._window(offset, lines, lines)
+        i = bisect_left(self.keyword_lines, low)
+        return i < len(self.keyword_lines) and self.keyword_lines[i] <= high
+
+    def names_near(self, offset, before=3, after=1):
+        """Candidate company names around offset, nearest first.
+
+        Lines above the contact are preferred, since listings usually put
+        the name first, and lines starting with a digit (street addresses)
+        rank last. Lines holding contact details are never names.
+        """
+        if not self.lines:
+            return []
+        line_no, low, high = self._window(offset, before, after)
+        order = list(range(line_no - 1, low - 1, -1)) + list(range(line_no + 1, high + 1))
+
+        names = []
+        for candidate in order:
+            if candidate in self.contact_lines:
+                continue
+            name = self.line_text(candidate)
+            if (self.min_name_length <= len(name) <= self.max_name_length
+                    and any(ch.isalpha() for ch in name)):
+                names.append(name)
+        return sorted(names, key=lambda name: name[0].isdigit())
+
+    def email_near(self, offset, lines=3):
+        """Nearest email within `lines` lines of offset, or ''"""
+        if not self.email_positions:
+            return ''
+        line_no, low, high = self._window(offset, lines, lines)
+        best = ''
+        best_distance = None
+        i = bisect_left(self.email_positions, (self.lines[low][0], ''))
+        while i < len(self.email_positions) and self.email_positions[i][0] <= self.lines[high][1]:
+            position, email = self.email_positions[i]
+            distance = abs(position - offset)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = email, distance
+            i += 1
+        return best
+
+    def listings(self, keyword_lines=None, max_name_length=None, default_name=None):
+        """One candidate listing per phone number on the page.
+
+        Yields {'company_name', 'phone', 'email'} for every phone that has
+        a plausible name nearby, or `default_name` when given. With
+        keyword_lines set, phones without a keyword hit within that many
+        lines are skipped.
+        """
+        for phone in self.contacts['phones']:
+            for start, _ in phone['offsets']:
+                if keyword_lines is not None and not self.has_keyword_near(start, keyword_lines):
+                    continue
+                names = self.names_near(start)
+                if max_name_length:
+                    names = [name for name in names if len(name) <= max_name_length]
+                if names or default_name:
+                    yield {
+                        'company_name': names[0] if names else default_name,
+                        'phone': phone['display'],
+                        'email': self.email_near(start)
+                    }
+                    break
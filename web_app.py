@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Web interface for the Battery Buyer Finder Agent
+Flask app factory serving the dashboard and the read-only JSON API
+"""
+
+import re
+import sqlite3
+import hashlib
+from flask import Flask, Response, render_template, jsonify, request
+from buyer_events import BuyerEvents
+from buyer_store import init_schema
+from buyer_queries import BuyerQueries, page_to_json
+from buyer_export import EXPORT_FORMATS, export_stream, export_filename
+from buyer_search import search_buyers
+from geo import gazetteer, nearby_buyers
+from config import DATABASE_CONFIG
+
+def buyer_filters():
+    """Filter arguments shared by the listing and export endpoints"""
+    return {
+        'city': request.args.get('city'),
+        'state': request.args.get('state'),
+        'business_type': request.args.get('business_type'),
+        'min_confidence': request.args.get('min_confidence', type=float),
+        'since': request.args.get('since'),
+        'since_version': request.args.get('since_version', type=int)
+    }
+
+def version_etag(version):
+    """Strong ETag for a response fully determined by data version and URL"""
+    digest = hashlib.sha1(request.full_path.encode('utf-8')).hexdigest()[:16]
+    return f"v{version}-{digest}"
+
+def conditional(response, etag=None):
+    """Tag a response and answer 304 if the client already holds it.
+
+    Without an explicit etag the body is hashed, which suits responses
+    that also depend on the clock, such as the rolling stats windows.
+    """
+    if etag is None:
+        response.add_etag()
+    else:
+        response.set_etag(etag)
+    return response.make_conditional(request)
+
+def create_app(db_path=None):
+    """Build the Flask app over the buyers database at db_path.
+
+    The app only reads the database, so it needs none of the crawler's
+    dependencies and starts without touching selenium or the network.
+    """
+    db_path = db_path or DATABASE_CONFIG["path"]
+    conn = sqlite3.connect(db_path)
+    init_schema(conn)
+    conn.close()
+
+    app = Flask(__name__)
+    queries = BuyerQueries(db_path)
+    events = BuyerEvents(db_path)
+    app.config['DB_PATH'] = db_path
+    app.extensions['buyer_queries'] = queries
+    app.extensions['buyer_events'] = events
+
+    @app.teardown_appcontext
+    def release_connection(exc):
+        queries.release()
+
+    def unchanged(etag):
+        """304 for a version-tagged resource the client has, else None"""
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        return None
+
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+
+    @app.route('/api/buyers')
+    def api_buyers():
+        """One page of buyers; follow next_cursor for the rest"""
+        etag = version_etag(queries.data_version())
+        cached = unchanged(etag)
+        if cached is not None:
+            return cached
+        try:
+            page = queries.buyers_page(
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields'),
+                **buyer_filters()
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return conditional(Response(page_to_json(page), mimetype='application/json'), etag)
+
+    @app.route('/api/search')
+    def api_search():
+        """Ranked full-text search; the last word of q matches as a prefix"""
+        etag = version_etag(queries.data_version())
+        cached = unchanged(etag)
+        if cached is not None:
+            return cached
+        try:
+            page = search_buyers(
+                queries.connection(),
+                request.args.get('q', ''),
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                fields=request.args.get('fields'),
+                **buyer_filters()
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return conditional(Response(page_to_json(page), mimetype='application/json'), etag)
+
+    @app.route('/api/nearby')
+    def api_nearby():
+        """Buyers within radius_km of lat/lon, or of a gazetteer city or ZIP"""
+        etag = version_etag(queries.data_version())
+        cached = unchanged(etag)
+        if cached is not None:
+            return cached
+        latitude = request.args.get('lat', type=float)
+        longitude = request.args.get('lon', type=float)
+        near = request.args.get('near')
+        if latitude is None or longitude is None:
+            if not near:
+                return jsonify({'error': "Pass lat and lon, or near=City[, ST] or near=ZIP"}), 400
+            places = gazetteer()
+            if re.fullmatch(r'\d{5}', near.strip()):
+                place = places.zip(near.strip()) or places.zip_area(near.strip())
+            else:
+                name, _, state = near.partition(',')
+                place = places.city(name, state.strip() or None)
+            if place is None:
+                return jsonify({'error': f"Unknown place: {near}"}), 400
+            latitude, longitude = place['latitude'], place['longitude']
+        try:
+            result = nearby_buyers(
+                queries.connection(), latitude, longitude,
+                radius_km=request.args.get('radius_km', type=float),
+                limit=request.args.get('limit', type=int),
+                fields=request.args.get('fields'),
+                **buyer_filters()
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        result['center'] = {'latitude': latitude, 'longitude': longitude}
+        return conditional(Response(page_to_json(result), mimetype='application/json'), etag)
+
+    @app.route('/api/export/<fmt>')
+    def api_export(fmt):
+        """Stream every matching buyer as NDJSON or CSV, gzipped with ?gzip=1"""
+        compress = request.args.get('gzip', 0, type=int) == 1
+        etag = version_etag(queries.data_version())
+        cached = unchanged(etag)
+        if cached is not None:
+            return cached
+        try:
+            stream = export_stream(
+                db_path, fmt, compress,
+                fields=request.args.get('fields'),
+                **buyer_filters()
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        response = Response(
+            stream,
+            mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={export_filename(fmt, compress)}'}
+        )
+        response.set_etag(etag)
+        return response
+
+    @app.route('/api/recent')
+    def api_recent():
+        hours = request.args.get('hours', 24, type=int)
+        since_version = request.args.get('since_version', type=int)
+        return conditional(jsonify(queries.recent_buyers(hours, since_version)))
+
+    @app.route('/api/timeseries')
+    def api_timeseries():
+        """Hourly or daily new/re-seen counts, optionally split by dimension"""
+        try:
+            series = queries.timeseries(
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                bucket=request.args.get('bucket', 'hour'),
+                group_by=request.args.get('group_by'),
+                business_type=request.args.get('business_type'),
+                source=request.args.get('source'),
+                city=request.args.get('city')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return conditional(jsonify(series))
+
+    @app.route('/api/events')
+    def api_events():
+        """Server-Sent Events: 'buyer' for each save, 'stats' after each batch"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return jsonify({'error': f"Invalid Last-Event-ID: {last_event_id}"}), 400
+        return Response(
+            events.subscribe(last_event_id),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    @app.route('/api/stats')
+    def api_stats():
+        return conditional(jsonify(queries.stats()))
+
+    return app
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Production web server for the Battery Buyer Finder Agent
+Pre-forked, threaded WSGI workers sharing one listening socket
+"""
+
+import os
+import time
+import socket
+import signal
+import logging
+import threading
+from config import WEB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks on its workers and calls on_poll
+POLL_SECONDS = 0.5
+
+def listen(host, port, backlog=128):
+    """Bound, listening socket the workers accept from"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def poll(callback):
+    try:
+        callback()
+    except Exception as e:
+        logger.error(f"Server poll callback failed: {e}")
+
+def poll_forever(callback):
+    while True:
+        poll(callback)
+        time.sleep(POLL_SECONDS)
+
+def run_worker(db_path, host, port, fd):
+    """Serve the app on an inherited socket until terminated"""
+    from werkzeug.serving import make_server
+    from web_app import create_app
+
+    app = create_app(db_path)
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    server.serve_forever()
+
+def serve(db_path, host=None, port=None, workers=None, app=None, on_poll=None):
+    """Serve the dashboard and API with worker processes.
+
+    The parent binds the port and forks `workers` children, each running
+    a threaded WSGI server on the shared socket and holding its own read
+    connection pool; the kernel spreads connections across them, and a
+    worker that dies is replaced. With one worker, or where fork is not
+    available, `app` (or a new one) is served from this process instead.
+    `on_poll()`, if given, is called about every half second: from the
+    parent's supervision loop, which stays single-threaded so that forking
+    workers is safe, or from a thread when serving in-process. Blocks
+    until SIGINT/SIGTERM.
+    """
+    host = host or WEB_CONFIG["host"]
+    port = port or WEB_CONFIG["port"]
+    workers = workers or WEB_CONFIG["workers"]
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        from werkzeug.serving import make_server
+        if app is None:
+            from web_app import create_app
+            app = create_app(db_path)
+        if on_poll is not None:
+            threading.Thread(target=poll_forever, args=(on_poll,), name='serve-poll', daemon=True).start()
+        logger.info(f"Serving on http://{host}:{port} (1 process, threaded)")
+        make_server(host, port, app, threaded=True).serve_forever()
+        return
+
+    sock = listen(host, port)
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(db_path, host, port, sock.fileno())
+            finally:
+                os._exit(1)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    logger.info(f"Serving on http://{host}:{port} ({workers} processes, threaded)")
+    try:
+        for _ in range(workers):
+            spawn()
+        while not stopping:
+            # Only our own workers: the caller may have other children
+            # (the crawler process) that it waits on itself
+            for pid in list(children):
+                try:
+                    exited, status = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    exited, status = pid, None
+                if not exited:
+                    continue
+                started = children.pop(pid)
+                logger.warning(f"Web worker {pid} exited with status {status}, restarting")
+                # Back off a worker that cannot even start
+                if time.monotonic() - started < 1:
+                    time.sleep(1)
+                spawn()
+            if on_poll is not None:
+                poll(on_poll)
+            time.sleep(POLL_SECONDS)
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        sock.close()